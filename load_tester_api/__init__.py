@@ -1,3 +1,17 @@
 from .load_tester import LoadTester
 from .result import TestResult
 from .errors import LoadTesterError
+from .scheduler import ConstantArrivals, PoissonArrivals, BurstArrivals, make_schedule
+from .histogram import LogHistogram
+from .sharding import ShardedLoadTester
+from .live import LiveMetrics
+from .engines import Engine, AiohttpEngine, RawHTTPEngine, make_engine
+from .scenario import Scenario, RequestTemplate
+from .search import CapacitySearch, SLO
+from .distributed import Agent, Coordinator
+from .samplelog import SampleLog, SampleFile, analyze
+from .abort import AbortPolicy
+from .monitor import GeneratorMonitor, Profiler
+from .compare import Comparison, RegressionBudget, RunData
+from .checks import ResponseCheck
+from .streaming import StreamTester
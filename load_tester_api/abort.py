@@ -0,0 +1,141 @@
+import re
+from collections import deque
+from .errors import LoadTesterError
+from .histogram import LogHistogram
+from .profile import parse_duration
+
+ABORT_TERM = re.compile(
+    r"^\s*(?:p(?P<percentile>\d+(?:\.\d+)?)\s*>\s*(?P<latency>[\d.]+)\s*(?P<unit>ms|s)?"
+    r"|errors?\s*>\s*(?P<errors>[\d.]+)\s*(?P<percent>%)?"
+    r"|consecutive\s*>\s*(?P<consecutive>\d+)"
+    r"|window\s*=\s*(?P<window>\S+))\s*$"
+)
+WINDOW_SLICES = 10  # The sliding window moves in steps of window / WINDOW_SLICES
+
+
+class AbortPolicy:
+    # Conditions that stop a test early once the target is clearly failing:
+    # an error rate or latency percentile above a threshold within a sliding
+    # `window` (judged once it holds at least `min_requests` requests), or
+    # more than `max_consecutive_errors` requests in a row without a response.
+    # The window is kept as slices with a small histogram each, so recording
+    # is O(1) and a check merges a fixed number of slices.
+    def __init__(
+        self,
+        max_error_rate=None,
+        latency_ms=None,
+        percentile=99,
+        max_consecutive_errors=None,
+        window=10.0,
+        min_requests=20,
+    ):
+        if max_error_rate is None and latency_ms is None and max_consecutive_errors is None:
+            raise LoadTesterError("An abort policy needs at least one condition")
+        if not 0 < percentile <= 100:
+            raise LoadTesterError(f"Abort percentile must be in (0, 100], got: {percentile}")
+        if window <= 0:
+            raise LoadTesterError(f"Abort window must be positive, got: {window}")
+        self.max_error_rate = max_error_rate
+        self.latency_ms = latency_ms
+        self.percentile = percentile
+        self.max_consecutive_errors = max_consecutive_errors
+        self.window = window
+        self.min_requests = min_requests
+        self.slice_width = window / WINDOW_SLICES
+        self.interval = self.slice_width  # How often the window is checked
+        self.slices = deque()  # [start, requests, errors, LogHistogram], oldest first
+        self.consecutive_errors = 0
+
+    @classmethod
+    def parse(cls, text):
+        # Parse "errors>50%,p99>2s,consecutive>100,window=30s" (any subset)
+        options = {}
+        for term in text.split(","):
+            match = ABORT_TERM.match(term)
+            if not match:
+                raise LoadTesterError(f"Invalid abort condition: {term.strip()}")
+            if match.group("latency"):
+                scale = 1000 if match.group("unit") == "s" else 1
+                options["latency_ms"] = float(match.group("latency")) * scale
+                options["percentile"] = float(match.group("percentile"))
+            elif match.group("errors"):
+                rate = float(match.group("errors"))
+                options["max_error_rate"] = rate / 100 if match.group("percent") else rate
+            elif match.group("consecutive"):
+                options["max_consecutive_errors"] = int(match.group("consecutive"))
+            else:
+                options["window"] = parse_duration(match.group("window"))
+        return cls(**options)
+
+    def describe(self):
+        terms = []
+        if self.max_error_rate is not None:
+            terms.append(f"errors > {self.max_error_rate:.2%}")
+        if self.latency_ms is not None:
+            terms.append(f"p{self.percentile:g} > {self.latency_ms:g} ms")
+        if self.latency_ms is not None or self.max_error_rate is not None:
+            terms[-1] += f" over {self.window:g}s"
+        if self.max_consecutive_errors is not None:
+            terms.append(f"{self.max_consecutive_errors} consecutive errors")
+        return " or ".join(terms)
+
+    def start(self, now):
+        self.slices = deque([[now, 0, 0, LogHistogram(2)]])
+        self.consecutive_errors = 0
+
+    def current_slice(self, now):
+        current = self.slices[-1]
+        if now - current[0] >= self.slice_width:
+            current = [now, 0, 0, LogHistogram(2)]
+            self.slices.append(current)
+            while now - self.slices[0][0] > self.window:
+                self.slices.popleft()
+        return current
+
+    def record(self, now, latency, failed):
+        # A request that got a response
+        current = self.current_slice(now)
+        current[1] += 1
+        if failed:
+            current[2] += 1
+        current[3].record(latency)
+        self.consecutive_errors = 0
+
+    def record_error(self, now):
+        # A request that got no response; returns a reason if that trips the
+        # consecutive error limit
+        current = self.current_slice(now)
+        current[1] += 1
+        current[2] += 1
+        self.consecutive_errors += 1
+        if (
+            self.max_consecutive_errors is not None
+            and self.consecutive_errors > self.max_consecutive_errors
+        ):
+            return f"{self.consecutive_errors} consecutive requests without a response"
+        return None
+
+    def check(self, now):
+        # Reason to abort based on the sliding window, or None
+        self.current_slice(now)  # Drops slices that left the window
+        requests = sum(item[1] for item in self.slices)
+        if requests < self.min_requests:
+            return None
+        if self.max_error_rate is not None:
+            rate = sum(item[2] for item in self.slices) / requests
+            if rate > self.max_error_rate:
+                return (
+                    f"error rate {rate:.2%} over {self.max_error_rate:.2%} "
+                    f"in the last {self.window:g}s"
+                )
+        if self.latency_ms is not None:
+            histogram = LogHistogram(2)
+            for item in self.slices:
+                histogram.merge(item[3])
+            latency = histogram.percentile(self.percentile) * 1000
+            if histogram.count and latency > self.latency_ms:
+                return (
+                    f"p{self.percentile:g} {latency:.1f} ms over {self.latency_ms:g} ms "
+                    f"in the last {self.window:g}s"
+                )
+        return None
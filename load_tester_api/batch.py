@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+from urllib.parse import urlparse
+from . import formatter, utils
+from .engines import AiohttpEngine, CachedResolver, ConnectError, RawHTTPEngine
+from .errors import LoadTesterError, URLCheckError
+from .load_tester import LoadTester
+from .profile import parse_duration
+
+# Config keys of a batch file and the LoadTester options they set
+CONFIG_OPTIONS = {
+    "url": "url",
+    "method": "method",
+    "concurrency": "concurrency",
+    "requests": "total_requests",
+    "headers": "headers",
+    "payload": "payload",
+    "qps": "qps",
+    "arrival": "arrival",
+    "burst_size": "burst_size",
+    "histogram": "histogram",
+    "histogram_precision": "histogram_precision",
+    "percentiles": "percentiles",
+    "duration": "duration",
+    "body_mode": "body_mode",
+    "body_limit": "body_limit",
+    "engine": "engine",
+    "pipeline_depth": "pipeline_depth",
+    "connection_mode": "connection_mode",
+    "prewarm": "prewarm",
+    "warmup": "warmup",
+    "dns_ttl": "dns_ttl",
+    "resolve": "resolve",
+    "abort": "abort",
+    "timeout": "timeout",
+    "check": "check",
+}
+CONFIG_DEFAULTS = {"method": "GET", "concurrency": 10, "requests": 100}
+
+
+def config_hash(config):
+    # Stable short hash of a config; part of its output file name, so a rerun
+    # can tell which configs already have a result
+    text = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+def expand_configs(data):
+    # Build the list of configs from a batch file: the cartesian product of
+    # the "matrix" lists plus any explicit "configs", each on top of the
+    # "defaults". Duplicates are dropped.
+    defaults = dict(CONFIG_DEFAULTS, **data.get("defaults", {}))
+    configs = []
+    matrix = data.get("matrix", {})
+    if matrix:
+        keys = list(matrix)
+        values = [
+            matrix[key] if isinstance(matrix[key], list) else [matrix[key]]
+            for key in keys
+        ]
+        for combination in itertools.product(*values):
+            configs.append(dict(defaults, **dict(zip(keys, combination))))
+    for config in data.get("configs", []):
+        configs.append(dict(defaults, **config))
+    unique = {}
+    for config in configs:
+        unknown = set(config) - set(CONFIG_OPTIONS)
+        if unknown:
+            raise LoadTesterError(f"Unknown batch config keys: {', '.join(sorted(unknown))}")
+        if not config.get("url"):
+            raise LoadTesterError(f"Batch config without a url: {config}")
+        utils.validate_url(config["url"])
+        unique.setdefault(config_hash(config), config)
+    if not unique:
+        raise LoadTesterError("The batch file defines no configs")
+    return unique
+
+
+def host_key(config):
+    parsed = urlparse(config["url"])
+    return parsed.hostname, parsed.port or (443 if parsed.scheme == "https" else 80)
+
+
+class BatchRunner:
+    # Runs a sweep of load test configs. Configs for the same host run one
+    # after another so they do not disturb each other's numbers; different
+    # hosts run side by side, up to `parallel` at a time. All runs share one
+    # DNS cache, each URL is pre-flight checked once, and configs whose result
+    # file (named by config hash) already exists are skipped unless `force`.
+    def __init__(
+        self, configs, parallel=1, output_folder=None, force=False, preflight=True
+    ):
+        if parallel < 1:
+            raise LoadTesterError(f"Parallel must be at least 1, got: {parallel}")
+        self.configs = configs  # {config hash: config}
+        self.parallel = parallel
+        self.output_folder = output_folder or utils.batch_output_folder()
+        self.force = force
+        self.preflight = preflight
+        self.resolver = None
+        self.preflight_errors = {}  # URL -> error message, or None if reachable
+        self.runs = []
+
+    @classmethod
+    def from_file(cls, path, **options):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise LoadTesterError(f"Could not read batch file {path}: {e}")
+        options.setdefault("parallel", data.get("parallel", 1))
+        return cls(expand_configs(data), **options)
+
+    def output_filename(self, config, digest):
+        if config.get("duration"):
+            size = f"{round(parse_duration(config['duration']))}seconds"
+        else:
+            size = f"{config['requests']}requests"
+        return (
+            f"{self.output_folder}/{urlparse(config['url']).hostname}_{config['method']}"
+            f"_{config['concurrency']}concurrency_{size}_{digest}.json"
+        )
+
+    def make_engine(self, config):
+        # Every engine resolves through the batch's shared DNS cache
+        if config.get("engine", "aiohttp") == RawHTTPEngine.name:
+            return RawHTTPEngine(config.get("pipeline_depth", 1), resolver=self.resolver)
+        if config.get("engine", "aiohttp") != AiohttpEngine.name:
+            raise LoadTesterError(f"Unknown engine: {config['engine']}")
+        if config.get("pipeline_depth", 1) != 1:
+            raise LoadTesterError("Pipelining is only supported by the raw engine")
+        return AiohttpEngine({"resolver": self.resolver})
+
+    def make_tester(self, config):
+        options = {CONFIG_OPTIONS[key]: value for key, value in config.items()}
+        for name in ("duration", "warmup"):
+            if options.get(name) is not None:
+                options[name] = parse_duration(options[name])
+        options["engine"] = self.make_engine(config)
+        options.pop("pipeline_depth", None)
+        return LoadTester(preflight=False, **options)
+
+    async def check(self, tester):
+        # Pre-flight each URL once for the whole batch
+        if tester.url not in self.preflight_errors:
+            try:
+                await tester.check_url()
+                self.preflight_errors[tester.url] = None
+            except URLCheckError as e:
+                self.preflight_errors[tester.url] = str(e)
+        return self.preflight_errors[tester.url]
+
+    def record(self, digest, config, status, **details):
+        self.runs.append(
+            dict(
+                config_hash=digest,
+                url=config["url"],
+                method=config["method"],
+                concurrency=config["concurrency"],
+                status=status,
+                **details,
+            )
+        )
+
+    async def run_config(self, digest, config, output_filename):
+        try:
+            tester = self.make_tester(config)
+        except LoadTesterError as e:
+            self.record(digest, config, "failed", error=str(e))
+            return
+        # Opened here rather than by run_test, so the pre-flight check goes
+        # through the shared resolver and leaves its connection in the pool
+        engine = tester.engine
+        try:
+            await engine.open(tester, tester.concurrency)
+            if self.preflight:
+                error = await self.check(tester)
+                if error is not None:
+                    # No result file is written, so the config runs again next time
+                    self.record(digest, config, "unreachable", error=error)
+                    return
+            await tester.run_test()
+        except ConnectError as e:
+            self.record(digest, config, "unreachable", error=str(e))
+            return
+        except LoadTesterError as e:
+            self.record(digest, config, "failed", error=str(e))
+            return
+        finally:
+            await engine.close()
+        results = tester.get_results()
+        if (
+            results.completed_requests == 0
+            and results.failed_requests > 0
+            and results.failed_requests
+            == results.connection_errors + results.invalid_url_errors
+        ):
+            # Not one connection was made (pre-flight off): like a failed
+            # pre-flight, no result file, so the config runs again next time
+            self.record(
+                digest,
+                config,
+                "unreachable",
+                error=f"All {results.failed_requests} requests failed to connect",
+            )
+            return
+        summary = results.summary()
+        with open(output_filename, "w") as f:
+            json.dump(formatter.format_results(summary), f, indent=4)
+        self.record(
+            digest,
+            config,
+            "completed",
+            output=output_filename,
+            requests_per_second=summary["requests_per_second"],
+            failed_requests=summary["failed_requests"],
+        )
+
+    async def run_group(self, group, slots):
+        # One host's configs, strictly one after another
+        async with slots:
+            for digest, config, output_filename in group:
+                await self.run_config(digest, config, output_filename)
+
+    async def run(self):
+        os.makedirs(self.output_folder, exist_ok=True)
+        self.resolver = CachedResolver()
+        groups = {}
+        for digest, config in self.configs.items():
+            output_filename = self.output_filename(config, digest)
+            if not self.force and os.path.exists(output_filename):
+                self.record(digest, config, "skipped", output=output_filename)
+                continue
+            groups.setdefault(host_key(config), []).append(
+                (digest, config, output_filename)
+            )
+        slots = asyncio.Semaphore(self.parallel)
+        await asyncio.gather(*(self.run_group(group, slots) for group in groups.values()))
+        return self.runs
@@ -0,0 +1,212 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import sys
+import time
+from aiohttp import web
+from load_tester_api import LoadTester, LoadTesterError
+from load_tester_api.monitor import current_rss_kb
+from load_tester_api.benchmarks.server import bound_address, make_app
+
+
+def serve(port, ready, stop):
+    # Body of a stand-in server process: the stand-in routes (fixed,
+    # delayed and large-body responses), sharing one port via SO_REUSEPORT
+    async def run():
+        runner = web.AppRunner(make_app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", port.value, reuse_port=True)
+        await site.start()
+        port.value = bound_address(runner)[1]
+        ready.set()
+        while not stop.is_set():
+            await asyncio.sleep(0.1)
+        await runner.cleanup()
+
+    asyncio.run(run())
+
+
+class StandInServer:
+    # Runs the stand-in server in separate processes, so the CPU time and RSS
+    # measured in this process belong to the load generator alone
+    def __init__(self, processes=1):
+        self.processes = processes
+        self.workers = []
+        self.port = None
+        self._stop = None
+
+    def url(self, path="/"):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def __enter__(self):
+        context = multiprocessing.get_context("spawn")
+        port = context.Value("i", 0)
+        self._stop = context.Event()
+        for _ in range(self.processes):
+            # The first process picks a free port, the others join it
+            ready = context.Event()
+            worker = context.Process(
+                target=serve, args=(port, ready, self._stop), daemon=True
+            )
+            worker.start()
+            self.workers.append(worker)
+            if not ready.wait(30):
+                self.__exit__()
+                raise LoadTesterError("Stand-in server did not start")
+        self.port = port.value
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        for worker in self.workers:
+            worker.join(5)
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = []
+
+
+async def run_case(url, engine, concurrency, requests):
+    tester = LoadTester(
+        url,
+        concurrency=concurrency,
+        total_requests=requests,
+        engine=engine,
+        histogram=True,
+        preflight=False,
+    )
+    rss_before = current_rss_kb()
+    cpu_before = time.process_time()
+    await tester.run_test()
+    cpu = time.process_time() - cpu_before
+    results = tester.get_results()
+    return results, cpu, current_rss_kb() - rss_before
+
+
+async def measure(server, engine, concurrency, requests, delay_ms):
+    # Throughput, CPU and memory: closed loop against the fixed response
+    results, cpu, rss_growth = await run_case(
+        server.url("/"), engine, concurrency, requests
+    )
+    seconds = results.total_test_time
+    completed = results.completed_requests
+    # Latency overhead: time the generator adds on top of a known server delay.
+    # Kept to a light load so the stand-in server is not the one queueing.
+    overhead_requests = max(concurrency * 5, 50)
+    delayed, _, _ = await run_case(
+        server.url(f"/delay?ms={delay_ms}"), engine, concurrency, overhead_requests
+    )
+    percentiles = delayed.latencies.percentiles([50, 99])
+    return {
+        "engine": engine,
+        "concurrency": concurrency,
+        "requests": requests,
+        "completed": completed,
+        "failed": results.failed_requests,
+        "seconds": round(seconds, 3),
+        "max_rps": round(completed / seconds, 1) if seconds else 0,
+        "cpu_seconds": round(cpu, 3),
+        "cpu_us_per_request": round(cpu / completed * 1e6, 2) if completed else None,
+        # Near 1.0 means the generator, not the server, is the bottleneck
+        "generator_cpu_utilization": round(cpu / seconds, 3) if seconds else None,
+        "rss_growth_kb": rss_growth,
+        "latency_overhead_ms": {
+            "delay": delay_ms,
+            "mean": round(delayed.latencies.mean() * 1000 - delay_ms, 3),
+            "p50": round(percentiles[50] * 1000 - delay_ms, 3),
+            "p99": round(percentiles[99] * 1000 - delay_ms, 3),
+        },
+    }
+
+
+async def run_suite(server, engines, concurrency_levels, requests, delay_ms):
+    cases = []
+    # A short untimed run first, so imports and first connections are warm
+    await run_case(server.url("/"), engines[0], 1, 100)
+    for engine in engines:
+        for concurrency in concurrency_levels:
+            cases.append(
+                await measure(server, engine, concurrency, requests, delay_ms)
+            )
+    return cases
+
+
+def install_uvloop():
+    # uvloop is optional: only needed when --uvloop is asked for
+    try:
+        import uvloop
+    except ImportError:
+        raise LoadTesterError("--uvloop needs the uvloop package (pip install uvloop)")
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return f"uvloop {uvloop.__version__}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the load generator's own ceiling against a local stand-in server"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 10, 50, 200],
+        help="Concurrency levels to measure",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=20_000, help="Requests per throughput run"
+    )
+    parser.add_argument(
+        "--engines",
+        nargs="+",
+        choices=["aiohttp", "raw"],
+        default=["aiohttp", "raw"],
+        help="Engines to measure",
+    )
+    parser.add_argument(
+        "--delay-ms",
+        type=float,
+        default=20,
+        help="Server delay used to measure latency overhead",
+    )
+    parser.add_argument(
+        "--server-processes",
+        type=int,
+        default=2,
+        help="Stand-in server processes sharing the port",
+    )
+    parser.add_argument("--uvloop", action="store_true", help="Run on uvloop")
+    parser.add_argument(
+        "--output", type=str, default=None, help="Also write the JSON report to this file"
+    )
+    args = parser.parse_args()
+
+    try:
+        loop = install_uvloop() if args.uvloop else "asyncio"
+    except LoadTesterError as e:
+        print(json.dumps({"error": str(e)}, indent=4))
+        sys.exit(1)
+
+    with StandInServer(args.server_processes) as server:
+        cases = asyncio.run(
+            run_suite(
+                server, args.engines, args.concurrency, args.requests, args.delay_ms
+            )
+        )
+    report = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "loop": loop,
+        "server_processes": args.server_processes,
+        "cases": cases,
+    }
+    output = json.dumps(report, indent=4)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+from load_tester_api import LoadTester
+
+
+class NullFetchTester(LoadTester):
+    # LoadTester whose requests complete instantly, so the run measures only the
+    # generator's own scheduling machinery: workers, counters and result records
+    async def fetch(self, intended_time=None):
+        self.results.completed_requests += 1
+        await asyncio.sleep(0)
+
+
+def peak_rss_kb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+async def measure(requests, concurrency, qps):
+    tester = NullFetchTester(
+        "http://127.0.0.1/",
+        concurrency=concurrency,
+        total_requests=requests,
+        qps=qps,
+        histogram=True,
+        preflight=False,
+    )
+    baseline = peak_rss_kb()
+    started = time.perf_counter()
+    await tester.run_test()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "completed": tester.get_results().completed_requests,
+        "seconds": round(time.perf_counter() - started, 3),
+        "baseline_rss_kb": baseline,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Peak RSS of the request dispatcher as total requests grow"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000, 10_000_000],
+        help="Total request counts to measure",
+    )
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument(
+        "--qps", type=float, default=None, help="Open-loop rate (default: closed loop)"
+    )
+    parser.add_argument(
+        "--single", action="store_true", help="Measure one size in this process"
+    )
+    args = parser.parse_args()
+
+    if args.single:
+        print(
+            json.dumps(
+                asyncio.run(measure(args.sizes[0], args.concurrency, args.qps))
+            )
+        )
+        return
+
+    # Each size runs in a fresh interpreter so peak RSS is not shared between runs
+    for size in args.sizes:
+        command = [
+            sys.executable,
+            "-m",
+            "load_tester_api.benchmarks.rss",
+            "--single",
+            "--sizes",
+            str(size),
+            "--concurrency",
+            str(args.concurrency),
+        ]
+        if args.qps:
+            command += ["--qps", str(args.qps)]
+        output = subprocess.run(command, capture_output=True, text=True, check=True)
+        print(output.stdout.strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import asyncio
+from aiohttp import WSMsgType, web
+
+
+async def index(request):
+    return web.Response(text="ok", headers={"Server": "stand-in/1.0"})
+
+
+async def delay(request):
+    await asyncio.sleep(float(request.query.get("ms", "10")) / 1000)
+    return web.Response(text="delayed")
+
+
+async def status(request):
+    return web.Response(status=int(request.match_info["code"]), text="status")
+
+
+async def large(request):
+    return web.Response(body=b"x" * int(request.query.get("size", "1048576")))
+
+
+async def chunked(request):
+    # Streamed with chunked transfer encoding: no Content-Length header
+    response = web.StreamResponse()
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    for _ in range(int(request.query.get("chunks", "4"))):
+        await response.write(b"y" * 1000)
+    await response.write_eof()
+    return response
+
+
+async def json_body(request):
+    # A JSON document whose "status" field is taken from the query
+    return web.json_response(
+        {"status": request.query.get("status", "ok"), "items": [{"id": 1}]}
+    )
+
+
+async def echo(request):
+    return web.Response(body=await request.read())
+
+
+async def websocket(request):
+    # Echoes every message; closes after `close_after` messages if given
+    socket = web.WebSocketResponse()
+    await socket.prepare(request)
+    close_after = int(request.query.get("close_after", "0"))
+    count = 0
+    async for message in socket:
+        if message.type == WSMsgType.TEXT:
+            await socket.send_str(message.data)
+            count += 1
+            if count == close_after:
+                await socket.close()
+    return socket
+
+
+async def events(request):
+    # Server-sent events every `ms` milliseconds, `count` of them
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+    for index in range(int(request.query.get("count", "10"))):
+        await response.write(f"id: {index}\ndata: tick\n\n".encode())
+        await asyncio.sleep(float(request.query.get("ms", "10")) / 1000)
+    await response.write_eof()
+    return response
+
+
+def make_app():
+    # The stand-in server's routes: fixed, delayed, large, chunked, JSON and
+    # streaming responses for benchmarks and tests
+    app = web.Application()
+    app.router.add_route("*", "/", index)
+    app.router.add_get("/delay", delay)
+    app.router.add_get("/status/{code}", status)
+    app.router.add_get("/large", large)
+    app.router.add_get("/chunked", chunked)
+    app.router.add_post("/echo", echo)
+    app.router.add_get("/json", json_body)
+    app.router.add_get("/ws", websocket)
+    app.router.add_get("/events", events)
+    return app
+
+
+def bound_address(runner):
+    # (host, port) a started AppRunner listens on, e.g. after binding port 0
+    return tuple(runner.addresses[0][:2])
+
+
+class LocalServer:
+    # The stand-in server on a random localhost port, in this event loop
+    def __init__(self):
+        self.app = make_app()
+        self.runner = None
+        self.port = None
+
+    @property
+    def address(self):
+        return bound_address(self.runner)
+
+    def url(self, path="/"):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    async def __aenter__(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, "127.0.0.1", 0).start()
+        self.port = self.address[1]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.runner.cleanup()
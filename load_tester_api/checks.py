@@ -0,0 +1,147 @@
+import json
+import re
+from .errors import LoadTesterError
+
+JSON_PATH_PART = re.compile(r"\.?([^.\[\]]+)|\[(\d+)\]")
+CHECK_KEYS = ("status", "headers", "body_contains", "body_regex", "json", "sample")
+
+
+def compile_json_path(path):
+    # "$.data.items[0].id" (or "data.items.0.id") -> ("data", "items", 0, "id")
+    text = path[1:] if path.startswith("$") else path
+    keys = []
+    position = 0
+    while position < len(text):
+        match = JSON_PATH_PART.match(text, position)
+        if not match:
+            raise LoadTesterError(f"Invalid JSON path: {path}")
+        key, index = match.groups()
+        if index is not None:
+            keys.append(int(index))
+        elif key.isdigit():
+            keys.append(int(key))
+        else:
+            keys.append(key)
+        position = match.end()
+    if not keys:
+        raise LoadTesterError(f"Invalid JSON path: {path}")
+    return tuple(keys)
+
+
+def resolve_json_path(document, keys):
+    # Value at a compiled path, or raise LookupError if the path is missing
+    value = document
+    for key in keys:
+        if isinstance(key, int):
+            if not isinstance(value, list):
+                raise LookupError(key)
+            value = value[key]
+        else:
+            if not isinstance(value, dict):
+                raise LookupError(key)
+            value = value[key]
+    return value
+
+
+class ResponseCheck:
+    # Declarative checks on responses, compiled once before the test: a set
+    # of expected status codes, header values (a regular expression searched
+    # in the value), body substrings and a body regular expression, and
+    # JSON-path equality. Status codes are checked on every response. The
+    # content checks run on every response, or on a `sample` fraction of
+    # them, spread evenly, so validation does not become the bottleneck.
+    def __init__(
+        self,
+        status=None,
+        headers=None,
+        body_contains=None,
+        body_regex=None,
+        json=None,
+        sample=1.0,
+    ):
+        if not 0 < sample <= 1:
+            raise LoadTesterError(f"Check sample fraction must be in (0, 1], got: {sample}")
+        self.status = frozenset(int(code) for code in status) if status else None
+        try:
+            self.headers = [
+                (name.lower(), re.compile(str(pattern)))
+                for name, pattern in (headers or {}).items()
+            ]
+            self.body_regex = re.compile(body_regex.encode("utf-8")) if body_regex else None
+        except re.error as e:
+            raise LoadTesterError(f"Invalid check pattern: {e}")
+        if isinstance(body_contains, str):
+            body_contains = [body_contains]
+        self.body_contains = [text.encode("utf-8") for text in body_contains or ()]
+        self.json = [
+            (path, compile_json_path(path), value) for path, value in (json or {}).items()
+        ]
+        self.sample = sample
+        self.reads_body = bool(self.body_contains or self.body_regex or self.json)
+        self.has_content_checks = bool(self.headers) or self.reads_body
+        self.seen = 0  # Responses offered for content checks
+        self.checked = 0  # Of which were checked
+
+    @classmethod
+    def from_dict(cls, data):
+        # {"status": [200, 201], "headers": {"Content-Type": "json"},
+        #  "body_contains": ["ok"], "body_regex": "...",
+        #  "json": {"$.status": "ok"}, "sample": 0.1}
+        if not isinstance(data, dict):
+            raise LoadTesterError(f"A check must be an object, got: {data!r}")
+        unknown = set(data) - set(CHECK_KEYS)
+        if unknown:
+            raise LoadTesterError(f"Unknown check keys: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    def accepts(self, status):
+        # Whether the status code is expected (only 200 without a status check)
+        return status in self.status if self.status is not None else status == 200
+
+    def due(self):
+        # Whether the next response gets the content checks: the first one
+        # does, then one every 1/sample responses, without drifting
+        if self.sample >= 1:
+            return True
+        self.seen += 1
+        if self.seen * self.sample > self.checked:
+            self.checked += 1
+            return True
+        return False
+
+    def header(self, headers, name):
+        value = headers.get(name)
+        if value is None:
+            # Raw engine headers are a plain dict with the server's casing
+            for key, item in headers.items():
+                if key.lower() == name:
+                    return item
+        return value
+
+    def validate(self, headers, body):
+        # The first failed content check as a short reason, or None
+        for name, pattern in self.headers:
+            value = self.header(headers, name)
+            if value is None:
+                return f"header {name} missing"
+            if not pattern.search(value):
+                return f"header {name} does not match {pattern.pattern}"
+        body = body or b""
+        for text in self.body_contains:
+            if text not in body:
+                return f"body does not contain {text.decode('utf-8', 'replace')!r}"
+        if self.body_regex is not None and not self.body_regex.search(body):
+            return f"body does not match {self.body_regex.pattern.decode('utf-8', 'replace')}"
+        if self.json:
+            try:
+                document = json.loads(body)
+            except ValueError:
+                return "body is not JSON"
+            for path, keys, expected in self.json:
+                try:
+                    value = resolve_json_path(document, keys)
+                except (LookupError, TypeError):
+                    return f"{path} missing"
+                if value != expected:
+                    return f"{path} is {value!r}, expected {expected!r}"
+        return None
@@ -2,30 +2,86 @@ import argparse
 import asyncio
 import json
 import os
+import sys
 from urllib.parse import urlparse
-from load_tester_api import LoadTester, LoadTesterError
+from load_tester_api import LoadTester, LoadTesterError, ShardedLoadTester
 from load_tester_api import formatter, utils
+from load_tester_api.profile import LoadProfile, parse_duration
+from load_tester_api.live import LiveMetrics
+from load_tester_api.scenario import Scenario
+from load_tester_api.search import SLO, CapacitySearch
+from load_tester_api.batch import BatchRunner
+from load_tester_api.distributed import Agent, Coordinator
+from load_tester_api.samplelog import analyze as analyze_samples
+from load_tester_api.compare import DEFAULT_BUDGET, Comparison, RunData
+from load_tester_api.streaming import StreamTester
+
+# Shared secret between agents and their coordinator, if not given with
+# --token / --agent-token (which would show it in the process list)
+TOKEN_VARIABLE = "LOAD_TESTER_AGENT_TOKEN"
 
 
 async def run_test(
-    url, concurrency, requests, method, headers=None, payload=None, qps=None
+    url,
+    concurrency,
+    requests,
+    method,
+    headers=None,
+    payload=None,
+    qps=None,
+    workers=1,
+    agents=None,
+    agent_token=None,
+    **options,
 ):
-    tester = LoadTester(
-        url=url,
-        concurrency=concurrency,
-        total_requests=requests,
-        method=method,
-        headers=headers,
-        payload=payload,
-        qps=qps,
-    )
-
+    # Extra keyword options are passed straight through to LoadTester
     try:
+        if agents:
+            tester = Coordinator(
+                url=url,
+                agents=agents,
+                token=agent_token,
+                concurrency=concurrency,
+                total_requests=requests,
+                method=method,
+                headers=headers,
+                payload=payload,
+                qps=qps,
+                **options,
+            )
+        elif workers > 1:
+            tester = ShardedLoadTester(
+                url=url,
+                workers=workers,
+                concurrency=concurrency,
+                total_requests=requests,
+                method=method,
+                headers=headers,
+                payload=payload,
+                qps=qps,
+                **options,
+            )
+        else:
+            tester = LoadTester(
+                url=url,
+                concurrency=concurrency,
+                total_requests=requests,
+                method=method,
+                headers=headers,
+                payload=payload,
+                qps=qps,
+                **options,
+            )
         await tester.run_test()
         results = tester.get_results()
         formatted_results = formatter.format_results(results.summary())
         os.makedirs(utils.cli_output_folder(), exist_ok=True)
-        output_filename = f"{utils.cli_output_folder()}/{urlparse(url).hostname}_{method}_{concurrency}concurrency_{requests}requests.json"
+        if options.get("duration") or options.get("profile"):
+            size = f"{round(results.total_test_time)}seconds"  # Time-bound run
+        else:
+            size = f"{requests}requests"
+        kind = "scenario" if options.get("scenario") else method
+        output_filename = f"{utils.cli_output_folder()}/{urlparse(url).hostname}_{kind}_{concurrency}concurrency_{size}.json"
         with open(output_filename, "w") as f:
             json.dump(formatted_results, f, indent=4)
         print(json.dumps(formatted_results, indent=4))
@@ -34,14 +90,10 @@ async def run_test(
         print(json.dumps({"error": str(e)}, indent=4))
 
 
-async def main():
-    parser = argparse.ArgumentParser(description="HTTP Load Testing Tool")
-    parser.add_argument("--url", required=True, help="The target URL to test")
+def add_request_arguments(parser):
+    # What to send and how: shared by every command
     parser.add_argument(
-        "--concurrency", type=int, default=10, help="Number of concurrent requests"
-    )
-    parser.add_argument(
-        "--requests", type=int, default=100, help="Total number of requests to perform"
+        "--url", help="The target URL to test (optional with --scenario)"
     )
     parser.add_argument(
         "--method", type=str, default="GET", help="HTTP method to use for requests"
@@ -51,34 +103,805 @@ async def main():
         type=str,
         help="Comma-separated list of headers (e.g., 'Key1:Value1,Key2:Value2')",
     )
+    parser.add_argument(
+        "--header",
+        action="append",
+        default=[],
+        help="A single 'Key: Value' header, may be repeated; values may contain commas",
+    )
     parser.add_argument(
         "--payload",
         type=str,
         help="Payload to send with the requests (for POST, PUT, etc.)",
     )
+    parser.add_argument(
+        "--scenario",
+        type=str,
+        default=None,
+        help="JSON file with weighted request templates and data feeds",
+    )
+    parser.add_argument(
+        "--arrival",
+        choices=["constant", "poisson", "burst"],
+        default="constant",
+        help="Arrival process used to schedule requests when --qps is set",
+    )
+    parser.add_argument(
+        "--burst-size",
+        type=int,
+        default=10,
+        help="Requests sent together per burst in burst arrival mode",
+    )
+    parser.add_argument(
+        "--histogram",
+        action="store_true",
+        help="Record timings in constant-memory histograms instead of raw samples",
+    )
+    parser.add_argument(
+        "--histogram-precision",
+        type=int,
+        default=3,
+        help="Significant digits kept by --histogram (1-5)",
+    )
+    parser.add_argument(
+        "--percentiles",
+        type=float,
+        nargs="+",
+        default=None,
+        help="Latency percentiles to report, interpolated (default: 50 66 75 80 90 95 98 99 100)",
+    )
+    parser.add_argument(
+        "--body-mode",
+        choices=["full", "head", "discard"],
+        default="full",
+        help="Keep the whole response body, only its first --body-limit bytes, or nothing",
+    )
+    parser.add_argument(
+        "--body-limit",
+        type=int,
+        default=1024,
+        help="Bytes of each response body kept in head mode",
+    )
+    parser.add_argument(
+        "--expect-status",
+        type=str,
+        default=None,
+        help="Comma-separated status codes that count as success (default: 200)",
+    )
+    parser.add_argument(
+        "--expect-header",
+        action="append",
+        default=[],
+        help="'Name: regex' a response header must match, may be repeated",
+    )
+    parser.add_argument(
+        "--expect-body",
+        action="append",
+        default=[],
+        help="Text the response body must contain, may be repeated",
+    )
+    parser.add_argument(
+        "--expect-regex",
+        type=str,
+        default=None,
+        help="Regular expression the response body must match",
+    )
+    parser.add_argument(
+        "--expect-json",
+        action="append",
+        default=[],
+        help="'PATH=VALUE' the JSON body must have, e.g. '$.status=\"ok\"', may be repeated",
+    )
+    parser.add_argument(
+        "--check-sample",
+        type=float,
+        default=1.0,
+        help="Fraction of responses whose headers and body are checked (status: all)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["aiohttp", "raw"],
+        default="aiohttp",
+        help="Transport: aiohttp, or a lean raw HTTP/1.1 engine for higher throughput",
+    )
+    parser.add_argument(
+        "--pipeline-depth",
+        type=int,
+        default=1,
+        help="Requests in flight per connection with the raw engine (HTTP pipelining)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Seconds before a request is given up as a timeout error",
+    )
+    parser.add_argument(
+        "--connection-mode",
+        choices=["keepalive", "fresh"],
+        default="keepalive",
+        help="Reuse pooled connections, or open a new connection for every request",
+    )
+    parser.add_argument(
+        "--prewarm",
+        type=int,
+        default=0,
+        help="Connections to open before the clock starts (keepalive mode)",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=str,
+        default=None,
+        help="Send load for this long first (e.g. '10s') and leave it out of the results",
+    )
+    parser.add_argument(
+        "--dns-ttl",
+        type=str,
+        default="10",
+        help="Seconds DNS answers are cached: 0 resolves per connection, 'run' caches for the whole run",
+    )
+    parser.add_argument(
+        "--resolve",
+        action="append",
+        default=[],
+        help="Pin a host to an address without DNS, as 'HOST:ADDRESS'; may be repeated",
+    )
+
+
+def request_options(args):
+    # LoadTester options from the shared request arguments
+    scenario = Scenario.from_file(args.scenario) if args.scenario else None
+    headers = utils.parse_headers(args.headers)
+    headers.update(utils.parse_header(header) for header in args.header)
+    url = args.url or (scenario.url if scenario else None)
+    if url is None:
+        raise LoadTesterError("Either --url or --scenario is required")
+    resolve = {}
+    for pin in args.resolve:
+        host, separator, address = pin.partition(":")
+        if not separator or not host or not address:
+            raise LoadTesterError(f"Invalid --resolve value: {pin} (expected HOST:ADDRESS)")
+        resolve[host] = address
+    try:
+        dns_ttl = None if args.dns_ttl == "run" else float(args.dns_ttl)
+    except ValueError:
+        raise LoadTesterError(f"Invalid --dns-ttl value: {args.dns_ttl}")
+    check = {}
+    if args.expect_status:
+        try:
+            check["status"] = [int(code) for code in args.expect_status.split(",")]
+        except ValueError:
+            raise LoadTesterError(f"Invalid --expect-status value: {args.expect_status}")
+    if args.expect_header:
+        check["headers"] = dict(utils.parse_header(header) for header in args.expect_header)
+    if args.expect_body:
+        check["body_contains"] = args.expect_body
+    if args.expect_regex:
+        check["body_regex"] = args.expect_regex
+    if args.expect_json:
+        check["json"] = {}
+        for term in args.expect_json:
+            path, separator, value = term.partition("=")
+            if not separator or not path:
+                raise LoadTesterError(f"Invalid --expect-json value: {term} (expected PATH=VALUE)")
+            try:
+                check["json"][path.strip()] = json.loads(value)
+            except ValueError:
+                check["json"][path.strip()] = value  # A bare string
+    if check:
+        check["sample"] = args.check_sample
+    return dict(
+        url=url,
+        method=args.method,
+        headers=headers,
+        payload=args.payload,
+        scenario=scenario,
+        arrival=args.arrival,
+        burst_size=args.burst_size,
+        histogram=args.histogram,
+        histogram_precision=args.histogram_precision,
+        percentiles=args.percentiles,
+        body_mode=args.body_mode,
+        body_limit=args.body_limit,
+        engine=args.engine,
+        pipeline_depth=args.pipeline_depth,
+        connection_mode=args.connection_mode,
+        prewarm=args.prewarm,
+        warmup=parse_duration(args.warmup) if args.warmup else 0,
+        dns_ttl=dns_ttl,
+        resolve=resolve,
+        timeout=args.timeout,
+        check=check or None,
+    )
+
+
+async def search(argv):
+    # `search` command: find the highest load that meets an SLO
+    parser = argparse.ArgumentParser(
+        prog="load_tester_api.cli search",
+        description="Find the maximum sustainable load under a latency/error SLO",
+    )
+    add_request_arguments(parser)
+    parser.add_argument(
+        "--slo",
+        type=str,
+        default="p99<200ms,errors<0.1%",
+        help="Objective each trial must meet, e.g. 'p99<200ms,errors<0.1%%'",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["rate", "concurrency"],
+        default="rate",
+        help="Search over the open-loop request rate or the closed-loop concurrency",
+    )
+    parser.add_argument(
+        "--start", type=float, default=10, help="Load of the first trial"
+    )
+    parser.add_argument(
+        "--limit", type=float, default=100000, help="Highest load to try"
+    )
+    parser.add_argument(
+        "--growth",
+        type=float,
+        default=2.0,
+        help="Factor the load grows by between trials until one fails",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.05,
+        help="Stop bisecting once the pass/fail gap is within this fraction (rate mode)",
+    )
+    parser.add_argument(
+        "--trial-duration",
+        type=str,
+        default="10s",
+        help="Length of each trial (e.g. '10s', '1m')",
+    )
+    parser.add_argument(
+        "--cooldown",
+        type=float,
+        default=1.0,
+        help="Seconds to pause between trials",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=100,
+        help="Connection cap in rate mode",
+    )
+    parser.add_argument(
+        "--max-trials", type=int, default=30, help="Upper bound on the number of trials"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        options = request_options(args)
+        capacity_search = CapacitySearch(
+            slo=SLO.parse(args.slo),
+            mode=args.mode,
+            start=int(args.start) if args.mode == "concurrency" else args.start,
+            limit=int(args.limit) if args.mode == "concurrency" else args.limit,
+            growth=args.growth,
+            tolerance=args.tolerance,
+            trial_duration=parse_duration(args.trial_duration),
+            cooldown=args.cooldown,
+            concurrency=args.concurrency,
+            max_trials=args.max_trials,
+            **options,
+        )
+        report = await capacity_search.run()
+    except LoadTesterError as e:
+        print(json.dumps({"error": str(e)}, indent=4))
+        return
+    formatted_report = formatter.format_search(report)
+    os.makedirs(utils.cli_output_folder(), exist_ok=True)
+    output_filename = f"{utils.cli_output_folder()}/{urlparse(options['url']).hostname}_search_{args.mode}.json"
+    with open(output_filename, "w") as f:
+        json.dump(formatted_report, f, indent=4)
+    print(json.dumps(formatted_report, indent=4))
+    print(f"Results saved to {output_filename}")
+
+
+async def batch(argv):
+    # `batch` command: run a matrix of configs from a file
+    parser = argparse.ArgumentParser(
+        prog="load_tester_api.cli batch",
+        description="Run a sweep of load tests from a matrix file",
+    )
+    parser.add_argument("file", help="JSON batch file with a config matrix")
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=None,
+        help="Hosts tested at the same time (default: the file's 'parallel', else 1)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rerun configs that already have a result in the output folder",
+    )
+    args = parser.parse_args(argv)
+
+    options = {"force": args.force}
+    if args.parallel is not None:
+        options["parallel"] = args.parallel
+    try:
+        runner = BatchRunner.from_file(args.file, **options)
+        runs = await runner.run()
+    except LoadTesterError as e:
+        print(json.dumps({"error": str(e)}, indent=4))
+        return
+    print(json.dumps(runs, indent=4))
+
+
+async def agent(argv):
+    # `agent` command: serve load tests for a coordinator on another machine
+    parser = argparse.ArgumentParser(
+        prog="load_tester_api.cli agent",
+        description="Run load tests on behalf of a coordinator (see --agents)",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on (use 0.0.0.0 to accept remote coordinators)",
+    )
+    parser.add_argument("--port", type=int, default=7070, help="Port to listen on")
+    parser.add_argument("--name", default=None, help="Name reported in results")
+    parser.add_argument(
+        "--token",
+        default=os.environ.get(TOKEN_VARIABLE),
+        help=f"Shared token a coordinator must present (default: ${TOKEN_VARIABLE})",
+    )
+    args = parser.parse_args(argv)
+    try:
+        agent = Agent(args.host, args.port, args.name, token=args.token)
+    except LoadTesterError as e:
+        print(json.dumps({"error": str(e)}, indent=4))
+        return
+    await agent.serve_forever()
+
+
+async def analyze(argv):
+    # `analyze` command: recompute results offline from binary sample logs
+    parser = argparse.ArgumentParser(
+        prog="load_tester_api.cli analyze",
+        description="Summarize, bucket and filter the records of --sample-log files",
+    )
+    parser.add_argument("files", nargs="+", help="Sample log files (e.g. one per worker)")
+    parser.add_argument(
+        "--percentiles",
+        type=float,
+        nargs="+",
+        default=[50, 90, 95, 99, 99.9],
+        help="Latency percentiles to report",
+    )
+    parser.add_argument(
+        "--bucket",
+        type=float,
+        default=None,
+        help="Also report throughput, errors and latency per bucket of this many seconds",
+    )
+    parser.add_argument(
+        "--status",
+        type=int,
+        action="append",
+        default=None,
+        help="Only records with this status code (0 = no response), may be repeated",
+    )
+    parser.add_argument(
+        "--endpoint", default=None, help="Only records of this scenario request"
+    )
+    parser.add_argument(
+        "--errors",
+        action="store_true",
+        help="Only failed requests and error status codes",
+    )
+    parser.add_argument(
+        "--min-latency",
+        type=float,
+        default=None,
+        help="Only records at least this slow, in milliseconds",
+    )
+    parser.add_argument(
+        "--max-latency",
+        type=float,
+        default=None,
+        help="Only records at most this slow, in milliseconds",
+    )
+    parser.add_argument(
+        "--since",
+        type=float,
+        default=None,
+        help="Only records sent at least this many seconds into the run",
+    )
+    parser.add_argument(
+        "--until",
+        type=float,
+        default=None,
+        help="Only records sent before this many seconds into the run",
+    )
+    parser.add_argument(
+        "--outliers", type=int, default=10, help="Number of slowest requests to list"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        report = analyze_samples(
+            args.files,
+            percentiles=args.percentiles,
+            bucket=args.bucket,
+            status=args.status,
+            endpoint=args.endpoint,
+            errors_only=args.errors,
+            min_latency=args.min_latency / 1000 if args.min_latency is not None else None,
+            max_latency=args.max_latency / 1000 if args.max_latency is not None else None,
+            since=args.since,
+            until=args.until,
+            outliers=args.outliers,
+        )
+    except LoadTesterError as e:
+        print(json.dumps({"error": str(e)}, indent=4))
+        return
+    print(json.dumps(report, indent=4))
+
+
+async def compare(argv):
+    # `compare` command: check a candidate run against a baseline. Returns
+    # the exit status: 1 if the regression budget is exceeded, 2 on errors.
+    parser = argparse.ArgumentParser(
+        prog="load_tester_api.cli compare",
+        description="Compare two runs and fail when the candidate regresses beyond a budget",
+    )
+    parser.add_argument(
+        "--baseline",
+        nargs="+",
+        required=True,
+        help="Sample logs (e.g. one per worker) or one result JSON file of the baseline run",
+    )
+    parser.add_argument(
+        "--candidate",
+        nargs="+",
+        required=True,
+        help="Sample logs or one result JSON file of the run under test",
+    )
+    parser.add_argument(
+        "--budget",
+        type=str,
+        default=DEFAULT_BUDGET,
+        help="Allowed regression, e.g. 'p99=10%%,p50=5ms,throughput=5%%,errors=0.5%%'",
+    )
+    parser.add_argument(
+        "--percentiles",
+        type=float,
+        nargs="+",
+        default=[50, 90, 99],
+        help="Latency percentiles to compare (budget percentiles are always included)",
+    )
+    parser.add_argument(
+        "--resamples",
+        type=int,
+        default=2000,
+        help="Bootstrap resamples for the confidence intervals",
+    )
+    parser.add_argument(
+        "--confidence", type=float, default=0.95, help="Confidence level of the intervals"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Random seed, for reproducible intervals"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the machine-readable report instead of the formatted one",
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="Also save the machine-readable report here"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        comparison = Comparison(
+            RunData.load(args.baseline),
+            RunData.load(args.candidate),
+            percentiles=args.percentiles,
+            budget=args.budget,
+            resamples=args.resamples,
+            confidence=args.confidence,
+            seed=args.seed,
+        )
+        report = comparison.run()
+    except LoadTesterError as e:
+        print(json.dumps({"error": str(e)}, indent=4))
+        return 2
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    print(json.dumps(report if args.json else formatter.format_compare(report), indent=4))
+    return 0 if report["passed"] else 1
+
+
+async def stream(argv):
+    # `stream` command: hold long-lived WebSocket or streaming connections
+    parser = argparse.ArgumentParser(
+        prog="load_tester_api.cli stream",
+        description="Load test WebSocket or streaming (SSE/chunked) endpoints",
+    )
+    parser.add_argument(
+        "--url", required=True, help="ws:// or wss:// URL, or the stream's http(s) URL"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["websocket", "stream"],
+        default="websocket",
+        help="WebSocket messages, or a streaming response that is only read",
+    )
+    parser.add_argument(
+        "--connections", type=int, default=100, help="Long-lived connections to hold"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="Messages per second sent across all connections (websocket mode)",
+    )
+    parser.add_argument(
+        "--message", type=str, default="ping", help="Text of every message sent"
+    )
+    parser.add_argument(
+        "--no-reply",
+        action="store_true",
+        help="Messages are not answered one for one, so no round trips are timed",
+    )
+    parser.add_argument(
+        "--arrival",
+        choices=["constant", "poisson", "burst"],
+        default="constant",
+        help="Arrival process used to schedule messages",
+    )
+    parser.add_argument(
+        "--duration",
+        type=str,
+        default="10s",
+        help="How long connections are held (e.g. '90', '30s', '10m')",
+    )
+    parser.add_argument(
+        "--connect-rate",
+        type=float,
+        default=None,
+        help="New connections per second while opening them (default: all at once)",
+    )
+    parser.add_argument(
+        "--reconnect-delay",
+        type=float,
+        default=1.0,
+        help="Seconds before a dropped connection is reopened (negative: never)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=5.0,
+        help="Seconds allowed for a connection to open, and for the last replies",
+    )
+    parser.add_argument(
+        "--headers",
+        type=str,
+        help="Comma-separated list of headers (e.g., 'Key1:Value1,Key2:Value2')",
+    )
+    parser.add_argument(
+        "--header",
+        action="append",
+        default=[],
+        help="A single 'Key: Value' header, may be repeated; values may contain commas",
+    )
+    parser.add_argument(
+        "--histogram",
+        action="store_true",
+        help="Record timings in constant-memory histograms instead of raw samples",
+    )
+    parser.add_argument(
+        "--percentiles",
+        type=float,
+        nargs="+",
+        default=None,
+        help="Message latency percentiles to report",
+    )
+    parser.add_argument(
+        "--monitor-interval",
+        type=float,
+        default=0.5,
+        help="Seconds between samples of the generator's own loop lag, CPU and memory (0 disables)",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        headers = utils.parse_headers(args.headers)
+        headers.update(utils.parse_header(header) for header in args.header)
+        tester = StreamTester(
+            args.url,
+            connections=args.connections,
+            mode=args.mode,
+            rate=args.rate,
+            message=args.message,
+            reply=not args.no_reply,
+            duration=parse_duration(args.duration),
+            connect_rate=args.connect_rate,
+            reconnect_delay=args.reconnect_delay if args.reconnect_delay >= 0 else None,
+            timeout=args.timeout,
+            headers=headers,
+            arrival=args.arrival,
+            histogram=args.histogram,
+            percentiles=args.percentiles,
+            monitor_interval=args.monitor_interval or None,
+        )
+        await tester.run_test()
+    except LoadTesterError as e:
+        print(json.dumps({"error": str(e)}, indent=4))
+        return
+    results = tester.get_results()
+    formatted_results = formatter.format_results(results.summary())
+    os.makedirs(utils.cli_output_folder(), exist_ok=True)
+    output_filename = f"{utils.cli_output_folder()}/{urlparse(args.url).hostname}_{args.mode}_{args.connections}connections_{round(results.total_test_time)}seconds.json"
+    with open(output_filename, "w") as f:
+        json.dump(formatted_results, f, indent=4)
+    print(json.dumps(formatted_results, indent=4))
+    print(f"Results saved to {output_filename}")
+
+
+COMMANDS = {
+    "search": search,
+    "batch": batch,
+    "agent": agent,
+    "analyze": analyze,
+    "compare": compare,
+    "stream": stream,
+}
+
+
+async def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return await COMMANDS[argv[0]](argv[1:])
+
+    parser = argparse.ArgumentParser(description="HTTP Load Testing Tool")
+    add_request_arguments(parser)
+    parser.add_argument(
+        "--concurrency", type=int, default=10, help="Number of concurrent requests"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=100, help="Total number of requests to perform"
+    )
     parser.add_argument(
         "--qps", type=float, default=None, help="Queries per second rate to maintain"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes to spread the load across",
+    )
+    parser.add_argument(
+        "--agents",
+        type=str,
+        default=None,
+        help="Comma-separated host:port list of agents to spread the load across",
+    )
+    parser.add_argument(
+        "--agent-token",
+        type=str,
+        default=os.environ.get(TOKEN_VARIABLE),
+        help=f"Shared token of the --agents (default: ${TOKEN_VARIABLE})",
+    )
+    parser.add_argument(
+        "--duration",
+        type=str,
+        default=None,
+        help="Run for a fixed time (e.g. '90', '30s', '10m') instead of --requests",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=None,
+        help="JSON file with load profile stages (ramp-up, plateau, ramp-down)",
+    )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="Show a live throughput/latency line while the test runs",
+    )
+    parser.add_argument(
+        "--metrics-jsonl",
+        type=str,
+        default=None,
+        help="Append one JSON line of windowed metrics per interval to this file",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve live metrics in Prometheus format on localhost:PORT/metrics",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=1.0,
+        help="Window length in seconds for live metrics",
+    )
+    parser.add_argument(
+        "--abort-on",
+        type=str,
+        default=None,
+        help="Stop early if e.g. 'errors>50%%,p99>2s,consecutive>100,window=30s' is met",
+    )
+    parser.add_argument(
+        "--log-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between aggregated error log lines (first error of a type logs at once)",
+    )
+    parser.add_argument(
+        "--sample-log",
+        type=str,
+        default=None,
+        help="Write every request to this binary log for the analyze command",
+    )
+    parser.add_argument(
+        "--monitor-interval",
+        type=float,
+        default=0.5,
+        help="Seconds between samples of the generator's own loop lag, CPU and memory (0 disables)",
+    )
+    parser.add_argument(
+        "--profiler",
+        choices=["cprofile", "sample"],
+        default=None,
+        help="Profile the generator while the test runs: cProfile, or a low-overhead stack sampler",
+    )
+    parser.add_argument(
+        "--profiler-output",
+        type=str,
+        default=None,
+        help="File for --profiler output (default generator.prof / generator.folded)",
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+
+    try:
+        duration = parse_duration(args.duration) if args.duration else None
+        profile = LoadProfile.from_file(args.profile) if args.profile else None
+        options = request_options(args)
+    except LoadTesterError as e:
+        print(json.dumps({"error": str(e)}, indent=4))
+        return
 
-    headers = {}
-    if args.headers:
-        headers_list = args.headers.split(",")
-        for header in headers_list:
-            key, value = header.split(":")
-            headers[key.strip()] = value.strip()
+    live = None
+    if args.live or args.metrics_jsonl or args.metrics_port is not None:
+        live = LiveMetrics(
+            interval=args.metrics_interval,
+            jsonl_path=args.metrics_jsonl,
+            prometheus_port=args.metrics_port,
+            console=args.live,
+        )
 
     await run_test(
-        args.url,
-        args.concurrency,
-        args.requests,
-        args.method,
-        headers,
-        args.payload,
-        args.qps,
+        concurrency=args.concurrency,
+        requests=args.requests,
+        qps=args.qps,
+        workers=args.workers,
+        agents=args.agents.split(",") if args.agents else None,
+        agent_token=args.agent_token,
+        duration=duration,
+        profile=profile,
+        live=live,
+        sample_log=args.sample_log,
+        log_interval=args.log_interval,
+        abort=args.abort_on,
+        monitor_interval=args.monitor_interval or None,
+        profiler=args.profiler,
+        profiler_output=args.profiler_output,
+        **options,
     )
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,332 @@
+import json
+import math
+import random
+import re
+from array import array
+from collections import Counter
+from itertools import compress
+from .errors import LoadTesterError
+from .samplelog import MAGIC, SampleFile
+from .stats import interpolate, numpy
+
+BUDGET_TERM = re.compile(
+    r"^\s*(?P<metric>p\d+(?:\.\d+)?|throughput|errors)\s*[=<:]\s*"
+    r"(?P<limit>[\d.]+)\s*(?P<unit>%|ms)?\s*$"
+)
+DEFAULT_BUDGET = "p99=10%,throughput=10%,errors=1%"
+RESULT_PERCENTILES = "Percentage of the requests served within a certain time (ms)"
+
+
+def parse_number(text):
+    # "123.45 [#/sec] (mean)" or "1.50%" from a formatted result -> float
+    if isinstance(text, (int, float)):
+        return float(text)
+    return float(str(text).split()[0].rstrip("%"))
+
+
+class RegressionBudget:
+    # How much worse the candidate may be than the baseline before the
+    # comparison fails: per latency percentile a relative ("p99=10%") or
+    # absolute ("p99=5ms") increase, a relative throughput drop
+    # ("throughput=5%"), and an error rate increase in percentage points
+    # ("errors=0.5%").
+    def __init__(self, latency=None, throughput=None, errors=None):
+        self.latency = latency or {}  # Percentile -> (limit, unit)
+        self.throughput = throughput
+        self.errors = errors
+
+    @classmethod
+    def parse(cls, text):
+        budget = cls()
+        for term in text.split(","):
+            match = BUDGET_TERM.match(term)
+            if not match:
+                raise LoadTesterError(f"Invalid regression budget term: {term.strip()}")
+            metric, limit, unit = match.group("metric", "limit", "unit")
+            limit = float(limit)
+            if metric.startswith("p"):
+                percentile = float(metric[1:])
+                if not 0 < percentile <= 100:
+                    raise LoadTesterError(f"Invalid percentile in budget: {metric}")
+                budget.latency[percentile] = (limit, unit or "%")
+            elif unit == "ms":
+                raise LoadTesterError(f"{metric} budgets are percentages, got: {term.strip()}")
+            elif metric == "throughput":
+                budget.throughput = limit / 100
+            else:
+                budget.errors = limit / 100
+        return budget
+
+
+class RunData:
+    # What a comparison needs from one run. From sample logs: every latency
+    # (sorted, for exact percentiles and the bootstrap) and completions per
+    # second. From a result JSON file: only the point values it reports.
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.latencies = None  # Sorted latencies in seconds, raw runs only
+        self.rates = None  # Completed requests per whole second, raw runs only
+        self.percentiles = {}  # Percentile -> seconds, result files only
+        self.requests = 0
+        self.failed = 0
+        self.throughput = 0
+        self.error_rate = 0
+
+    @classmethod
+    def load(cls, paths):
+        if not paths:
+            raise LoadTesterError("A comparison needs at least one file per run")
+        kinds = set()
+        for path in paths:
+            try:
+                with open(path, "rb") as f:
+                    kinds.add(f.read(len(MAGIC)) == MAGIC)
+            except OSError as e:
+                raise LoadTesterError(f"Could not read {path}: {e}")
+        if kinds == {True}:
+            return cls(paths).read_samples()
+        if len(paths) > 1:
+            raise LoadTesterError(
+                "Pass either sample logs or a single result file per run: "
+                + ", ".join(paths)
+            )
+        return cls(paths).read_result()
+
+    @property
+    def raw(self):
+        return self.latencies is not None
+
+    def read_samples(self):
+        # Stream the mapped blocks into one latency array and per-second
+        # completion counts; per-record work stays in C where it can
+        latencies = array("f")
+        seconds = Counter()
+        first, last = math.inf, -math.inf
+        files = [SampleFile(path) for path in self.paths]
+        try:
+            for sample_file in files:
+                for count, columns in sample_file.blocks():
+                    if not count:
+                        continue
+                    self.requests += count
+                    timestamps, errors = columns["timestamp"], columns["error"]
+                    first = min(first, min(timestamps))
+                    last = max(last, max(timestamps))
+                    if any(errors):
+                        ok = [not error for error in errors]
+                        self.failed += count - sum(ok)
+                        latencies.extend(compress(columns["latency"], ok))
+                        seconds.update(map(int, compress(timestamps, ok)))
+                    else:
+                        latencies.frombytes(columns["latency"].tobytes())
+                        seconds.update(map(int, timestamps))
+        finally:
+            for sample_file in files:
+                sample_file.close()
+        if not latencies:
+            raise LoadTesterError(f"No completed requests in {', '.join(self.paths)}")
+        if numpy is not None:
+            self.latencies = numpy.sort(numpy.frombuffer(latencies, dtype=numpy.float32))
+        else:
+            self.latencies = sorted(latencies)
+        completed = len(latencies)
+        self.throughput = completed / (last - first) if last > first else 0
+        self.error_rate = self.failed / self.requests
+        if len(seconds) >= 4:
+            # The first and last seconds are partial, so they are left out
+            start, end = min(seconds), max(seconds)
+            self.rates = [seconds.get(second, 0) for second in range(start + 1, end)]
+        return self
+
+    def read_result(self):
+        # A run's JSON output (formatted or summary()), or an analyze report
+        path = self.paths[0]
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise LoadTesterError(f"Could not read result file {path}: {e}")
+        if "percentiles_ms" in data:
+            percentiles = data["percentiles_ms"]
+            self.requests = data["selected"]
+            self.failed = data["failed_requests"]
+            completed = self.requests - self.failed
+            self.throughput = completed / data["duration"] if data["duration"] else 0
+            self.error_rate = self.failed / self.requests if self.requests else 0
+        elif RESULT_PERCENTILES in data:
+            percentiles = data[RESULT_PERCENTILES]
+            self.requests = data["Complete requests"] + data["Failed requests"]
+            self.failed = data["Failed requests"]
+            self.throughput = parse_number(data["Requests per second"])
+            self.error_rate = parse_number(data["Error rate"]) / 100
+        elif "percentiles" in data and "requests_per_second" in data:
+            percentiles = data["percentiles"]
+            self.requests = data["completed_requests"] + data["failed_requests"]
+            self.failed = data["failed_requests"]
+            self.throughput = data["requests_per_second"]
+            self.error_rate = parse_number(data["error_rate"]) / 100
+        else:
+            raise LoadTesterError(f"{path} is not a load test result or analyze report")
+        if isinstance(percentiles, dict):
+            self.percentiles = {
+                float(key): value / 1000 for key, value in percentiles.items()
+            }
+        return self
+
+    def percentile(self, percentile):
+        # Point value in seconds, interpolated for raw runs
+        if self.raw:
+            return float(interpolate(self.latencies, percentile))
+        if percentile not in self.percentiles:
+            raise LoadTesterError(
+                f"p{percentile:g} is not in {self.paths[0]}; rerun with a sample log "
+                "or compare percentiles the result file reports"
+            )
+        return self.percentiles[percentile]
+
+    def resample_percentile(self, percentile, rng):
+        # The percentile of one bootstrap resample, drawn directly: the r-th
+        # smallest of n draws with replacement from the sorted samples is the
+        # sample at the r-th smallest of n uniforms, which is Beta(r, n-r+1)
+        # distributed. O(1) per resample however large the run.
+        count = len(self.latencies)
+        rank = max(1, math.ceil(count * percentile / 100))
+        position = rng.betavariate(rank, count - rank + 1)
+        return float(self.latencies[min(count - 1, max(0, math.ceil(position * count) - 1))])
+
+    def resample_throughput(self, rng):
+        # Mean completions per second over a resample of the whole seconds
+        return sum(rng.choices(self.rates, k=len(self.rates))) / len(self.rates)
+
+
+def interval(values, confidence):
+    # Percentile bootstrap interval of the resampled values
+    ordered = sorted(values)
+    tail = (1 - confidence) / 2 * 100
+    return [interpolate(ordered, tail), interpolate(ordered, 100 - tail)]
+
+
+class Comparison:
+    # Compares a candidate run against a baseline: throughput, error rate and
+    # latency percentiles, with bootstrap confidence intervals on the relative
+    # changes when both runs have raw samples. A metric is a regression when
+    # its change is worse than the budget allows and, where an interval is
+    # available, the whole interval is on the worse side of zero (so noise
+    # alone does not fail a build).
+    def __init__(
+        self,
+        baseline,
+        candidate,
+        percentiles=(50, 90, 99),
+        budget=DEFAULT_BUDGET,
+        resamples=2000,
+        confidence=0.95,
+        seed=None,
+    ):
+        if isinstance(budget, str):
+            budget = RegressionBudget.parse(budget)
+        if not 0 < confidence < 1:
+            raise LoadTesterError(f"Confidence must be in (0, 1), got: {confidence}")
+        self.baseline = baseline
+        self.candidate = candidate
+        self.percentiles = sorted({*percentiles, *budget.latency})
+        self.budget = budget
+        self.resamples = resamples
+        self.confidence = confidence
+        self.rng = random.Random(seed)
+
+    def bootstrap(self, draw):
+        # Interval of the candidate/baseline ratio minus one
+        changes = []
+        for _ in range(self.resamples):
+            base = draw(self.baseline)
+            changes.append(draw(self.candidate) / base - 1 if base else 0)
+        return interval(changes, self.confidence)
+
+    def metric(self, name, unit, base, candidate, ci, worse, limit=None, absolute=False):
+        # One row of the report. `worse` is +1 when higher is worse and -1
+        # when lower is; `absolute` budgets apply to the difference, the
+        # others to the relative change.
+        difference = candidate - base
+        change = difference / base if base else 0
+        significant = None
+        if ci is not None:
+            significant = ci[0] > 0 if worse > 0 else ci[1] < 0
+        judged = difference if absolute else change
+        return {
+            "metric": name,
+            "unit": unit,
+            "baseline": base,
+            "candidate": candidate,
+            "difference": difference,
+            "change": change,
+            "ci": ci,
+            "budget": limit,
+            "absolute_budget": absolute,
+            "significant": significant,
+            "regression": (
+                limit is not None and judged * worse > limit and significant is not False
+            ),
+        }
+
+    def run(self):
+        base, candidate = self.baseline, self.candidate
+        raw = base.raw and candidate.raw
+        ci = None
+        if base.rates and candidate.rates:
+            ci = self.bootstrap(lambda run: run.resample_throughput(self.rng))
+        metrics = [
+            self.metric(
+                "throughput",
+                "req/s",
+                base.throughput,
+                candidate.throughput,
+                ci,
+                -1,
+                self.budget.throughput,
+            ),
+            self.metric(
+                "error_rate",
+                "ratio",
+                base.error_rate,
+                candidate.error_rate,
+                None,
+                1,
+                self.budget.errors,
+                absolute=True,
+            ),
+        ]
+        for percentile in self.percentiles:
+            ci = None
+            if raw:
+                ci = self.bootstrap(
+                    lambda run: run.resample_percentile(percentile, self.rng)
+                )
+            limit, unit = self.budget.latency.get(percentile, (None, "%"))
+            if limit is not None and unit == "%":
+                limit /= 100
+            metrics.append(
+                self.metric(
+                    f"p{percentile:g}",
+                    "ms",
+                    base.percentile(percentile) * 1000,
+                    candidate.percentile(percentile) * 1000,
+                    ci,
+                    1,
+                    limit,
+                    absolute=unit == "ms",
+                )
+            )
+        return {
+            "baseline": {"files": base.paths, "requests": base.requests, "raw": base.raw},
+            "candidate": {
+                "files": candidate.paths,
+                "requests": candidate.requests,
+                "raw": candidate.raw,
+            },
+            "confidence": self.confidence,
+            "resamples": self.resamples,
+            "metrics": metrics,
+            "regressions": [row["metric"] for row in metrics if row["regression"]],
+            "passed": not any(row["regression"] for row in metrics),
+        }
@@ -0,0 +1,407 @@
+import asyncio
+import hmac
+import json
+import logging
+import socket
+import time
+from .load_tester import LoadTester
+from .errors import LoadTesterError, URLCheckError
+from .result import TestResult
+from .sharding import split_evenly
+from .utils import validate_url
+
+# Messages are single-line JSON objects. Result snapshots of long runs can be
+# large, so the stream limit is raised well above asyncio's 64 KiB default.
+MESSAGE_LIMIT = 64 * 1024 * 1024
+CLOCK_PROBES = 5  # Round trips used to estimate each agent's clock skew
+# LoadTester options an agent accepts in a run spec. Anything that touches
+# the agent's files (sample logs, profiler output) or needs live objects
+# (profiles, scenarios, live metrics) is refused.
+AGENT_OPTIONS = {
+    "url",
+    "concurrency",
+    "total_requests",
+    "method",
+    "headers",
+    "payload",
+    "qps",
+    "arrival",
+    "burst_size",
+    "histogram",
+    "histogram_precision",
+    "percentiles",
+    "preflight",
+    "start_at",
+    "duration",
+    "control_interval",
+    "body_mode",
+    "body_limit",
+    "engine",
+    "pipeline_depth",
+    "log_interval",
+    "connection_mode",
+    "prewarm",
+    "warmup",
+    "dns_ttl",
+    "resolve",
+    "abort",
+    "timeout",
+    "monitor_interval",
+    "check",
+}
+
+
+async def send_message(writer, message):
+    writer.write(json.dumps(message).encode("utf-8") + b"\n")
+    await writer.drain()
+
+
+async def read_message(reader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by peer")
+    return json.loads(line)
+
+
+def parse_address(address, default_port=7070):
+    # "host:port" (or just "host") into a (host, port) tuple
+    if isinstance(address, (tuple, list)):
+        return address[0], int(address[1])
+    host, _, port = address.rpartition(":")
+    if not host:
+        return port, default_port
+    try:
+        return host, int(port)
+    except ValueError:
+        raise LoadTesterError(f"Invalid agent address: {address}")
+
+
+class Agent:
+    # Runs load tests for a coordinator. Listens for TCP connections; a
+    # connection must open with a "hello" carrying the shared `token`. On a
+    # "run" message it builds a LoadTester from the spec (AGENT_OPTIONS only),
+    # waits for the agreed start time, streams cumulative result snapshots
+    # while the test runs and sends the final result when it ends. If the
+    # coordinator goes away the test is stopped.
+    def __init__(self, host="127.0.0.1", port=7070, name=None, token=None):
+        if not token:
+            raise LoadTesterError("An agent needs a shared token")
+        self.host = host
+        self.port = port
+        self.name = name
+        self.token = token
+        self.server = None
+        self.logger = logging.getLogger("LoadTesterAgent")
+        self.logger.setLevel(logging.INFO)
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self.handle, self.host, self.port, limit=MESSAGE_LIMIT
+        )
+        self.port = self.server.sockets[0].getsockname()[1]  # If bound to port 0
+        if self.name is None:
+            self.name = f"{socket.gethostname()}:{self.port}"
+        self.logger.info(f"Agent {self.name} listening on {self.host}:{self.port}")
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        await self.server.serve_forever()
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def handle(self, reader, writer):
+        try:
+            message = await read_message(reader)
+            token = message.get("token")
+            if (
+                message.get("type") != "hello"
+                or not isinstance(token, str)
+                or not hmac.compare_digest(token.encode(), self.token.encode())
+            ):
+                self.logger.warning("Refused a connection with a missing or wrong token")
+                await send_message(
+                    writer, {"type": "error", "error": "Invalid agent token"}
+                )
+                return
+            await send_message(writer, {"type": "hello", "name": self.name})
+            while True:
+                message = await read_message(reader)
+                kind = message.get("type")
+                if kind == "time":
+                    await send_message(writer, {"type": "time", "time": time.time()})
+                elif kind == "run":
+                    await self.run(message, writer)
+                else:
+                    await send_message(
+                        writer, {"type": "error", "error": f"Unknown message: {kind}"}
+                    )
+        except (ConnectionError, ValueError) as e:
+            self.logger.info(f"Coordinator disconnected: {e}")
+        finally:
+            writer.close()
+
+    def snapshot(self, tester):
+        # Cumulative result so far, closed off at the current time if the
+        # test is still running
+        data = tester.get_results().to_dict()
+        if data["start_timestamp"] is not None and data["end_timestamp"] is None:
+            data["end_timestamp"] = time.time()
+            data["total_test_time"] = data["end_timestamp"] - data["start_timestamp"]
+        return data
+
+    async def run(self, message, writer):
+        refused = sorted(set(message["spec"]) - AGENT_OPTIONS)
+        if refused:
+            error = f"Options refused by the agent: {', '.join(refused)}"
+            await send_message(writer, {"type": "error", "error": error})
+            return
+        try:
+            tester = LoadTester(**message["spec"])
+        except (LoadTesterError, TypeError) as e:
+            await send_message(writer, {"type": "error", "error": str(e)})
+            return
+        task = asyncio.ensure_future(tester.run_test())
+        try:
+            while not task.done():
+                await asyncio.wait([task], timeout=message["snapshot_interval"])
+                if not task.done():
+                    await send_message(
+                        writer, {"type": "snapshot", "result": self.snapshot(tester)}
+                    )
+        except ConnectionError:
+            # Nobody is collecting. A test under way is stopped and its in-flight
+            # requests finish; one still in preflight, warm-up or waiting for the
+            # start time has no workers yet and is cancelled.
+            if tester.tasks:
+                await tester.stop()
+            else:
+                task.cancel()
+            await asyncio.wait([task])
+            raise
+        error = task.exception()
+        if error is not None:
+            await send_message(writer, {"type": "error", "error": str(error)})
+            return
+        await send_message(writer, {"type": "result", "result": self.snapshot(tester)})
+
+
+class AgentLink:
+    # Coordinator-side state of one agent
+    def __init__(self, address):
+        self.host, self.port = parse_address(address)
+        self.name = f"{self.host}:{self.port}"
+        self.reader = None
+        self.writer = None
+        self.skew = 0.0  # Agent clock minus coordinator clock, in seconds
+        self.round_trip = None
+        self.status = "pending"
+        self.error = None
+        self.result = None  # Latest snapshot, then the final result
+
+
+class Coordinator:
+    # Spreads one load test over agents on other machines, the way
+    # ShardedLoadTester spreads it over local processes: requests, concurrency
+    # and rate are split evenly, every agent starts at the same moment (each
+    # agent's clock skew is measured and compensated), snapshots are collected
+    # while the test runs, and the results are merged and tagged per agent.
+    # An agent that disconnects or stops reporting is dropped; its last
+    # snapshot still counts towards the merged result.
+
+    def __init__(
+        self,
+        url,
+        agents,
+        concurrency=10,
+        total_requests=100,
+        qps=None,
+        start_delay=2.0,
+        snapshot_interval=1.0,
+        agent_timeout=None,
+        connect_timeout=5.0,
+        token=None,
+        **options,
+    ):
+        if not agents:
+            raise LoadTesterError("A distributed run needs at least one agent")
+        if not token:
+            raise LoadTesterError("A distributed run needs the agents' shared token")
+        for name in set(options) - AGENT_OPTIONS:
+            if options[name]:
+                raise LoadTesterError(f"{name} is not supported in distributed runs")
+            del options[name]  # Unset, e.g. None from the command line
+        if not isinstance(options.get("arrival", "constant"), str) or not isinstance(
+            options.get("engine", "aiohttp"), str
+        ):
+            raise LoadTesterError("Distributed runs need arrival and engine names")
+        options.pop("histogram", None)
+        try:
+            json.dumps(options)  # Sent to the agents as JSON
+        except (TypeError, ValueError) as e:
+            raise LoadTesterError(
+                f"Distributed runs need options that can be sent as JSON: {e}"
+            )
+        self.url = url
+        self.links = [AgentLink(address) for address in agents]
+        self.concurrency = concurrency
+        self.total_requests = total_requests
+        self.qps = qps
+        self.start_delay = start_delay
+        self.snapshot_interval = snapshot_interval
+        # An agent silent for this long is dropped
+        self.agent_timeout = agent_timeout or max(10.0, 5 * snapshot_interval)
+        self.connect_timeout = connect_timeout
+        self.token = token
+        self.options = options
+        # Agents record into histograms so snapshots stay small and mergeable
+        self.tester = LoadTester(
+            url,
+            concurrency=concurrency,
+            total_requests=total_requests,
+            qps=qps,
+            histogram=True,
+            **options,
+        )
+        self.results = self.tester.get_results()
+        self.logger = self.tester.logger
+
+    async def connect(self, link):
+        try:
+            link.reader, link.writer = await asyncio.wait_for(
+                asyncio.open_connection(link.host, link.port, limit=MESSAGE_LIMIT),
+                self.connect_timeout,
+            )
+            await send_message(link.writer, {"type": "hello", "token": self.token})
+            hello = await asyncio.wait_for(read_message(link.reader), self.connect_timeout)
+            if hello.get("type") != "hello":
+                link.status = "refused"
+                link.error = hello.get("error") or "Unexpected reply"
+                self.logger.error(f"Agent {link.name} refused the run: {link.error}")
+                link.writer.close()
+                return
+            link.name = hello.get("name") or link.name
+            await self.sync_clock(link)
+            link.status = "connected"
+        except (OSError, asyncio.TimeoutError, ValueError) as e:
+            link.status = "unreachable"
+            link.error = str(e)
+            self.logger.error(f"Agent {link.name} unreachable: {e}")
+
+    async def sync_clock(self, link):
+        # NTP-style estimate: the agent's clock reading is assumed to be taken
+        # halfway through the round trip; the fastest probe is the most exact
+        best = None
+        for _ in range(CLOCK_PROBES):
+            sent = time.time()
+            await send_message(link.writer, {"type": "time"})
+            reply = await asyncio.wait_for(read_message(link.reader), self.connect_timeout)
+            received = time.time()
+            round_trip = received - sent
+            if best is None or round_trip < best[0]:
+                best = (round_trip, reply["time"] - (sent + received) / 2)
+        link.round_trip, link.skew = best
+
+    def agent_specs(self, links, start_at):
+        count = len(links)
+        requests = split_evenly(self.total_requests, count)
+        concurrency = split_evenly(self.concurrency, count)
+        return [
+            dict(
+                self.options,
+                url=self.url,
+                concurrency=max(1, concurrency[index]),
+                total_requests=requests[index],
+                qps=self.qps / count if self.qps else None,
+                histogram=True,
+                preflight=False,  # Checked once by the coordinator
+                start_at=start_at + link.skew,  # In the agent's own clock
+            )
+            for index, link in enumerate(links)
+        ]
+
+    async def collect(self, link, spec):
+        try:
+            await send_message(
+                link.writer,
+                {"type": "run", "spec": spec, "snapshot_interval": self.snapshot_interval},
+            )
+            while True:
+                message = await asyncio.wait_for(
+                    read_message(link.reader), self.agent_timeout
+                )
+                kind = message.get("type")
+                if kind in ("snapshot", "result"):
+                    link.result = TestResult.from_dict(message["result"])
+                    if kind == "result":
+                        link.status = "completed"
+                        return
+                elif kind == "error":
+                    link.status = "failed"
+                    link.error = message.get("error")
+                    self.logger.error(f"Agent {link.name} failed: {link.error}")
+                    return
+        except (OSError, asyncio.TimeoutError, ValueError) as e:
+            link.status = "dropped"
+            link.error = str(e) or type(e).__name__
+            self.logger.warning(f"Dropped agent {link.name}: {link.error}")
+        finally:
+            link.writer.close()
+
+    def current_result(self):
+        # Merge of the latest snapshot from every agent, e.g. for progress
+        merged = TestResult(self.total_requests, histogram=True)
+        for link in self.links:
+            if link.result is not None:
+                result = TestResult.from_dict(link.result.to_dict())
+                result.shift_clock(-link.skew)
+                merged.merge(result)
+        return merged
+
+    async def run_test(self):
+        try:
+            validate_url(self.url)  # Validate the URL
+            if self.tester.preflight:
+                await self.tester.check_url()  # Check if the URL is reachable
+        except URLCheckError:
+            self.results.mark_unreachable()
+            self.logger.error("Invalid or unresponsive URL. Exiting...")
+            return
+
+        await asyncio.gather(*(self.connect(link) for link in self.links))
+        links = [link for link in self.links if link.status == "connected"]
+        if not links:
+            raise LoadTesterError("No agent could be reached")
+        names = set()
+        for link in links:
+            if link.name in names:
+                link.name = f"{link.name} ({link.host}:{link.port})"
+            names.add(link.name)
+
+        start_at = time.time() + self.start_delay
+        specs = self.agent_specs(links, start_at)
+        await asyncio.gather(
+            *(self.collect(link, spec) for link, spec in zip(links, specs))
+        )
+
+        for link in self.links:
+            result = link.result or TestResult(0, histogram=True)
+            # Agent times are in the agent's clock: move them onto ours
+            result.shift_clock(-link.skew)
+            self.results.merge(result)
+            result.agent_name = link.name
+            result.agent_status = link.status
+            result.clock_skew = link.skew
+            self.results.agents[link.name] = result
+        if self.tester.duration is not None or any(
+            link.status != "completed" for link in self.links
+        ):
+            self.results.total_requests = self.results.sent_requests
+
+    def get_results(self):
+        # Return the merged test results
+        return self.results
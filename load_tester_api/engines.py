@@ -0,0 +1,729 @@
+import asyncio
+import math
+import socket
+import ssl
+import time
+from collections import deque
+from urllib.parse import urlparse
+import aiohttp
+from aiohttp.abc import AbstractResolver
+from .errors import LoadTesterError
+from .tracing import RequestTrace, make_trace_config
+
+
+class ConnectError(ConnectionError):
+    # A new connection to the target could not be established
+    pass
+
+
+class WriteError(ConnectionError):
+    # The request could not be written on an established connection
+    pass
+
+
+class ProtocolError(ConnectionError):
+    # The server sent something that is not valid HTTP/1.1 framing
+    pass
+
+
+class CachedResolver(AbstractResolver):
+    # Resolves each host once and keeps the answer, so several engines (e.g.
+    # the runs of a batch) can share one DNS cache. Usable as an aiohttp
+    # connector resolver and by the raw engine. `pins` maps host names to
+    # fixed addresses that are used without any lookup.
+    def __init__(self, pins=None):
+        self.cache = {}
+        self.pins = pins or {}
+        self.resolver = None
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        if host in self.pins:
+            address = self.pins[host]
+            return [
+                {
+                    "hostname": host,
+                    "host": address,
+                    "port": port,
+                    "family": socket.AF_INET6 if ":" in address else socket.AF_INET,
+                    "proto": 0,
+                    "flags": socket.AI_NUMERICHOST,
+                }
+            ]
+        key = (host, port, family)
+        hosts = self.cache.get(key)
+        if hosts is None:
+            if self.resolver is None:
+                self.resolver = aiohttp.ThreadedResolver()
+            hosts = await self.resolver.resolve(host, port, family)
+            self.cache[key] = hosts
+        return hosts
+
+    async def close(self):
+        pass
+
+
+class EngineResponse:
+    # What an engine reports back for one request, in a form TestResult and
+    # LoadTester.fetch can use regardless of the transport underneath
+    __slots__ = (
+        "status",
+        "headers",
+        "content_length",
+        "content",
+        "dns_time",
+        "connect_time",
+        "wait_time",
+        "processing_time",
+        "reused",
+        "done_time",
+    )
+
+    def __init__(
+        self,
+        status,
+        headers,
+        content_length,
+        content,
+        dns_time,
+        connect_time,
+        wait_time,
+        processing_time,
+        reused,
+        done_time,
+    ):
+        self.status = status
+        self.headers = headers
+        self.content_length = content_length
+        self.content = content
+        self.dns_time = dns_time
+        self.connect_time = connect_time
+        self.wait_time = wait_time
+        self.processing_time = processing_time
+        self.reused = reused
+        self.done_time = done_time
+
+
+class Engine:
+    # Transport used by LoadTester to send requests. An engine is opened once
+    # per run (or once across several runs, when it is passed in already open)
+    # and its request() is called concurrently by the workers.
+    name = None
+
+    def __init__(self):
+        self.tester = None
+        self.is_open = False
+
+    async def open(self, tester, max_concurrency):
+        self.tester = tester
+        self.is_open = True
+
+    async def close(self):
+        self.is_open = False
+
+    async def request(self, start_time, request=None):
+        # Send one request: the tester's own URL, method, headers and payload,
+        # or a PreparedRequest from a scenario
+        raise NotImplementedError
+
+    async def prewarm(self, connections):
+        # Have `connections` open connections ready before the clock starts;
+        # returns how many are ready
+        return 0
+
+    async def check(self, url):
+        # GET `url` once and return the status, for the pre-flight check.
+        # Open engines send it through their own pool, so the connection it
+        # opens is reused by the run.
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url) as response:
+                return response.status
+
+
+class AiohttpEngine(Engine):
+    # Default engine: aiohttp.ClientSession with per-phase trace hooks
+    name = "aiohttp"
+
+    def __init__(self, connector_options=None):
+        super().__init__()
+        self.connector_options = connector_options or {}
+        self.session = None
+
+    async def open(self, tester, max_concurrency):
+        await super().open(tester, max_concurrency)
+        options = dict(self.connector_options)
+        # A fresh connection per request measures the handshake every time
+        options.setdefault("force_close", tester.connection_mode == "fresh")
+        if tester.resolve:
+            options["resolver"] = CachedResolver(tester.resolve)  # Pins win
+        if tester.dns_ttl == 0:
+            options.setdefault("use_dns_cache", False)  # Resolve per connection
+        else:
+            options.setdefault("ttl_dns_cache", tester.dns_ttl)  # None: whole run
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=max_concurrency, **options),
+            trace_configs=[make_trace_config()],
+        )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        await super().close()
+
+    async def prewarm(self, connections):
+        # Fill the pool by sending `connections` HEAD requests at once; each
+        # leaves its keep-alive connection in the pool
+        async def open_connection():
+            try:
+                await self.check(self.tester.url, "HEAD")
+                return 1
+            except (aiohttp.ClientError, OSError, asyncio.TimeoutError):
+                return 0
+
+        return sum(await asyncio.gather(*(open_connection() for _ in range(connections))))
+
+    async def check(self, url, method="GET"):
+        if self.session is None:
+            return await super().check(url)
+        trace = RequestTrace(time.perf_counter())
+        async with self.session.request(method, url, trace_request_ctx=trace) as response:
+            # Drained without keeping it, so the connection goes back to the pool
+            await self.read_body(response, "discard")
+            return response.status
+
+    async def read_body(self, response, body_mode=None):
+        # Consume the response body according to `body_mode` (by default the
+        # tester's) and return (body length, retained bytes). "full" keeps the
+        # whole body, "head" keeps only the first `body_limit` bytes and
+        # "discard" keeps nothing. The partial modes take whatever chunk
+        # aiohttp has buffered without joining or copying it, so memory stays
+        # flat for large bodies while the byte count remains exact.
+        tester = self.tester
+        body_mode = body_mode or tester.body_mode
+        if body_mode == "full":
+            content = await response.read()
+            return len(content), content
+        stream = response.content
+        length = 0
+        keep = tester.body_limit if body_mode == "head" else 0
+        head = bytearray(keep)  # Filled in place, sliced once at the end
+        filled = 0
+        while True:
+            chunk = await stream.readany()
+            if not chunk:
+                break
+            length += len(chunk)
+            if filled < keep:
+                taken = min(len(chunk), keep - filled)
+                head[filled : filled + taken] = memoryview(chunk)[:taken]
+                filled += taken
+        return length, bytes(memoryview(head)[:filled])
+
+    async def request(self, start_time, request=None):
+        tester = self.tester
+        if request is None:
+            method, url, headers, data = (
+                tester.method,
+                tester.url,
+                tester.headers,
+                tester.payload,
+            )
+        else:
+            method, url, headers, data = (
+                request.method,
+                request.url,
+                request.headers,
+                request.body,
+            )
+        trace = RequestTrace(start_time)  # Filled in by the aiohttp trace hooks
+        try:
+            async with self.session.request(
+                method, url, headers=headers, data=data, trace_request_ctx=trace
+            ) as response:
+                first_byte_time = trace.first_byte or time.perf_counter()
+                content_length, content = await self.read_body(response)
+                done_time = time.perf_counter()  # Time when the body is complete
+        except aiohttp.ClientConnectorError:
+            raise
+        except (aiohttp.ClientOSError, ConnectionError) as e:
+            # Failed on a connection we had, before the request went out
+            if trace.request_sent is None and (
+                trace.reused or trace.connect_end is not None
+            ):
+                raise WriteError(f"Request not sent: {e}") from e
+            raise
+        # Connect is TCP (+TLS) setup of a new connection, waiting is time to
+        # first byte after the request was sent, processing is the body read
+        return EngineResponse(
+            response.status,
+            response.headers,
+            content_length,
+            content,
+            trace.dns_time(),
+            trace.connect_time(),
+            trace.wait_time(first_byte_time),
+            done_time - first_byte_time,
+            trace.reused,
+            done_time,
+        )
+
+
+# Parser states of RawConnection
+HEAD, BODY, CHUNK_SIZE, CHUNK_DATA, CHUNK_END, TRAILERS, UNTIL_CLOSE = range(7)
+MAX_HEAD_SIZE = 64 * 1024
+
+
+class RawExchange:
+    # One request/response on a RawConnection
+    __slots__ = (
+        "future",
+        "sent_time",
+        "first_byte",
+        "done_time",
+        "status",
+        "headers",
+        "length",
+        "body",
+        "close",
+        "reused",
+        "head",
+    )
+
+    def __init__(self, future, sent_time, reused, head=False):
+        self.future = future
+        self.sent_time = sent_time
+        self.first_byte = None
+        self.done_time = None
+        self.status = None
+        self.headers = None
+        self.length = 0
+        self.body = bytearray()
+        self.close = False
+        self.reused = reused
+        self.head = head  # Response to a HEAD request: no body follows
+
+
+class RawConnection(asyncio.Protocol):
+    # Persistent HTTP/1.1 connection that writes pre-serialized requests and
+    # parses only what it needs from responses: the status line, headers, and
+    # Content-Length or chunked framing. Up to `pipeline_depth` requests may be
+    # in flight; responses are matched to requests in order.
+    def __init__(self, engine):
+        self.engine = engine
+        self.transport = None
+        self.pending = deque()  # In-flight exchanges, oldest first
+        self.buffer = bytearray()
+        self.state = HEAD
+        self.remaining = 0
+        self.closed = False  # No new requests once set
+        self.requests_sent = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def send(self, request_bytes, head=False, reused=True):
+        # `reused` is False for the request that paid for opening the connection
+        if self.transport.is_closing():
+            self.engine.discard(self)
+            raise WriteError("Connection closed before the request was written")
+        exchange = RawExchange(
+            asyncio.get_running_loop().create_future(),
+            time.perf_counter(),
+            reused,
+            head,
+        )
+        self.requests_sent += 1
+        self.pending.append(exchange)
+        self.transport.write(request_bytes)
+        return exchange
+
+    def data_received(self, data):
+        if not self.pending:
+            # Data nobody asked for: the connection is out of sync
+            self.fail(ProtocolError("Unexpected data from server"))
+            return
+        exchange = self.pending[0]
+        if exchange.first_byte is None:
+            exchange.first_byte = time.perf_counter()
+        if self.state == BODY and not self.buffer and len(data) < self.remaining:
+            # Fast path: the whole chunk belongs to the current body
+            self.consume(exchange, data, len(data))
+            self.remaining -= len(data)
+            return
+        self.buffer += data
+        try:
+            self.parse()
+        except (ValueError, IndexError) as e:
+            self.fail(ProtocolError(f"Malformed response: {e}"))
+
+    def consume(self, exchange, data, size):
+        # Count `size` body bytes from the start of `data`, retaining only as
+        # many as the body mode keeps
+        exchange.length += size
+        keep = self.engine.keep - len(exchange.body)
+        if keep > 0:
+            exchange.body += data[: min(keep, size)]
+
+    def parse(self):
+        buffer = self.buffer
+        while buffer and self.pending:
+            exchange = self.pending[0]
+            if exchange.first_byte is None:
+                exchange.first_byte = time.perf_counter()
+            state = self.state
+            if state == HEAD:
+                end = buffer.find(b"\r\n\r\n")
+                if end < 0:
+                    if len(buffer) > MAX_HEAD_SIZE:
+                        raise ValueError("response head too large")
+                    return
+                head = bytes(buffer[:end])
+                del buffer[: end + 4]
+                self.start_response(exchange, head)
+            elif state == BODY or state == CHUNK_DATA:
+                size = min(self.remaining, len(buffer))
+                self.consume(exchange, buffer, size)
+                del buffer[:size]
+                self.remaining -= size
+                if not self.remaining:
+                    if state == BODY:
+                        self.finish()
+                    else:
+                        self.state = CHUNK_END
+            elif state == CHUNK_SIZE:
+                end = buffer.find(b"\r\n")
+                if end < 0:
+                    return
+                size = int(bytes(buffer[:end]).split(b";", 1)[0], 16)
+                del buffer[: end + 2]
+                if size:
+                    self.remaining = size
+                    self.state = CHUNK_DATA
+                else:
+                    self.state = TRAILERS
+            elif state == CHUNK_END:
+                if len(buffer) < 2:
+                    return
+                del buffer[:2]
+                self.state = CHUNK_SIZE
+            elif state == TRAILERS:
+                if buffer.startswith(b"\r\n"):
+                    del buffer[:2]
+                else:
+                    end = buffer.find(b"\r\n\r\n")
+                    if end < 0:
+                        return
+                    del buffer[: end + 4]
+                self.finish()
+            else:  # UNTIL_CLOSE: the body runs until the server closes
+                self.consume(exchange, buffer, len(buffer))
+                buffer.clear()
+
+    def start_response(self, exchange, head):
+        lines = head.split(b"\r\n")
+        version, status = lines[0].split(None, 2)[:2]
+        status = int(status)
+        if 100 <= status < 200:
+            return  # Interim response such as 100 Continue: wait for the real one
+        headers = {}
+        length = None
+        chunked = False
+        close = version == b"HTTP/1.0"
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            name = name.decode("latin-1")
+            value = value.strip().decode("latin-1")
+            headers[name] = value
+            lowered = name.lower()
+            if lowered == "content-length":
+                length = int(value)
+            elif lowered == "transfer-encoding":
+                chunked = "chunked" in value.lower()
+            elif lowered == "connection":
+                close = value.lower() == "close"
+        exchange.status = status
+        exchange.headers = headers
+        exchange.close = close
+        if exchange.head or status in (204, 304):
+            self.finish()
+        elif chunked:
+            self.state = CHUNK_SIZE
+        elif length is not None:
+            self.remaining = length
+            self.state = BODY
+            if not length:
+                self.finish()
+        else:
+            self.state = UNTIL_CLOSE
+
+    def finish(self):
+        exchange = self.pending.popleft()
+        exchange.done_time = time.perf_counter()
+        self.engine.release()
+        self.state = HEAD
+        if not exchange.future.done():
+            exchange.future.set_result(exchange)
+        if exchange.close or self.engine.fresh:
+            self.closed = True
+            self.engine.discard(self)
+            if not self.pending:
+                self.transport.close()
+        elif self.pending and self.buffer:
+            # The next pipelined response has already started arriving
+            self.pending[0].first_byte = exchange.done_time
+
+    def fail(self, error):
+        self.closed = True
+        self.engine.discard(self)
+        while self.pending:
+            exchange = self.pending.popleft()
+            if not exchange.future.done():
+                exchange.future.set_exception(error)
+        if self.transport is not None:
+            self.transport.close()
+
+    def connection_lost(self, exc):
+        if self.state == UNTIL_CLOSE and self.pending:
+            self.finish()
+        self.fail(ConnectionResetError(f"Connection closed by server: {exc or 'EOF'}"))
+
+
+class RawHTTPEngine(Engine):
+    # Lean HTTP/1.1 engine built directly on asyncio.Protocol. The request is
+    # serialized to bytes once, the host is resolved once before the run, and
+    # connections are persistent with optional pipelining of `pipeline_depth`
+    # requests per connection. Only plain HTTP/1.1 features are supported: no
+    # redirects, cookies or content decoding.
+    name = "raw"
+
+    def __init__(self, pipeline_depth=1, resolver=None):
+        super().__init__()
+        if pipeline_depth < 1:
+            raise LoadTesterError(f"Pipeline depth must be at least 1, got: {pipeline_depth}")
+        self.pipeline_depth = pipeline_depth
+        self.resolver = resolver  # Optional shared resolver, e.g. a CachedResolver
+        self.connections = []
+        self.connecting = 0
+        self.max_connections = 0
+        self.waiters = []  # Requests waiting for a free pipeline slot
+        self.request_bytes = b""
+        self.head_request = False
+        self.keep = 0
+        self.address = None
+        self.ssl_context = None
+        self.server_hostname = None
+        self.dns_time = 0
+        self.fresh = False  # A new connection for every request
+
+    def serialize_request(self, method, parsed_url, extra_headers, payload):
+        # Build the full request once; every send writes these same bytes.
+        # In fresh mode the server is asked to close after each response.
+        target = parsed_url.path or "/"
+        if parsed_url.query:
+            target += "?" + parsed_url.query
+        default_port = 443 if parsed_url.scheme == "https" else 80
+        host = parsed_url.hostname
+        if parsed_url.port and parsed_url.port != default_port:
+            host = f"{host}:{parsed_url.port}"
+        headers = {"Host": host, "Accept": "*/*", "User-Agent": "load-tester-api"}
+        if self.fresh:
+            headers["Connection"] = "close"
+        body = payload or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+            headers["Content-Type"] = "text/plain; charset=utf-8"
+        headers.update(extra_headers)
+        if body or method.upper() in ("POST", "PUT", "PATCH"):
+            headers["Content-Length"] = str(len(body))
+        head = f"{method.upper()} {target} HTTP/1.1\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items()
+        )
+        return (head + "\r\n").encode("latin-1") + body
+
+    async def open(self, tester, max_concurrency):
+        await super().open(tester, max_concurrency)
+        parsed_url = urlparse(tester.url)
+        if parsed_url.scheme not in ("http", "https"):
+            raise LoadTesterError(f"The raw engine only supports http(s) URLs: {tester.url}")
+        self.fresh = tester.connection_mode == "fresh"
+        if self.fresh and self.pipeline_depth != 1:
+            raise LoadTesterError("Pipelining needs keep-alive connections")
+        self.request_bytes = self.serialize_request(
+            tester.method, parsed_url, tester.headers, tester.payload
+        )
+        self.head_request = tester.method.upper() == "HEAD"
+        if tester.scenario is not None:
+            # Every scenario request is serialized now, and must go to the
+            # same origin since all connections share one resolved address
+            origin = (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
+            for request in tester.scenario.requests():
+                parsed = urlparse(request.url)
+                if (parsed.scheme, parsed.hostname, parsed.port) != origin:
+                    raise LoadTesterError(
+                        f"The raw engine sends to one origin; {request.url} differs from {tester.url}"
+                    )
+                request.raw = self.serialize_request(
+                    request.method, parsed, request.headers, request.body
+                )
+        self.keep = {"full": math.inf, "head": tester.body_limit}.get(tester.body_mode, 0)
+        self.max_connections = math.ceil(max_concurrency / self.pipeline_depth)
+        port = parsed_url.port or (443 if parsed_url.scheme == "https" else 80)
+        if parsed_url.scheme == "https":
+            self.ssl_context = ssl.create_default_context()
+            self.server_hostname = parsed_url.hostname
+        # Resolve once up front; every connection reuses the address
+        started = time.perf_counter()
+        try:
+            if parsed_url.hostname in (tester.resolve or {}):
+                self.address = (tester.resolve[parsed_url.hostname], port)
+            elif self.resolver is not None:
+                hosts = await self.resolver.resolve(
+                    parsed_url.hostname, port, socket.AF_UNSPEC
+                )
+                self.address = (hosts[0]["host"], hosts[0]["port"])
+            else:
+                infos = await asyncio.get_running_loop().getaddrinfo(
+                    parsed_url.hostname, port, type=socket.SOCK_STREAM
+                )
+                self.address = infos[0][4][:2]
+        except OSError as e:
+            raise ConnectError(f"Cannot resolve {parsed_url.hostname}: {e}") from e
+        self.dns_time = time.perf_counter() - started
+
+    async def close(self):
+        for connection in list(self.connections):
+            if connection.transport is not None:
+                connection.transport.close()
+        self.connections = []
+        self.release()
+        await super().close()
+
+    def discard(self, connection):
+        # Take a connection out of rotation once it is closing or broken
+        if connection in self.connections:
+            self.connections.remove(connection)
+        self.release()
+
+    def release(self):
+        # A pipeline slot or a connection came free: let waiting requests
+        # look again
+        if not self.waiters:
+            return
+        waiters, self.waiters = self.waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def connect(self):
+        self.connecting += 1
+        started = time.perf_counter()
+        connection = None
+        try:
+            _, connection = await asyncio.get_running_loop().create_connection(
+                lambda: RawConnection(self),
+                *self.address,
+                ssl=self.ssl_context,
+                server_hostname=self.server_hostname,
+            )
+        except OSError as e:
+            raise ConnectError(f"Cannot connect to {self.address[0]}:{self.address[1]}: {e}") from e
+        finally:
+            self.connecting -= 1
+            if connection is None:
+                self.release()  # The failed dial's slot is free for waiting requests
+        self.connections.append(connection)
+        return connection, time.perf_counter() - started
+
+    async def acquire(self):
+        # Least-loaded open connection with a free pipeline slot, or a new one
+        if self.fresh:
+            return await self.connect()
+        while True:
+            best = None
+            for connection in self.connections:
+                if len(connection.pending) < self.pipeline_depth and (
+                    best is None or len(connection.pending) < len(best.pending)
+                ):
+                    best = connection
+                    if not best.pending:
+                        break
+            if best is not None and not best.pending:
+                return best, 0
+            if len(self.connections) + self.connecting < self.max_connections:
+                return await self.connect()
+            if best is not None:
+                return best, 0
+            # Every slot is taken, e.g. while a connection is being replaced:
+            # wait for one to come free rather than exceed max_connections
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            await waiter
+
+    async def prewarm(self, connections):
+        connections = min(connections, self.max_connections)
+        await asyncio.gather(
+            *(self.connect() for _ in range(connections - len(self.connections))),
+            return_exceptions=True,
+        )
+        return min(connections, len(self.connections))
+
+    async def check(self, url, method="GET"):
+        if not self.is_open:
+            return await super().check(url)
+        connection, connect_time = await self.acquire()
+        exchange = connection.send(
+            self.serialize_request(method, urlparse(url), {}, None),
+            method == "HEAD",
+            not connect_time,
+        )
+        await exchange.future
+        return exchange.status
+
+    async def request(self, start_time, request=None):
+        connection, connect_time = await self.acquire()
+        reused = not connect_time  # Sent on a connection opened earlier
+        if request is None:
+            exchange = connection.send(self.request_bytes, self.head_request, reused)
+        else:
+            exchange = connection.send(request.raw, request.method == "HEAD", reused)
+        try:
+            await exchange.future
+        except asyncio.CancelledError:
+            # Timed out or aborted: the response may still arrive, and the
+            # ones pipelined behind it could no longer be matched to their
+            # requests, so the connection is closed rather than reused
+            connection.fail(
+                ConnectionAbortedError("An earlier request on the connection was cancelled")
+            )
+            raise
+        first_byte = exchange.first_byte or exchange.done_time
+        return EngineResponse(
+            exchange.status,
+            exchange.headers,
+            exchange.length,
+            bytes(exchange.body),
+            0,  # Resolved once in open(), before the clock starts
+            connect_time,
+            first_byte - exchange.sent_time,
+            exchange.done_time - first_byte,
+            exchange.reused,
+            exchange.done_time,
+        )
+
+
+ENGINES = {AiohttpEngine.name: AiohttpEngine, RawHTTPEngine.name: RawHTTPEngine}
+
+
+def make_engine(engine, pipeline_depth=1):
+    # Build an engine by name ("aiohttp" or "raw"); Engine instances pass through
+    if isinstance(engine, Engine):
+        return engine
+    if engine == RawHTTPEngine.name:
+        return RawHTTPEngine(pipeline_depth)
+    if engine == AiohttpEngine.name:
+        if pipeline_depth != 1:
+            raise LoadTesterError("Pipelining is only supported by the raw engine")
+        return AiohttpEngine()
+    raise LoadTesterError(
+        f"Unknown engine: {engine} (expected one of {', '.join(ENGINES)})"
+    )
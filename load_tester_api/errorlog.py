@@ -0,0 +1,46 @@
+import logging
+import time
+
+
+class ErrorLog:
+    # Rate-limited error logging for the request path. The first error of each
+    # type in an interval is logged as it happens; further ones of the same
+    # type are only counted and reported as one aggregate line when the
+    # interval ends, so a failing target cannot flood the log or slow the
+    # generator down. Messages use logging's lazy %-formatting and are never
+    # built for errors that are only counted.
+    def __init__(self, logger, interval=5.0):
+        self.logger = logger
+        self.interval = interval
+        self.suppressed = {}  # Error type -> errors not logged this interval
+        self.window_start = None
+
+    def report(self, level, category, message, *args):
+        now = time.monotonic()
+        if self.window_start is None:
+            self.window_start = now
+        elif now - self.window_start >= self.interval:
+            self.flush(now)
+        suppressed = self.suppressed.get(category)
+        if suppressed is None:
+            self.suppressed[category] = 0
+            self.logger.log(level, message, *args)
+        else:
+            self.suppressed[category] = suppressed + 1
+
+    def flush(self, now=None):
+        # Log the counts held back in the current interval and start a new one
+        now = time.monotonic() if now is None else now
+        if self.window_start is not None:
+            elapsed = now - self.window_start
+            for category, suppressed in self.suppressed.items():
+                if suppressed:
+                    self.logger.log(
+                        logging.WARNING,
+                        "%d more %s errors in the last %.1fs",
+                        suppressed,
+                        category,
+                        elapsed,
+                    )
+        self.suppressed = {}
+        self.window_start = now
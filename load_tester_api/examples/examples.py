@@ -1,48 +1,23 @@
 import asyncio
-import os
 import json
-from load_tester_api import LoadTester, LoadTesterError
-from load_tester_api import formatter, utils
+import os
+from load_tester_api import LoadTesterError
+from load_tester_api.batch import BatchRunner
 
+MATRIX_FILE = os.path.join(os.path.dirname(__file__), "matrix.json")
 
-async def run_test(url, concurrency, requests, method, headers=None, payload=None):
-    tester = LoadTester(
-        url=url,
-        concurrency=concurrency,
-        total_requests=requests,
-        method=method,
-        headers=headers,
-        payload=payload,
-    )
 
+async def main():
+    # Run every config of the example matrix: same-host configs one at a
+    # time, results saved to outputs/batch and skipped on the next run
     try:
-        await tester.run_test()
-        results = tester.get_results()
-        formatted_results = formatter.format_results(results.summary())
-
-        # Save JSON output to a file
-        output_filename = f"{utils.batch_output_folder()}/{utils.urlparse(url).hostname}_{method}_{concurrency}concurrency_{requests}requests.json"
-        with open(output_filename, "w") as f:
-            json.dump(formatted_results, f, indent=4)
-
-        print(f"Results saved to {output_filename}")
-
+        runner = BatchRunner.from_file(MATRIX_FILE)
+        runs = await runner.run()
     except LoadTesterError as e:
         print(f"Error: {e}")
-
-
-async def main():
-    headers = {"Content-Type": "application/json"}
-    payload = '{"key": "value"}'
-
-    # Ensure the output directory exists
-    os.makedirs(utils.batch_output_folder(), exist_ok=True)
-
-    # Example tests
-    await run_test("http://example.com", 10, 10, "GET")
-    await run_test("http://example.com", 50, 5, "POST", headers, payload)
-    # await run_test("http://example.com", 10, 10, "PUT", headers, payload)
-    # await run_test("http://example.com", 10, 10, "DELETE")
+        return
+    for run in runs:
+        print(json.dumps(run))
 
 
 if __name__ == "__main__":
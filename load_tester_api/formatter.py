@@ -5,9 +5,50 @@ def format_results(results):
             "mean": times.get("mean", "N/A"),
             "median": times.get("median", "N/A"),
             "max": times.get("max", "N/A"),
+            "sd": times.get("stdev", "N/A"),
         }
 
-    return {
+    def format_stage(stage):
+        return {
+            "Name": stage["name"],
+            "Duration": f"{stage['duration']:.3f} seconds",
+            "Target rate": stage["target_rate"],
+            "Concurrency": stage["concurrency"],
+            "Achieved rate": f"{stage['achieved_rate']:.2f} [#/sec]",
+            "Complete requests": stage["completed_requests"],
+            "Failed requests": stage["failed_requests"],
+            "Requests per second": f"{stage['requests_per_second']:.2f} [#/sec] (mean)",
+            "Total (ms)": get_times(stage["total_times"]),
+            "Percentiles (ms)": stage["percentiles"],
+        }
+
+    def format_endpoint(endpoint):
+        return {
+            "Name": endpoint["name"],
+            "Share of requests": f"{endpoint['share']:.2%}",
+            "Complete requests": endpoint["completed_requests"],
+            "Failed requests": endpoint["failed_requests"],
+            "Validation errors": endpoint["validation_errors"],
+            "HTML transferred": f"{endpoint['html_transferred']} bytes",
+            "Requests per second": f"{endpoint['requests_per_second']:.2f} [#/sec] (mean)",
+            "Total (ms)": get_times(endpoint["total_times"]),
+            "Percentiles (ms)": endpoint["percentiles"],
+        }
+
+    def format_agent(agent):
+        return {
+            "Name": agent["name"],
+            "Status": agent["status"],
+            "Complete requests": agent["completed_requests"],
+            "Failed requests": agent["failed_requests"],
+            "Achieved rate": f"{agent['achieved_rate']:.2f} [#/sec]",
+            "Requests per second": f"{agent['requests_per_second']:.2f} [#/sec] (mean)",
+            "Clock skew (ms)": agent["clock_skew"] * 1000,
+            "Total (ms)": get_times(agent["total_times"]),
+            "Percentiles (ms)": agent["percentiles"],
+        }
+
+    formatted = {
         "Server Software": results["server_software"],
         "Server Hostname": results["server_hostname"],
         "Server Port": results["server_port"],
@@ -15,17 +56,43 @@ def format_results(results):
         "Document Length": f"{results['document_length']} bytes",
         "Concurrency Level": results["concurrency_level"],
         "qps": results["qps"],
+        "Arrival mode": results["arrival_mode"],
+        "Intended rate": (
+            f"{results['intended_rate']:.2f} [#/sec]"
+            if results["intended_rate"]
+            else "N/A"
+        ),
+        "Achieved rate": f"{results['achieved_rate']:.2f} [#/sec]",
+        "Send lag (ms)": {
+            "mean": results["send_lag"]["mean"],
+            "max": results["send_lag"]["max"],
+        },
         "Time taken for tests": f"{results['total_test_time']:.3f} seconds",
         "Complete requests": results["completed_requests"],
         "Failed requests": results["failed_requests"],
+        "Aborted": results["abort_reason"] or "no",
+        "Cancelled requests": results["cancelled_requests"],
         "Error rate": f"{results['error_rate']}",
+        "Non-2xx responses": results["non_2xx_responses"],
         "Write errors": results["write_errors"],
         "Connection errors": results["connection_errors"],
         "Read errors": results["read_errors"],
         "Status code errors": results["status_code_errors"],
         "Invalid URL errors": results["invalid_url_errors"],
         "Timeout errors": results["timeout_errors"],
+        "Validation errors": results["validation_errors"],
+        "Validated responses": results["validated_responses"],
+        "Status codes": results["status_codes"],
+        "Error types": {
+            error["type"]: {"Count": error["count"], "Samples": error["samples"]}
+            for error in results["error_types"]
+        },
         "Keep-Alive requests": results["keep_alive_requests"],
+        "New connections": results["new_connections"],
+        "Connection reuse": f"{results['connection_reuse']:.2%}",
+        "Connection churn": f"{results['connection_churn']:.2f} [#/sec] new connections",
+        "Prewarmed connections": results["prewarmed_connections"],
+        "Warm-up requests": results["warmup_requests"],
         "Total transferred": f"{results['total_transferred']} bytes",
         "HTML transferred": f"{results['html_transferred']} bytes",
         "Requests per second": f"{results['requests_per_second']:.2f} [#/sec] (mean)",
@@ -34,6 +101,7 @@ def format_results(results):
         "Transfer rate sent": f"{results['transfer_rate_sent']:.2f} [Kbytes/sec] sent",
         "Transfer rate total": f"{results['transfer_rate_total']:.2f} [Kbytes/sec] total",
         "Connection Times (ms)": {
+            "DNS": get_times(results.get("dns_times", {})),
             "Connect": get_times(results.get("connection_times", {})),
             "Processing": get_times(results.get("processing_times", {})),
             "Waiting": get_times(results.get("waiting_times", {})),
@@ -42,4 +110,125 @@ def format_results(results):
         "Percentage of the requests served within a certain time (ms)": results[
             "percentiles"
         ],
+        "Latency histogram (ms)": {
+            f"<= {bucket['le']:g}": bucket["count"] for bucket in results["histogram"]
+        },
+    }
+    if "generator" in results:
+        generator = results["generator"]
+        formatted["Generator"] = {
+            "Processes": generator["processes"],
+            "Event loop lag (ms)": generator["loop_lag"],
+            "CPU (mean)": f"{generator['cpu']['mean']:.0%} of a core",
+            "CPU (max)": f"{generator['cpu']['max']:.0%} of a core",
+            "Peak RSS": f"{generator['rss_kb']} KB",
+            "In flight": generator["in_flight"],
+            "Intended concurrency": generator["intended_concurrency"],
+            "All workers busy": f"{generator['saturated']:.0%} of samples",
+        }
+    if "streams" in results:
+        streams = results["streams"]
+        formatted["Streams"] = {
+            "Mode": streams["mode"],
+            "Target connections": streams["target_connections"],
+            "Connections opened": streams["opened"],
+            "Peak open connections": streams["peak_open"],
+            "Open at end": streams["open_at_end"],
+            "Setup failures": streams["setup_failures"],
+            "Drops": streams["drops"],
+            "Reconnects": streams["reconnects"],
+            "Messages sent": streams["messages_sent"],
+            "Messages skipped (no open connection)": streams["skipped_messages"],
+            "Messages received": streams["messages_received"],
+            "Replies": streams["replies"],
+            "Messages per second": f"{streams['messages_per_second']:.2f} [#/sec] received",
+            "Setup time (ms)": get_times(streams["setup_times"]),
+            "Setup percentiles (ms)": streams["setup_percentiles"],
+        }
+    if results["generator_warnings"]:
+        formatted["Generator warnings"] = results["generator_warnings"]
+    if "stages" in results:
+        formatted["Stages"] = [format_stage(stage) for stage in results["stages"]]
+    if "endpoints" in results:
+        formatted["Endpoints"] = [
+            format_endpoint(endpoint) for endpoint in results["endpoints"]
+        ]
+    if "agents" in results:
+        formatted["Agents"] = [format_agent(agent) for agent in results["agents"]]
+    return formatted
+
+
+def format_search(report):
+    def format_trial(trial):
+        return {
+            "Load": trial["load"],
+            "Achieved rate": f"{trial['achieved_rate']:.2f} [#/sec]",
+            "Requests per second": f"{trial['requests_per_second']:.2f} [#/sec] (mean)",
+            "Complete requests": trial["completed_requests"],
+            "Failed requests": trial["failed_requests"],
+            "Error rate": f"{trial['error_rate']:.3%}",
+            "SLO latency (ms)": trial["latency_ms"],
+            "Percentiles (ms)": trial["percentiles"],
+            "Result": "pass" if trial["passed"] else f"fail: {trial['reason']}",
+        }
+
+    unit = "req/s" if report["mode"] == "rate" else "concurrent requests"
+    best = report["max_passing_load"]
+    return {
+        "SLO": report["slo"],
+        "Search mode": report["mode"],
+        "Max passing load": f"{best:g} {unit}" if best is not None else "none",
+        "Trials": [format_trial(trial) for trial in report["trials"]],
+    }
+
+
+def format_compare(report):
+    def format_value(value, unit):
+        if unit == "ratio":
+            return f"{value:.3%}"
+        return f"{value:.3f} {unit}"
+
+    def format_metric(row):
+        if row["unit"] == "ratio":
+            change = f"{row['difference'] * 100:+.3f} points"
+        else:
+            change = f"{row['change']:+.2%}"
+        if row["ci"] is not None:
+            change += f" ({confidence} CI {row['ci'][0]:+.2%} .. {row['ci'][1]:+.2%})"
+        if row["budget"] is None:
+            budget = "none"
+        elif row["unit"] == "ratio":
+            budget = f"{row['budget'] * 100:+.3f} points"
+        elif row["absolute_budget"]:
+            budget = f"+{format_value(row['budget'], row['unit'])}"
+        else:
+            sign = "-" if row["metric"] == "throughput" else "+"  # Direction of worse
+            budget = f"{sign}{row['budget']:.2%}"
+        if row["regression"]:
+            verdict = "REGRESSION"
+        elif row["significant"] is False:
+            verdict = "ok (not significant)"
+        else:
+            verdict = "ok"
+        return {
+            "Baseline": format_value(row["baseline"], row["unit"]),
+            "Candidate": format_value(row["candidate"], row["unit"]),
+            "Change": change,
+            "Budget": budget,
+            "Result": verdict,
+        }
+
+    confidence = f"{report['confidence']:.0%}"
+    return {
+        "Baseline": ", ".join(report["baseline"]["files"]),
+        "Candidate": ", ".join(report["candidate"]["files"]),
+        "Raw samples": (
+            "yes" if report["baseline"]["raw"] and report["candidate"]["raw"] else "no"
+        ),
+        "Metrics": {row["metric"]: format_metric(row) for row in report["metrics"]},
+        "Result": (
+            "pass"
+            if report["passed"]
+            else f"fail: {', '.join(report['regressions'])} over budget"
+        ),
     }
@@ -0,0 +1,204 @@
+import math
+from array import array
+from .errors import LoadTesterError
+from .stats import numpy
+
+# Buckets are stored in pages allocated on first use, so memory follows the
+# range of values actually recorded rather than the whole configured range
+PAGE_BITS = 10
+PAGE_SIZE = 1 << PAGE_BITS  # Buckets per page: 8 KiB of counts
+PAGE_MASK = PAGE_SIZE - 1
+
+
+class LogHistogram:
+    # Log-bucketed latency histogram in the spirit of HdrHistogram. Recording
+    # is O(1) and instances with the same configuration can be merged exactly.
+    #
+    # `precision` is the number of significant decimal digits kept: every value
+    # is reported to within 10**-precision of its true value (relative error).
+    # Memory is bounded by the decades of values recorded: about 16 KiB per
+    # decade at precision 3 (the default), 96 KiB at 4 and 904 KiB at 5, plus a
+    # page table of at most 9 KiB. Latencies from 1 ms to 1 s span 3 decades.
+
+    def __init__(self, precision=3, lowest=1e-6, highest=3600.0):
+        if not 1 <= precision <= 5:
+            raise LoadTesterError(f"Histogram precision must be 1-5, got: {precision}")
+        if not 0 < lowest < highest:
+            raise LoadTesterError(
+                f"Invalid histogram range: lowest={lowest}, highest={highest}"
+            )
+        self.precision = precision
+        self.lowest = lowest
+        self.highest = highest
+        self.ratio = 1 + 2 * 10**-precision  # Width of each bucket as a growth factor
+        self._log_ratio = math.log(self.ratio)
+        self._scale = 1 / self._log_ratio
+        self.bucket_count = int(math.log(highest / lowest) * self._scale) + 2
+        self.pages = [None] * ((self.bucket_count >> PAGE_BITS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations (Welford), for a stable stdev
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self):
+        return self.count
+
+    def _index(self, value):
+        if value <= self.lowest:
+            return 0
+        if value >= self.highest:
+            return self.bucket_count - 1
+        return int(math.log(value / self.lowest) * self._scale) + 1
+
+    def _value_at(self, index):
+        # Representative value of a bucket: the geometric middle of its bounds
+        if index == 0:
+            return self.lowest
+        return self.lowest * math.exp((index - 0.5) * self._log_ratio)
+
+    def _add(self, index, count):
+        page = self.pages[index >> PAGE_BITS]
+        if page is None:
+            page = self.pages[index >> PAGE_BITS] = array("Q", bytes(8 * PAGE_SIZE))
+        page[index & PAGE_MASK] += count
+
+    def buckets(self):
+        # (index, count) of the non-empty buckets, in increasing order
+        for number, page in enumerate(self.pages):
+            if page is None:
+                continue
+            base = number << PAGE_BITS
+            for offset, bucket in enumerate(page):
+                if bucket:
+                    yield base + offset, bucket
+
+    def record(self, value):
+        index = self._index(value)
+        page = self.pages[index >> PAGE_BITS]
+        if page is None:
+            page = self.pages[index >> PAGE_BITS] = array("Q", bytes(8 * PAGE_SIZE))
+        page[index & PAGE_MASK] += 1
+        self.count += 1
+        self.total += value
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def record_array(self, values):
+        # Record a numpy array of values at once (needs numpy): the same
+        # buckets as record(), with the moments folded in like merge()
+        count = len(values)
+        if not count:
+            return
+        values = values.astype(numpy.float64)
+        clipped = numpy.clip(values, self.lowest, self.highest)
+        indices = (numpy.log(clipped / self.lowest) * self._scale).astype(numpy.int64) + 1
+        indices[values <= self.lowest] = 0
+        indices[values >= self.highest] = self.bucket_count - 1
+        indices, buckets = numpy.unique(indices, return_counts=True)
+        for index, bucket in zip(indices.tolist(), buckets.tolist()):
+            self._add(index, bucket)
+        total = float(values.sum())
+        mean = total / count
+        self._fold(count, total, mean, float(((values - mean) ** 2).sum()))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def _fold(self, count, total, mean, m2):
+        # Combine another sample set's count, sum, mean and squared deviations
+        # (Chan et al.) into this histogram's
+        combined = self.count + count
+        delta = mean - self._mean
+        self._m2 += m2 + delta * delta * self.count * count / combined
+        self._mean += delta * count / combined
+        self.count = combined
+        self.total += total
+
+    def compatible(self, other):
+        return (
+            self.precision == other.precision
+            and self.lowest == other.lowest
+            and self.highest == other.highest
+        )
+
+    def merge(self, other):
+        # Add another histogram's samples into this one
+        if not self.compatible(other):
+            raise LoadTesterError("Cannot merge histograms with different configurations")
+        for index, bucket in other.buckets():
+            self._add(index, bucket)
+        if other.count:
+            self._fold(other.count, other.total, other._mean, other._m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def to_dict(self):
+        # JSON-friendly form with only the non-empty buckets
+        return {
+            "precision": self.precision,
+            "lowest": self.lowest,
+            "highest": self.highest,
+            "buckets": [[index, bucket] for index, bucket in self.buckets()],
+            "count": self.count,
+            "total": self.total,
+            "mean": self._mean,
+            "m2": self._m2,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["precision"], data["lowest"], data["highest"])
+        for index, bucket in data["buckets"]:
+            histogram._add(index, bucket)
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram._mean = data["mean"]
+        histogram._m2 = data["m2"]
+        if histogram.count:
+            histogram.min = data["min"]
+            histogram.max = data["max"]
+        return histogram
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def stdev(self):
+        # Sample standard deviation, matching statistics.stdev for raw samples
+        if self.count < 2:
+            return 0
+        return math.sqrt(self._m2 / (self.count - 1))
+
+    def percentiles(self, percentiles):
+        # Values at several percentiles with a single walk over the buckets
+        if not self.count:
+            return {}
+        targets = sorted(
+            (max(1, math.ceil(self.count * p / 100)), p) for p in percentiles
+        )
+        values = {}
+        position = 0
+        seen = 0
+        for index, bucket in self.buckets():
+            seen += bucket
+            while position < len(targets) and targets[position][0] <= seen:
+                value = self._value_at(index)
+                if targets[position][0] == self.count:
+                    value = self.max  # The top sample is tracked exactly
+                # Clamp to the exact extremes, which are tracked separately
+                values[targets[position][1]] = min(max(value, self.min), self.max)
+                position += 1
+            if position == len(targets):
+                break
+        return values
+
+    def percentile(self, percentile):
+        return self.percentiles([percentile]).get(percentile, 0)
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import sys
+import time
+from aiohttp import web
+from .histogram import LogHistogram
+
+LIVE_PERCENTILES = [50, 90, 99]
+
+
+class MetricsWindow:
+    # Counters for one sampling window. The hot path only bumps integers and
+    # records into a preallocated histogram; a new window is created once per
+    # interval by the sampler, never per request.
+    __slots__ = ("requests", "errors", "bytes", "statuses", "error_kinds", "latencies")
+
+    def __init__(self, precision):
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.statuses = {}
+        self.error_kinds = {}
+        self.latencies = LogHistogram(precision)
+
+
+class LiveMetrics:
+    # Samples throughput, errors, status mix and latency percentiles every
+    # `interval` seconds while a test runs, and publishes each window as a
+    # JSONL line, a Prometheus text endpoint and/or a live console line.
+    def __init__(
+        self,
+        interval=1.0,
+        jsonl_path=None,
+        prometheus_port=None,
+        prometheus_host="127.0.0.1",
+        console=False,
+        precision=2,
+    ):
+        self.interval = interval
+        self.jsonl_path = jsonl_path
+        self.prometheus_port = prometheus_port
+        self.prometheus_host = prometheus_host
+        self.console = console
+        self.precision = precision
+        self.window = MetricsWindow(precision)
+        # Running totals for the Prometheus counters
+        self.total_requests = 0
+        self.total_errors = 0
+        self.total_bytes = 0
+        self.total_statuses = {}
+        self.total_error_kinds = {}
+        self.last_snapshot = None
+        self.start_time = None
+        self._file = None
+        self._runner = None
+        self._task = None
+
+    def record(self, latency, status, content_length, failed=False):
+        # Called from fetch for every response: plain counter updates only.
+        # `failed` is fetch's verdict (status not accepted, or validation failed)
+        window = self.window
+        window.requests += 1
+        window.bytes += content_length
+        window.latencies.record(latency)
+        statuses = window.statuses
+        statuses[status] = statuses.get(status, 0) + 1
+        if failed:
+            window.errors += 1
+
+    def record_error(self, kind):
+        # Called from fetch for every request that failed without a response
+        window = self.window
+        window.errors += 1
+        window.error_kinds[kind] = window.error_kinds.get(kind, 0) + 1
+
+    async def start(self, start_time):
+        # Begin sampling; `start_time` is the test's perf_counter start
+        self.start_time = start_time
+        if self.jsonl_path:
+            self._file = open(self.jsonl_path, "a")
+        if self.prometheus_port is not None:
+            app = web.Application()
+            app.router.add_get("/metrics", self.handle_metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(
+                self._runner, self.prometheus_host, self.prometheus_port
+            ).start()
+        self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        # Stop sampling and publish whatever is left in the current window
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.sample(time.perf_counter())
+        if self.console:
+            sys.stderr.write("\n")
+            sys.stderr.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def run(self):
+        # Sample on absolute ticks so windows do not drift
+        tick = self.start_time
+        while True:
+            tick += self.interval
+            delay = tick - time.perf_counter()
+            if delay < 0:
+                # The loop was blocked past a tick: resynchronise instead of
+                # publishing a burst of empty catch-up windows
+                tick -= delay
+                delay = 0
+            await asyncio.sleep(delay)
+            self.sample(tick)
+
+    def sample(self, now):
+        # Swap in a fresh window and publish the finished one
+        window, self.window = self.window, MetricsWindow(self.precision)
+        if self.last_snapshot is None:
+            window_start = self.start_time
+        else:
+            window_start = self.start_time + self.last_snapshot["elapsed"]
+        seconds = max(now - window_start, 1e-9)
+
+        self.total_requests += window.requests
+        self.total_errors += window.errors
+        self.total_bytes += window.bytes
+        for status, count in window.statuses.items():
+            self.total_statuses[status] = self.total_statuses.get(status, 0) + count
+        for kind, count in window.error_kinds.items():
+            self.total_error_kinds[kind] = self.total_error_kinds.get(kind, 0) + count
+
+        values = window.latencies.percentiles(LIVE_PERCENTILES)
+        snapshot = {
+            "timestamp": time.time(),
+            "elapsed": now - self.start_time,
+            "requests": window.requests,
+            "requests_per_second": window.requests / seconds,
+            "errors": window.errors,
+            "bytes": window.bytes,
+            "statuses": {str(status): count for status, count in window.statuses.items()},
+            "error_kinds": dict(window.error_kinds),
+            "latency_ms": {
+                **{f"p{p}": values[p] * 1000 for p in LIVE_PERCENTILES if p in values},
+                "max": window.latencies.max * 1000 if window.latencies.count else 0,
+            },
+        }
+        self.last_snapshot = snapshot
+        if self._file is not None:
+            self._file.write(json.dumps(snapshot) + "\n")
+            self._file.flush()
+        if self.console:
+            sys.stderr.write("\r" + self.format_line(snapshot))
+            sys.stderr.flush()
+
+    def format_line(self, snapshot):
+        latency = snapshot["latency_ms"]
+        statuses = " ".join(
+            f"{status}:{count}" for status, count in sorted(snapshot["statuses"].items())
+        )
+        return (
+            f"[{snapshot['elapsed']:7.1f}s] {snapshot['requests_per_second']:9.1f} req/s"
+            f"  p50 {latency.get('p50', 0):8.2f}ms  p99 {latency.get('p99', 0):8.2f}ms"
+            f"  errors {snapshot['errors']:<6d} {statuses}"
+        )
+
+    def prometheus_text(self):
+        # Current state in the Prometheus text exposition format
+        lines = [
+            "# HELP loadtester_requests_total Responses received.",
+            "# TYPE loadtester_requests_total counter",
+            f"loadtester_requests_total {self.total_requests}",
+            "# HELP loadtester_errors_total Failed requests and responses that failed their check.",
+            "# TYPE loadtester_errors_total counter",
+            f"loadtester_errors_total {self.total_errors}",
+            "# HELP loadtester_received_bytes_total Response body bytes received.",
+            "# TYPE loadtester_received_bytes_total counter",
+            f"loadtester_received_bytes_total {self.total_bytes}",
+            "# HELP loadtester_responses_total Responses by status code.",
+            "# TYPE loadtester_responses_total counter",
+        ]
+        for status, count in sorted(self.total_statuses.items()):
+            lines.append(f'loadtester_responses_total{{code="{status}"}} {count}')
+        lines += [
+            "# HELP loadtester_request_errors_total Requests that failed without a response.",
+            "# TYPE loadtester_request_errors_total counter",
+        ]
+        for kind, count in sorted(self.total_error_kinds.items()):
+            lines.append(f'loadtester_request_errors_total{{kind="{kind}"}} {count}')
+        snapshot = self.last_snapshot
+        if snapshot is not None:
+            lines += [
+                "# HELP loadtester_requests_per_second Throughput over the last window.",
+                "# TYPE loadtester_requests_per_second gauge",
+                f"loadtester_requests_per_second {snapshot['requests_per_second']}",
+                "# HELP loadtester_latency_seconds Latency over the last window.",
+                "# TYPE loadtester_latency_seconds gauge",
+            ]
+            for p in LIVE_PERCENTILES:
+                value = snapshot["latency_ms"].get(f"p{p}")
+                if value is not None:
+                    lines.append(
+                        f'loadtester_latency_seconds{{quantile="{p / 100}"}} {value / 1000}'
+                    )
+        return "\n".join(lines) + "\n"
+
+    async def handle_metrics(self, request):
+        return web.Response(
+            text=self.prometheus_text(), content_type="text/plain", charset="utf-8"
+        )
@@ -1,12 +1,23 @@
 import aiohttp
 import asyncio
+import math
 import time
 import logging
 from .result import TestResult  # Importing TestResult for recording test results
-from .errors import URLCheckError  # Importing custom error for URL check failures
+from .errors import LoadTesterError, URLCheckError  # Custom errors
 from .utils import validate_url  # Importing URL validation utility
+from .scheduler import ArrivalSchedule, make_schedule  # Open-loop arrival processes
+from .engines import ConnectError, WriteError, make_engine  # Transports
+from .errorlog import ErrorLog  # Rate-limited logging of request errors
+from .samplelog import SampleLog  # Binary per-request log
+from .abort import AbortPolicy  # Conditions that stop a failing test early
+from .monitor import GeneratorMonitor, Profiler  # Watching the generator itself
+from .checks import ResponseCheck  # Declarative response validation
 from urllib.parse import urlparse  # For parsing the URL
 
+BODY_MODES = ("full", "head", "discard")
+CONNECTION_MODES = ("keepalive", "fresh")
+
 
 class LoadTester:
     def __init__(
@@ -18,8 +29,43 @@ class LoadTester:
         headers=None,
         payload=None,
         qps=None,
+        arrival="constant",
+        burst_size=10,
+        histogram=False,
+        histogram_precision=3,
+        percentiles=None,
+        preflight=True,
+        start_at=None,
+        duration=None,
+        profile=None,
+        control_interval=0.1,
+        live=None,
+        body_mode="full",
+        body_limit=1024,
+        engine="aiohttp",
+        pipeline_depth=1,
+        scenario=None,
+        sample_log=None,
+        log_interval=5.0,
+        connection_mode="keepalive",
+        prewarm=0,
+        warmup=0,
+        dns_ttl=10,
+        resolve=None,
+        abort=None,
+        timeout=None,
+        monitor_interval=0.5,
+        profiler=None,
+        profiler_output=None,
+        check=None,
     ):
         # Initialize the LoadTester with the provided parameters
+        # With a Scenario, requests are drawn from its weighted templates and
+        # `url` (defaulting to the scenario's first URL) is used for reporting
+        # and the pre-flight check
+        self.scenario = scenario
+        if url is None and scenario is not None:
+            url = scenario.url
         self.url = url
         self.concurrency = concurrency
         self.total_requests = total_requests
@@ -27,9 +73,84 @@ class LoadTester:
         self.headers = headers if headers else {}
         self.payload = payload
         self.qps = qps
+        self.arrival = arrival  # Arrival mode name or an ArrivalSchedule instance
+        self.burst_size = burst_size  # Requests per burst in "burst" arrival mode
+        self.preflight = preflight  # Whether to check the URL before the test
+        self.start_at = start_at  # Optional wall-clock (epoch) time to start sending
+        self.pending_requests = 0  # Request slots not yet claimed by a worker
+        # Time-bound runs: a fixed duration, or a multi-stage LoadProfile whose
+        # stages set the target rate and/or concurrency over time
+        self.profile = profile
+        self.duration = profile.duration if profile else duration
+        self.control_interval = control_interval  # How often ramps are updated
+        self.end_time = None
+        self.capacity = None  # Condition that parks workers above the active concurrency
+        self.dispatch_lock = None  # Held by the worker waiting for the next arrival
+        self.active_concurrency = concurrency
+        self.live = live  # Optional LiveMetrics sampler fed while the test runs
+        if body_mode not in BODY_MODES:
+            raise LoadTesterError(
+                f"Unknown body mode: {body_mode} (expected one of {', '.join(BODY_MODES)})"
+            )
+        self.body_mode = body_mode  # How response bodies are consumed
+        self.body_limit = body_limit  # Bytes kept per response in "head" mode
+        # Response checks: a ResponseCheck or its dict form, applied to every
+        # request except scenario requests with checks of their own
+        if isinstance(check, dict):
+            check = ResponseCheck.from_dict(check)
+        self.check = check
+        checks = [check] + (
+            [template.check for template in scenario.templates] if scenario else []
+        )
+        if body_mode == "discard" and any(item and item.reads_body for item in checks):
+            raise LoadTesterError("Body checks need the full or head body mode")
+        if connection_mode not in CONNECTION_MODES:
+            raise LoadTesterError(
+                f"Unknown connection mode: {connection_mode} "
+                f"(expected one of {', '.join(CONNECTION_MODES)})"
+            )
+        if prewarm and connection_mode == "fresh":
+            raise LoadTesterError("Pre-warming needs keep-alive connections")
+        # "keepalive" reuses pooled connections, "fresh" opens one per request
+        self.connection_mode = connection_mode
+        self.prewarm = prewarm  # Connections opened before the clock starts
+        self.warmup = warmup  # Seconds of load sent first and left out of the results
+        # DNS answer lifetime in seconds (aiohttp engine): 0 resolves for every
+        # new connection, None keeps answers for the whole run
+        self.dns_ttl = dns_ttl
+        self.resolve = resolve or {}  # Host name -> pinned address, no lookup
+        # Optional early abort: an AbortPolicy or its text form, e.g.
+        # "errors>50%,p99>2s,consecutive>100,window=30s"
+        if isinstance(abort, str):
+            abort = AbortPolicy.parse(abort)
+        self.abort = abort
+        self.abort_reason = None
+        self.timeout = timeout  # Per-request timeout in seconds
+        self.tasks = []  # Worker tasks of the running test, cancelled on abort
+        # Transport engine: "aiohttp" (default), "raw" or an Engine instance
+        self.engine = make_engine(engine, pipeline_depth)
+        # Optional per-request binary log: a file path or a SampleLog
+        if isinstance(sample_log, str):
+            sample_log = SampleLog(sample_log)
+        self.sample_log = sample_log
         self.logger = logging.getLogger("LoadTester")
         self.logger.setLevel(logging.INFO)
-        self.results = TestResult(total_requests)
+        # Self-monitoring of the generator (None disables it), and an optional
+        # "cprofile" or "sample" profile of it written to `profiler_output`
+        self.monitor = (
+            GeneratorMonitor(monitor_interval, logger=self.logger)
+            if monitor_interval is not None
+            else None
+        )
+        self.profiler = Profiler(profiler, profiler_output) if profiler else None
+        # Request errors are logged once per type per interval, then counted
+        self.error_log = ErrorLog(self.logger, log_interval)
+        self.results = TestResult(
+            total_requests,
+            histogram=histogram,
+            precision=histogram_precision,
+            percentiles=percentiles,  # None reports the default PERCENTILES
+        )
 
         # Parse URL components for result recording
         parsed_url = urlparse(url)
@@ -41,130 +162,440 @@ class LoadTester:
         self.results.payload = payload
         self.results.concurrency = concurrency
         self.results.qps = qps
+        if isinstance(arrival, ArrivalSchedule):
+            self.results.qps = arrival.rate
+            self.results.arrival_mode = arrival.mode
+        elif profile:
+            if profile.open_loop:
+                self.results.qps = max(stage.rate for stage in profile.stages)
+                self.results.arrival_mode = arrival
+            else:
+                self.results.arrival_mode = "closed"
+            self.results.concurrency = profile.max_concurrency(concurrency)
+        elif qps:
+            self.results.arrival_mode = arrival
+        else:
+            self.results.arrival_mode = "closed"  # No target rate: as fast as allowed
 
     async def check_url(self):
-        # Check if the URL is reachable
+        # Check if the URL is reachable, through the engine's pool once open
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.url) as response:
-                    if response.status >= 400:
-                        self.logger.error(
-                            f"URL check failed with status: {response.status}"
-                        )
-                        raise URLCheckError(
-                            f"URL check failed with status: {response.status}"
-                        )
+            status = await self.engine.check(self.url)
+            if status >= 400:
+                self.logger.error(f"URL check failed with status: {status}")
+                raise URLCheckError(f"URL check failed with status: {status}")
             return True
         except Exception as e:
             self.logger.error(f"URL check failed: {e}")
             raise URLCheckError(f"URL check failed: {e}")
 
-    async def fetch(self, session, sem):
-        # Perform a single request and record timing and other metrics
-        async with sem:
-            try:
-                start_time = (
-                    time.perf_counter()
-                )  # Start time for total request duration
-                async with session.request(
-                    self.method, self.url, headers=self.headers, data=self.payload
-                ) as response:
-                    connect_time = (
-                        time.perf_counter() - start_time
-                    )  # Time to establish the connection
-
-                    end_write_time = time.perf_counter()  # Time after request is sent
-                    content = await response.read()  # Read response content
-                    begin_read_time = (
-                        time.perf_counter()
-                    )  # Time after reading response starts
-
-                    done_time = time.perf_counter()  # Time when request is completed
-
-                    # Calculate timing metrics
-                    wait_time = begin_read_time - end_write_time
-                    processing_time = done_time - begin_read_time
-                    total_time = done_time - start_time
-
-                    # Record timing and transfer metrics
-                    self.results.add_times(
-                        connect_time, wait_time, processing_time, total_time
+    def make_schedule(self):
+        # Build the open-loop arrival schedule, or None for a closed-loop run
+        if isinstance(self.arrival, ArrivalSchedule):
+            return self.arrival
+        if self.profile:
+            if not self.profile.open_loop:
+                return None
+            rate = self.profile.rate_at(0)  # The controller updates it live
+        elif self.qps:
+            rate = self.qps
+        else:
+            return None
+        if self.arrival == "burst":
+            return make_schedule(self.arrival, rate, burst_size=self.burst_size)
+        return make_schedule(self.arrival, rate)
+
+    async def fetch(self, intended_time=None):
+        # Perform a single request and record timing and other metrics.
+        # In open-loop runs the latency is measured from the intended send time,
+        # so time spent waiting for a free worker shows up in the results.
+        endpoint = None
+        try:
+            start_time = time.perf_counter()  # Start time for total request duration
+            if intended_time is None:
+                intended_time = start_time
+            if self.scenario is not None:
+                request = self.scenario.next_request()
+                endpoint = request.name
+                sent_length = len(request.body) if request.body else 0
+            else:
+                request = None
+                sent_length = len(self.payload) if self.payload else 0
+            self.results.add_send(intended_time, start_time, endpoint)
+            if self.timeout is None:
+                response = await self.engine.request(start_time, request)
+            else:
+                response = await asyncio.wait_for(
+                    self.engine.request(start_time, request), self.timeout
+                )
+            total_time = response.done_time - intended_time
+
+            # Record timing and transfer metrics
+            self.results.add_times(
+                response.connect_time,
+                response.wait_time,
+                response.processing_time,
+                total_time,
+                response.dns_time,
+                response.reused,
+                endpoint,
+            )
+            self.results.add_transfer(
+                response.content_length, response.headers, sent_length, endpoint
+            )
+            self.results.add_status(response.status, endpoint)
+
+            if self.sample_log is not None:
+                self.sample_log.record(
+                    start_time + self.results.clock_offset,
+                    total_time,
+                    response.dns_time,
+                    response.connect_time,
+                    response.wait_time,
+                    response.processing_time,
+                    response.content_length,
+                    response.status,
+                    endpoint,
+                    None,
+                    response.reused,
+                )
+
+            # Only 200 is expected unless a check names the status codes
+            check = self.check if request is None else request.check or self.check
+            if check is None:
+                accepted = response.status == 200
+            else:
+                accepted = check.accepts(response.status)
+            reason = None
+            if accepted and check is not None and check.has_content_checks and check.due():
+                reason = check.validate(response.headers, response.content)
+                self.results.add_validation(reason, endpoint)
+                if reason is not None:
+                    self.error_log.report(
+                        logging.WARNING,
+                        "validation",
+                        "Response failed validation: %s",
+                        reason,
                     )
-                    self.results.add_transfer(len(content), response.headers)
-
-                    # Log and record errors if request failed
-                    if response.status != 200:
-                        self.results.add_error(
-                            f"Request failed with status: {response.status}"
-                        )
-                        self.logger.warning(
-                            f"Request failed with status: {response.status}"
-                        )
-
-                    # Record server software and document length
-                    if self.results.server_software is None:
-                        self.results.server_software = response.headers.get(
-                            "Server", "Unknown"
-                        ).split(" ")[0]
-
-                    if self.results.document_length == 0 and response.status == 200:
-                        self.results.document_length = len(content)
-
-                    if self.payload:
-                        self.results.total_body_sent += len(self.payload)
-
-            except aiohttp.ClientConnectorError as e:
-                self.results.failed_requests += 1
-                self.results.connection_errors += 1
-                self.logger.error(f"Connection error: {e}")
-
-            except aiohttp.ClientOSError as e:
-                self.results.failed_requests += 1
-                self.results.read_errors += 1
-                self.logger.error(f"OS error: {e}")
-
-            except aiohttp.ClientPayloadError as e:
-                self.results.failed_requests += 1
-                self.results.read_errors += 1
-                self.logger.error(f"Payload error: {e}")
-
-            except aiohttp.InvalidURL as e:
-                self.results.failed_requests += 1
-                self.results.invalid_url_errors += 1
-                self.logger.error(f"Invalid URL: {e}")
-
-            except asyncio.TimeoutError as e:
-                self.results.failed_requests += 1
-                self.results.timeout_errors += 1
-                self.logger.error(f"Timeout error: {e}")
-
-            except Exception as e:
-                self.results.failed_requests += 1
-                self.logger.error(f"Request failed: {e}")
+
+            failed = not accepted or reason is not None
+            if self.live is not None:
+                self.live.record(
+                    total_time, response.status, response.content_length, failed
+                )
+            if self.abort is not None:
+                self.abort.record(response.done_time, total_time, failed)
+
+            # Log and record errors if request failed
+            if not accepted:
+                self.results.add_status_error(response.status, endpoint)
+                self.error_log.report(
+                    logging.WARNING,
+                    response.status,
+                    "Request failed with status: %s",
+                    response.status,
+                )
+
+            # Record server software and document length
+            if self.results.server_software is None:
+                self.results.server_software = response.headers.get(
+                    "Server", "Unknown"
+                ).split(" ")[0]
+
+            if self.results.document_length == 0 and response.status == 200:
+                self.results.document_length = response.content_length
+
+        except aiohttp.ClientConnectorError as e:
+            self.record_failure(
+                "connection_errors", "Connection error", e, endpoint, intended_time
+            )
+
+        except aiohttp.ClientOSError as e:
+            self.record_failure("read_errors", "OS error", e, endpoint, intended_time)
+
+        except aiohttp.ClientPayloadError as e:
+            self.record_failure("read_errors", "Payload error", e, endpoint, intended_time)
+
+        except aiohttp.InvalidURL as e:
+            self.record_failure(
+                "invalid_url_errors", "Invalid URL", e, endpoint, intended_time
+            )
+
+        except ConnectError as e:
+            self.record_failure(
+                "connection_errors", "Connection error", e, endpoint, intended_time
+            )
+
+        except WriteError as e:
+            self.record_failure("write_errors", "Write error", e, endpoint, intended_time)
+
+        except ConnectionError as e:
+            self.record_failure("read_errors", "Connection lost", e, endpoint, intended_time)
+
+        except asyncio.TimeoutError as e:
+            self.record_failure("timeout_errors", "Timeout error", e, endpoint, intended_time)
+
+        except Exception as e:
+            self.record_failure(None, "Request failed", e, endpoint, intended_time)
+
+    def record_failure(self, kind, message, error, endpoint=None, intended_time=None):
+        # Record a request that failed without a usable response
+        self.results.add_failure(kind, endpoint, error)
+        if self.live is not None:
+            self.live.record_error(kind or "other_errors")
+        if self.sample_log is not None:
+            now = time.perf_counter()
+            sent_time = now if intended_time is None else intended_time
+            self.sample_log.record(
+                sent_time + self.results.clock_offset,
+                now - sent_time,
+                endpoint=endpoint,
+                error=kind or "other_errors",
+            )
+        self.error_log.report(
+            logging.ERROR, type(error).__name__, "%s: %s", message, error
+        )
+        if self.abort is not None:
+            reason = self.abort.record_error(time.perf_counter())
+            if reason is not None:
+                self.trip(reason)
+
+    def trip(self, reason):
+        # Abort the test: no new requests, and every worker (with its request
+        # in flight) is cancelled; the result keeps what was measured so far
+        if self.abort_reason is not None:
+            return
+        self.abort_reason = reason
+        self.results.abort_reason = reason
+        self.logger.error(f"Aborting the test: {reason}")
+        self.pending_requests = 0
+        for task in self.tasks:
+            task.cancel()
+
+    async def watch(self):
+        # Check the abort policy's sliding window while the test runs
+        while self.abort_reason is None:
+            await asyncio.sleep(self.abort.interval)
+            reason = self.abort.check(time.perf_counter())
+            if reason is not None:
+                self.trip(reason)
+
+    async def set_concurrency(self, concurrency):
+        # Change how many workers may send at once, without touching the engine
+        async with self.capacity:
+            self.active_concurrency = concurrency
+            self.capacity.notify_all()
+
+    async def stop(self):
+        # Stop handing out request slots and release any parked workers
+        self.pending_requests = 0
+        await self.set_concurrency(self.active_concurrency)
+
+    async def worker(self, index, offsets, start_time):
+        # Long-lived worker: claim the next request slot until none are left.
+        # In open-loop runs each slot carries the next absolute deadline from
+        # the shared schedule; when every worker is busy the deadline passes
+        # unclaimed, the next free worker fires immediately, and the lateness
+        # is charged to the request's latency.
+        while self.pending_requests > 0:
+            if index >= self.active_concurrency:
+                # Parked until a profile stage raises the concurrency again
+                async with self.capacity:
+                    await self.capacity.wait_for(
+                        lambda: index < self.active_concurrency
+                        or self.pending_requests <= 0
+                    )
+                continue
+            if offsets is None:
+                if self.end_time is not None and time.perf_counter() >= self.end_time:
+                    await self.stop()
+                    break
+                self.pending_requests -= 1
+                await self.fetch()
+                continue
+            # Only one worker at a time waits for the next deadline, so idle
+            # workers never claim future arrivals early and a live rate change
+            # applies from the very next arrival
+            async with self.dispatch_lock:
+                if self.pending_requests <= 0:
+                    break
+                intended_time = start_time + next(offsets)
+                if self.end_time is not None and intended_time >= self.end_time:
+                    await self.stop()
+                    break
+                self.pending_requests -= 1
+                delay = intended_time - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await self.fetch(intended_time)
+
+    async def control(self, schedule, start_time):
+        # Drive a load profile: switch stages and adjust the target rate and
+        # active concurrency live while the engine and its pool stay open
+        profile = self.profile
+        stage_index = None
+        while self.pending_requests > 0:
+            now = time.perf_counter()
+            elapsed = now - start_time
+            if elapsed >= profile.duration:
+                break
+            index = profile.stage_index(elapsed)
+            if index != stage_index:
+                stage = profile.stages[index]
+                self.results.begin_stage(
+                    stage.name,
+                    now,
+                    rate=stage.rate,
+                    concurrency=stage.concurrency or self.concurrency,
+                )
+                stage_index = index
+            if schedule is not None:
+                schedule.rate = profile.rate_at(elapsed)
+            concurrency = profile.concurrency_at(elapsed, self.concurrency)
+            if concurrency != self.active_concurrency:
+                await self.set_concurrency(concurrency)
+            until_next_stage = profile.boundaries[index] - elapsed
+            await asyncio.sleep(min(self.control_interval, until_next_stage))
+        await self.stop()
+
+    async def warm_up(self):
+        # Send load at the run's initial rate and concurrency for `warmup`
+        # seconds into a throwaway result, so pools, caches and the server
+        # settle before anything is measured
+        results, sample_log, abort = self.results, self.sample_log, self.abort
+        live = self.live
+        self.results = TestResult(0, histogram=True)
+        self.sample_log = None
+        self.abort = None
+        self.live = None
+        try:
+            schedule = self.make_schedule()
+            offsets = schedule.offsets() if schedule else None
+            start_time = time.perf_counter()
+            self.results.mark_start(start_time)
+            self.end_time = start_time + self.warmup
+            self.pending_requests = math.inf
+            await asyncio.gather(
+                *(
+                    self.worker(index, offsets, start_time)
+                    for index in range(self.active_concurrency)
+                )
+            )
+        finally:
+            warmup_results, self.results = self.results, results
+            self.sample_log = sample_log
+            self.abort = abort
+            self.live = live
+        results.warmup_requests = warmup_results.sent_requests
 
     async def run_test(self):
         # Run the load test with the specified parameters
         try:
             validate_url(self.url)  # Validate the URL
-            await self.check_url()  # Check if the URL is reachable
-            sem = asyncio.Semaphore(self.concurrency)  # Semaphore to limit concurrency
-            async with aiohttp.ClientSession(
-                connector=aiohttp.TCPConnector(limit_per_host=self.concurrency)
-            ) as session:
-                tasks = []
+            max_concurrency = (
+                self.profile.max_concurrency(self.concurrency)
+                if self.profile
+                else self.concurrency
+            )
+            # An engine passed in already open (e.g. to keep a warm pool across
+            # several runs) is left open; otherwise it lives for this run only
+            owns_engine = not self.engine.is_open
+            if owns_engine:
+                await self.engine.open(self, max_concurrency)
+            else:
+                self.engine.tester = self  # Serve this run on the warm engine
+            try:
+                if self.preflight:
+                    # Through the engine, so its connection is reused by the run
+                    await self.check_url()  # Check if the URL is reachable
+                if self.prewarm:
+                    self.results.prewarmed_connections = await self.engine.prewarm(
+                        min(self.prewarm, max_concurrency)
+                    )
+                self.capacity = asyncio.Condition()
+                self.dispatch_lock = asyncio.Lock()
+                self.active_concurrency = (
+                    self.profile.concurrency_at(0, self.concurrency)
+                    if self.profile
+                    else self.concurrency
+                )
+                if self.warmup:
+                    await self.warm_up()
+                schedule = self.make_schedule()
+                offsets = schedule.offsets() if schedule else None
+                if self.start_at is not None:
+                    # Wait for a shared start time, e.g. across worker processes
+                    await asyncio.sleep(max(0, self.start_at - time.time()))
                 start_time = time.perf_counter()  # Start time for the entire test
-                for _ in range(self.total_requests):
-                    if self.qps:
-                        await asyncio.sleep(1 / self.qps)  # Control request rate
-                    tasks.append(self.fetch(session, sem))  # Create fetch tasks
-                await asyncio.gather(*tasks)  # Run all tasks concurrently
+                self.results.mark_start(start_time)
+                if self.duration is not None:
+                    # Time-bound run: keep sending until the duration is up
+                    self.end_time = start_time + self.duration
+                    self.pending_requests = math.inf
+                else:
+                    self.end_time = None
+                    self.pending_requests = self.total_requests
+                # A fixed pool of workers pulls request slots from a shared
+                # counter, so memory tracks concurrency, not total requests
+                workers = [
+                    self.worker(index, offsets, start_time)
+                    for index in range(max_concurrency)
+                ]
+                if self.profile:
+                    workers.append(self.control(schedule, start_time))
+                if self.live is not None:
+                    await self.live.start(start_time)
+                if self.sample_log is not None:
+                    self.sample_log.open(
+                        {"url": self.url, "start_timestamp": self.results.start_timestamp},
+                        [template.name for template in self.scenario.templates]
+                        if self.scenario is not None
+                        else (),
+                    )
+                if self.monitor is not None:
+                    self.monitor.start(self, start_time)
+                if self.profiler is not None:
+                    self.profiler.start()
+                self.tasks = [asyncio.ensure_future(worker) for worker in workers]
+                watcher = None
+                if self.abort is not None:
+                    self.abort.start(start_time)
+                    watcher = asyncio.ensure_future(self.watch())
+                try:
+                    await asyncio.wait(self.tasks)
+                except asyncio.CancelledError:
+                    for task in self.tasks:
+                        task.cancel()
+                    raise
+                finally:
+                    if watcher is not None:
+                        watcher.cancel()
+                    if self.profiler is not None:
+                        self.profiler.stop()
+                    if self.monitor is not None:
+                        await self.monitor.stop(self.results, schedule is not None)
+                    if self.live is not None:
+                        await self.live.stop()
+                    if self.sample_log is not None:
+                        self.sample_log.close()  # Writes the last partial batch
+                    self.error_log.flush()
+                for task in self.tasks:
+                    if not task.cancelled() and task.exception() is not None:
+                        raise task.exception()
                 end_time = time.perf_counter()  # End time for the entire test
-                self.results.total_test_time = end_time - start_time
-        except URLCheckError:
-            # Handle URL check failure
-            self.results.failed_requests = self.total_requests
-            self.results.invalid_url_errors = self.total_requests
-            self.results.total_test_time = 0
+                self.results.end_stage(end_time)
+                self.results.mark_end(end_time)
+                if self.abort_reason is not None:
+                    # Requests cut off in flight got neither a response nor an error
+                    self.results.cancelled_requests = self.results.unfinished_requests()
+                if self.duration is not None or self.abort_reason is not None:
+                    self.results.total_requests = self.results.sent_requests
+            finally:
+                if owns_engine:
+                    await self.engine.close()
+        except (URLCheckError, ConnectError):
+            # Handle URL check failure, or an engine that cannot reach the host
+            self.results.mark_unreachable()
             self.logger.error("Invalid or unresponsive URL. Exiting...")
             return
 
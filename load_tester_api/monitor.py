@@ -0,0 +1,263 @@
+import asyncio
+import cProfile
+import os
+import random
+import sys
+import threading
+import time
+from .errors import LoadTesterError
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+MAX_SAMPLES = 600  # Series points kept; beyond this every other point is dropped
+PROFILERS = ("cprofile", "sample")
+PROFILER_OUTPUTS = {"cprofile": "generator.prof", "sample": "generator.folded"}
+
+
+def current_rss_kb():
+    # Resident set size right now (Linux), falling back to the peak elsewhere
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        if resource is None:
+            return 0
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class GeneratorMonitor:
+    # Watches the load generator itself while a test runs, so a result can
+    # tell when it measured the client rather than the server. Each `interval`
+    # it sets two timers, one at a random point (so stalls that recur in step
+    # with the interval are not missed) and one at the end; how late the
+    # event loop runs them is the loop lag. The second also samples process
+    # CPU time per wall second, resident memory, and requests in flight
+    # against the intended concurrency. At the default 0.5 s that costs about
+    # 0.05% of a core, against 0.7% for a timer every 10 ms. Totals go to the result's `generator` stats (mergeable
+    # across processes), the samples to a thinned series, and anything that
+    # suggests the numbers were limited by the generator to its warnings.
+    def __init__(
+        self,
+        interval=0.5,
+        lag_threshold=0.01,
+        cpu_threshold=0.9,
+        min_samples=4,
+        logger=None,
+    ):
+        if interval <= 0:
+            raise LoadTesterError(f"Monitor interval must be positive, got: {interval}")
+        self.interval = interval
+        self.lag_threshold = lag_threshold  # Loop lag (seconds) that counts as lagging
+        self.cpu_threshold = cpu_threshold  # Fraction of one core that counts as saturated
+        self.min_samples = min_samples  # Fewer samples are too short to judge
+        self.logger = logger
+        self.tester = None
+        self.start_time = None
+        self.task = None
+        self.stats = {}
+        self.samples = []
+        self.stride = 1  # Keep every stride-th sample in the series
+        self.count = 0
+
+    def start(self, tester, start_time):
+        self.tester = tester
+        self.start_time = start_time
+        self.stats = {
+            "processes": 1,
+            "samples": 0,
+            "probes": 0,
+            "loop_lag_total": 0,
+            "loop_lag_max": 0,
+            "lagging_samples": 0,
+            "cpu_total": 0,
+            "cpu_max": 0,
+            "rss_kb_max": current_rss_kb(),
+            "in_flight_total": 0,
+            "in_flight_max": 0,
+            "concurrency_max": tester.active_concurrency,
+            "saturated_samples": 0,
+            "late_samples": 0,
+        }
+        self.samples = []
+        self.stride = 1
+        self.count = 0
+        self.task = asyncio.ensure_future(self.run())
+
+    async def run(self):
+        window_start = time.perf_counter()
+        cpu_start = time.process_time()
+        results = self.tester.results
+        sent_start, lag_start = results.sent_requests, results.send_lag_total
+        while True:
+            lag = 0
+            for due in (
+                window_start + random.random() * self.interval,
+                window_start + self.interval,
+            ):
+                await asyncio.sleep(max(0, due - time.perf_counter()))
+                late = max(0, time.perf_counter() - due)
+                self.stats["probes"] += 1
+                self.stats["loop_lag_total"] += late
+                lag = max(lag, late)
+            now = time.perf_counter()
+            cpu_now = time.process_time()
+            sent = results.sent_requests - sent_start
+            send_lag = (results.send_lag_total - lag_start) / sent if sent else 0
+            self.sample(now, lag, (cpu_now - cpu_start) / (now - window_start), send_lag)
+            window_start, cpu_start = now, cpu_now
+            sent_start, lag_start = results.sent_requests, results.send_lag_total
+
+    def sample(self, now, lag_max, cpu, send_lag):
+        stats = self.stats
+        in_flight = self.tester.results.unfinished_requests()
+        concurrency = self.tester.active_concurrency
+        rss_kb = current_rss_kb()
+        stats["samples"] += 1
+        stats["loop_lag_max"] = max(stats["loop_lag_max"], lag_max)
+        if lag_max > self.lag_threshold:
+            stats["lagging_samples"] += 1
+        stats["cpu_total"] += cpu
+        stats["cpu_max"] = max(stats["cpu_max"], cpu)
+        stats["rss_kb_max"] = max(stats["rss_kb_max"], rss_kb)
+        stats["in_flight_total"] += in_flight
+        stats["in_flight_max"] = max(stats["in_flight_max"], in_flight)
+        stats["concurrency_max"] = max(stats["concurrency_max"], concurrency)
+        if in_flight >= concurrency:
+            stats["saturated_samples"] += 1
+        elif send_lag > self.lag_threshold:
+            # Open loop: requests went out late although workers were free
+            stats["late_samples"] += 1
+        self.count += 1
+        if self.count % self.stride:
+            return
+        self.samples.append(
+            {
+                "time": now - self.start_time,
+                "loop_lag_ms": lag_max * 1000,
+                "cpu": cpu,
+                "rss_kb": rss_kb,
+                "in_flight": in_flight,
+                "concurrency": concurrency,
+                "send_lag_ms": send_lag * 1000,
+            }
+        )
+        if len(self.samples) >= MAX_SAMPLES:
+            # Halve the series and its resolution, so a long run stays bounded
+            self.samples = self.samples[::2]
+            self.stride *= 2
+
+    def warnings(self, open_loop):
+        # Plain-language signs that the result was limited by the generator
+        stats = self.stats
+        samples = stats["samples"]
+        if samples < self.min_samples:
+            return []
+        warnings = []
+        cpu = stats["cpu_total"] / samples
+        if cpu >= self.cpu_threshold:
+            warnings.append(
+                f"The generator used {cpu:.0%} of a CPU core on average: throughput "
+                "and latency are likely limited by the client; add --workers or use "
+                "--engine raw"
+            )
+        if stats["lagging_samples"] / samples >= 0.1:
+            warnings.append(
+                f"Event loop lag exceeded {self.lag_threshold * 1000:g} ms in "
+                f"{stats['lagging_samples'] / samples:.0%} of samples (max "
+                f"{stats['loop_lag_max'] * 1000:.1f} ms): latencies include time the "
+                "client took to get to responses"
+            )
+        if open_loop and stats["late_samples"] / samples >= 0.1:
+            warnings.append(
+                f"Requests went out late with workers free in "
+                f"{stats['late_samples'] / samples:.0%} of samples: the generator "
+                "could not keep to the schedule"
+            )
+        if open_loop and stats["saturated_samples"] / samples >= 0.1:
+            warnings.append(
+                f"All {stats['concurrency_max']} workers were busy in "
+                f"{stats['saturated_samples'] / samples:.0%} of samples: the target "
+                "rate needs more concurrency; latencies include the wait for a free "
+                "worker (coordinated omission corrected)"
+            )
+        return warnings
+
+    async def stop(self, results, open_loop):
+        # Stop sampling and attach the stats, series and warnings to `results`
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        results.generator = dict(self.stats)
+        results.generator_samples = self.samples
+        results.generator_warnings = self.warnings(open_loop)
+        if self.logger is not None:
+            for warning in results.generator_warnings:
+                self.logger.warning(warning)
+
+
+class Profiler:
+    # Optional profile of the generator while the test runs. "cprofile"
+    # traces every call (exact counts, noticeable overhead) and writes pstats
+    # data; "sample" snapshots the event loop thread's stack every `interval`
+    # seconds from a background thread (low overhead) and writes collapsed
+    # stacks, one "frame;frame;frame count" line each, for flame graph tools.
+    def __init__(self, mode, path=None, interval=0.005):
+        if mode not in PROFILERS:
+            raise LoadTesterError(
+                f"Unknown profiler: {mode} (expected one of {', '.join(PROFILERS)})"
+            )
+        self.mode = mode
+        self.path = path or PROFILER_OUTPUTS[mode]
+        self.interval = interval
+        self.profile = None
+        self.thread = None
+        self.stopped = None
+        self.stacks = {}
+
+    def start(self):
+        if self.mode == "cprofile":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+            return
+        self.stacks = {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self.sample, args=(threading.get_ident(),), daemon=True
+        )
+        self.thread.start()
+
+    def sample(self, thread_id):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def stop(self):
+        # Stop profiling and write the output file
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.dump_stats(self.path)
+            self.profile = None
+            return
+        if self.thread is None:
+            return
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+        with open(self.path, "w") as output:
+            for stack, count in sorted(self.stacks.items()):
+                output.write(f"{stack} {count}\n")
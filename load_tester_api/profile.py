@@ -0,0 +1,158 @@
+import json
+import math
+from .errors import LoadTesterError
+
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    # Accept seconds as a number or a string such as "90", "30s", "2m" or "1h"
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        text = str(value).strip().lower()
+        for unit in sorted(DURATION_UNITS, key=len, reverse=True):
+            if text.endswith(unit):
+                number, scale = text[: -len(unit)], DURATION_UNITS[unit]
+                break
+        else:
+            number, scale = text, 1
+        try:
+            seconds = float(number) * scale
+        except ValueError:
+            raise LoadTesterError(f"Invalid duration: {value}")
+    if seconds <= 0:
+        raise LoadTesterError(f"Duration must be positive, got: {value}")
+    return seconds
+
+
+class Stage:
+    # One step of a load profile. `rate` (requests per second) and/or
+    # `concurrency` are the targets for the stage; with `ramp` the value moves
+    # linearly from the previous stage's target to this one over the duration,
+    # otherwise it steps straight to the target and holds it.
+    def __init__(self, duration, rate=None, concurrency=None, name=None, ramp=False):
+        self.duration = parse_duration(duration)
+        if rate is not None and rate <= 0:
+            raise LoadTesterError(f"Stage rate must be positive, got: {rate}")
+        if concurrency is not None and concurrency < 1:
+            raise LoadTesterError(f"Stage concurrency must be at least 1, got: {concurrency}")
+        self.rate = rate
+        self.concurrency = concurrency
+        self.name = name
+        self.ramp = ramp
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["duration"],
+            rate=data.get("rate"),
+            concurrency=data.get("concurrency"),
+            name=data.get("name"),
+            ramp=data.get("ramp", False),
+        )
+
+
+class LoadProfile:
+    # An ordered list of stages run back to back within one session, e.g.
+    # ramp 100 -> 5000 req/s over 2 minutes, hold for 10 minutes, step down.
+    def __init__(self, stages, start_rate=1, start_concurrency=1):
+        if not stages:
+            raise LoadTesterError("A load profile needs at least one stage")
+        with_rate = [stage.rate is not None for stage in stages]
+        if any(with_rate) and not all(with_rate):
+            raise LoadTesterError(
+                "Either every stage or no stage of a profile must set a rate"
+            )
+        self.stages = stages
+        for index, stage in enumerate(stages):
+            if stage.name is None:
+                stage.name = f"stage {index + 1}"
+        self.start_rate = start_rate
+        self.start_concurrency = start_concurrency
+        self.open_loop = all(with_rate)
+        self.duration = sum(stage.duration for stage in stages)
+        self.boundaries = []  # Elapsed time at which each stage ends
+        elapsed = 0
+        for stage in stages:
+            elapsed += stage.duration
+            self.boundaries.append(elapsed)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            [Stage.from_dict(stage) for stage in data["stages"]],
+            start_rate=data.get("start_rate", 1),
+            start_concurrency=data.get("start_concurrency", 1),
+        )
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise LoadTesterError(f"Could not read load profile {path}: {e}")
+        if isinstance(data, list):
+            data = {"stages": data}
+        return cls.from_dict(data)
+
+    def max_concurrency(self, default):
+        return max(
+            max(stage.concurrency or default for stage in self.stages),
+            self.start_concurrency,
+        )
+
+    def stage_index(self, elapsed):
+        # Index of the stage active `elapsed` seconds into the run
+        for index, boundary in enumerate(self.boundaries):
+            if elapsed < boundary:
+                return index
+        return len(self.stages) - 1
+
+    def _target(self, elapsed, attribute, start_value):
+        index = self.stage_index(elapsed)
+        stage = self.stages[index]
+        target = getattr(stage, attribute)
+        if target is None or not stage.ramp:
+            return target
+        # Ramp from the previous stage's target (or the start value)
+        previous = start_value
+        for earlier in reversed(self.stages[:index]):
+            if getattr(earlier, attribute) is not None:
+                previous = getattr(earlier, attribute)
+                break
+        stage_start = self.boundaries[index] - stage.duration
+        progress = min(1.0, max(0.0, (elapsed - stage_start) / stage.duration))
+        return previous + (target - previous) * progress
+
+    def rate_at(self, elapsed):
+        return self._target(elapsed, "rate", self.start_rate)
+
+    def concurrency_at(self, elapsed, default):
+        concurrency = self._target(elapsed, "concurrency", self.start_concurrency)
+        return default if concurrency is None else max(1, int(round(concurrency)))
+
+    def scaled(self, factor):
+        # A copy with every rate and concurrency multiplied by `factor`, used to
+        # split one profile across several worker processes
+        def scale(value):
+            return None if value is None else value * factor
+
+        def scale_concurrency(value):
+            return None if value is None else max(1, math.ceil(value * factor))
+
+        return LoadProfile(
+            [
+                Stage(
+                    stage.duration,
+                    rate=scale(stage.rate),
+                    concurrency=scale_concurrency(stage.concurrency),
+                    name=stage.name,
+                    ramp=stage.ramp,
+                )
+                for stage in self.stages
+            ],
+            start_rate=scale(self.start_rate),
+            start_concurrency=scale_concurrency(self.start_concurrency),
+        )
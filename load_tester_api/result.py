@@ -1,22 +1,100 @@
-from statistics import mean, stdev
+import copy
+import time
+from array import array
 from urllib.parse import urlparse
+from .histogram import LogHistogram
+from .stats import export_histogram, sample_stats
+from .errors import LoadTesterError
+
+PERCENTILES = [50, 66, 75, 80, 90, 95, 98, 99, 100]  # Reported by default
+SERIES = (
+    "latencies",
+    "connect_times",
+    "wait_times",
+    "processing_times",
+    "dns_times",
+    "setup_times",
+)
+# Error taxonomy bounds: distinct error types kept (the rest count as
+# "other") and example messages kept per type
+MAX_ERROR_TYPES = 50
+ERROR_SAMPLES = 3
+
+
+def merge_counters(counters, other):
+    # Add another process's counters into `counters`: names ending in _max
+    # are maxima, the rest add up
+    for name, value in other.items():
+        if name.endswith("_max"):
+            counters[name] = max(counters.get(name, 0), value)
+        else:
+            counters[name] = counters.get(name, 0) + value
+
+
+def describe(series, percentiles=(), histogram=False):
+    # Summary statistics (in ms) for a timing series, which is either an array
+    # of raw samples or a LogHistogram. Returns (stats, percentile values);
+    # with `histogram` the stats include the exported latency histogram.
+    if isinstance(series, LogHistogram):
+        values = series.percentiles([50, *percentiles])
+        stats = {
+            "min": series.min * 1000,
+            "mean": series.mean() * 1000,
+            "median": values[50] * 1000,
+            "max": series.max * 1000,
+            "stdev": series.stdev() * 1000,
+        }
+        if histogram:
+            stats["histogram"] = export_histogram(series)
+        return stats, {
+            f"{percentile:g}": values[percentile] * 1000 for percentile in percentiles
+        }
+
+    result = sample_stats(series, percentiles, histogram)
+    stats = {
+        name: result[name] * 1000 for name in ("min", "mean", "median", "max", "stdev")
+    }
+    if histogram:
+        stats["histogram"] = result["histogram"]
+    return stats, {
+        f"{percentile:g}": result["percentiles"][percentile] * 1000
+        for percentile in percentiles
+    }
 
 
 class TestResult:
-    def __init__(self, total_requests):
+    def __init__(self, total_requests, histogram=False, precision=3, percentiles=None):
         self.total_requests = total_requests
         self.completed_requests = 0
         self.failed_requests = 0
-        self.latencies = []
-        self.connect_times = []
-        self.wait_times = []
-        self.processing_times = []
+        # Timing series: raw samples in typed arrays (8 bytes each) by
+        # default, or fixed-size log-bucketed histograms for long runs where
+        # keeping every sample is too expensive
+        self.histogram = histogram
+        self.precision = precision
+        self.percentiles = list(percentiles or PERCENTILES)  # Latency percentiles reported
+        if histogram:
+            self.latencies = LogHistogram(precision)
+            self.connect_times = LogHistogram(precision)
+            self.wait_times = LogHistogram(precision)
+            self.processing_times = LogHistogram(precision)
+            self.dns_times = LogHistogram(precision)
+            self.setup_times = LogHistogram(precision)
+        else:
+            self.latencies = array("d")
+            self.connect_times = array("d")
+            self.wait_times = array("d")
+            self.processing_times = array("d")
+            self.dns_times = array("d")
+            self.setup_times = array("d")  # Long-lived connection setup, streaming runs
         self.total_transferred = 0
         self.html_transferred = 0
         self.server_software = None
         self.document_length = 0
         self.total_body_sent = 0
-        self.errors = []
+        self.status_codes = {}  # Status code -> responses
+        self.error_types = {}  # "HTTP 503", exception class name, ... -> failures
+        self.error_samples = {}  # Error type -> first few messages
         self.total_test_time = 0
         self.server_hostname = None
         self.server_port = None
@@ -30,30 +108,483 @@ class TestResult:
         self.status_code_errors = 0
         self.invalid_url_errors = 0
         self.timeout_errors = 0
+        self.validation_errors = 0  # Responses that failed a content check
+        self.validated_responses = 0  # Responses whose content was checked
         self.keep_alive_requests = 0
+        self.new_connections = 0  # Requests that opened their own connection
+        self.prewarmed_connections = 0  # Opened before the clock started
+        self.warmup_requests = 0  # Sent during the warm-up, not in any statistic
+        self.abort_reason = None  # Why the test was stopped early, if it was
+        self.cancelled_requests = 0  # In flight when the test was aborted
+        # Self-monitoring of the load generator: totals (names ending in _max
+        # are maxima, the rest add up across processes), a thinned series of
+        # samples, and signs that the generator limited the results
+        self.generator = {}
+        self.generator_samples = []
+        self.generator_warnings = []
+        # Long-lived connection runs ("websocket" or "stream"): messages take
+        # the place of requests, and `streams` counts the connections
+        # (mergeable like `generator`)
+        self.stream_mode = None
+        self.streams = {}
         self.qps = None
+        self.arrival_mode = None
+        self.sent_requests = 0
+        self.first_send_time = None
+        self.last_send_time = None
+        self.send_lag_total = 0
+        self.send_lag_max = 0
+        self.start_timestamp = None  # Wall-clock (epoch) start and end of the test
+        self.end_timestamp = None
+        self.clock_offset = 0  # Maps this process's perf_counter values to epoch time
+        self.stage_name = None
+        self.stages = []  # Per-stage results for runs driven by a LoadProfile
+        self.current_stage = None  # Stage result that also receives new records
+        self.endpoint_name = None
+        self.endpoints = {}  # Per-endpoint results for scenario runs, by name
+        self.agent_name = None
+        self.agent_status = None  # "completed" or "dropped" for distributed runs
+        self.clock_skew = 0  # Agent clock minus coordinator clock, in seconds
+        self.agents = {}  # Per-agent results of a distributed run, by name
 
-    def add_times(self, connect_time, wait_time, processing_time, total_time):
-        self.connect_times.append(connect_time)
-        self.wait_times.append(wait_time)
-        self.processing_times.append(processing_time)
-        self.latencies.append(total_time)
+    def add_times(
+        self,
+        connect_time,
+        wait_time,
+        processing_time,
+        total_time,
+        dns_time=0,
+        reused=False,
+        endpoint=None,
+    ):
+        if self.histogram:
+            self.connect_times.record(connect_time)
+            self.wait_times.record(wait_time)
+            self.processing_times.record(processing_time)
+            self.latencies.record(total_time)
+            self.dns_times.record(dns_time)
+        else:
+            self.connect_times.append(connect_time)
+            self.wait_times.append(wait_time)
+            self.processing_times.append(processing_time)
+            self.latencies.append(total_time)
+            self.dns_times.append(dns_time)
         self.completed_requests += 1
+        if reused:
+            self.keep_alive_requests += 1
+        else:
+            self.new_connections += 1
+        if self.current_stage is not None:
+            self.current_stage.add_times(
+                connect_time, wait_time, processing_time, total_time, dns_time, reused
+            )
+        if endpoint is not None:
+            self.endpoint(endpoint).add_times(
+                connect_time, wait_time, processing_time, total_time, dns_time, reused
+            )
+
+    def endpoint(self, name):
+        # Result for one named request of a scenario, created on first use
+        result = self.endpoints.get(name)
+        if result is None:
+            result = TestResult(0, histogram=self.histogram, precision=self.precision)
+            result.endpoint_name = name
+            result.arrival_mode = self.arrival_mode
+            result.start_timestamp = self.start_timestamp
+            result.clock_offset = self.clock_offset
+            self.endpoints[name] = result
+        return result
+
+    def begin_stage(self, name, start_time, rate=None, concurrency=None):
+        # Start collecting a separate result for the next stage of a profile.
+        # Records are attributed to the stage that is active when they arrive.
+        self.end_stage(start_time)
+        stage = TestResult(0, histogram=self.histogram, precision=self.precision)
+        stage.stage_name = name
+        stage.qps = rate
+        stage.concurrency = concurrency
+        stage.arrival_mode = self.arrival_mode
+        stage.mark_start(start_time)
+        self.stages.append(stage)
+        self.current_stage = stage
+
+    def end_stage(self, end_time):
+        stage = self.current_stage
+        if stage is not None:
+            stage.mark_end(end_time)
+            stage.total_requests = stage.sent_requests
+            self.current_stage = None
+
+    def mark_start(self, start_time):
+        # Record the start of the test, given as a perf_counter() value
+        self.clock_offset = time.time() - time.perf_counter()
+        self.start_timestamp = start_time + self.clock_offset
+
+    def mark_end(self, end_time):
+        self.end_timestamp = end_time + self.clock_offset
+        self.total_test_time = self.end_timestamp - self.start_timestamp
+        for endpoint in self.endpoints.values():
+            endpoint.mark_end(end_time)
+            endpoint.total_requests = endpoint.sent_requests
+
+    def mark_unreachable(self):
+        # The pre-flight check failed, so every request counts as failed
+        self.failed_requests = self.total_requests
+        self.invalid_url_errors = self.total_requests
+        self.total_test_time = 0
+
+    def merge(self, other):
+        # Fold another result (e.g. from a worker process) into this one.
+        # Samples and counters are combined; configuration fields such as
+        # total_requests, concurrency and qps are left for the caller to set.
+        if self.histogram != other.histogram:
+            raise LoadTesterError("Cannot merge raw-sample and histogram results")
+        for name in SERIES:
+            if self.histogram:
+                getattr(self, name).merge(getattr(other, name))
+            else:
+                getattr(self, name).extend(getattr(other, name))
+        for name in (
+            "completed_requests",
+            "failed_requests",
+            "total_transferred",
+            "html_transferred",
+            "total_body_sent",
+            "non_2xx_responses",
+            "write_errors",
+            "connection_errors",
+            "read_errors",
+            "status_code_errors",
+            "invalid_url_errors",
+            "timeout_errors",
+            "validation_errors",
+            "validated_responses",
+            "keep_alive_requests",
+            "new_connections",
+            "prewarmed_connections",
+            "warmup_requests",
+            "cancelled_requests",
+            "sent_requests",
+            "send_lag_total",
+        ):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for code, count in other.status_codes.items():
+            self.status_codes[code] = self.status_codes.get(code, 0) + count
+        for category, count in other.error_types.items():
+            merged = self.note_error(category, count=count)
+            for sample in other.error_samples.get(category, ()):
+                self.note_error(merged, sample, count=0)
+        self.send_lag_max = max(self.send_lag_max, other.send_lag_max)
+        merge_counters(self.generator, other.generator)
+        merge_counters(self.streams, other.streams)
+        if self.stream_mode is None:
+            self.stream_mode = other.stream_mode
+        self.generator_samples.extend(other.generator_samples)
+        for warning in other.generator_warnings:
+            if warning not in self.generator_warnings:
+                self.generator_warnings.append(warning)
+        if self.abort_reason is None:
+            self.abort_reason = other.abort_reason
+        if self.server_software is None:
+            self.server_software = other.server_software
+        if not self.document_length:
+            self.document_length = other.document_length
+        for index, stage in enumerate(other.stages):
+            if index < len(self.stages):
+                mine = self.stages[index]
+                mine.merge(stage)
+                # Stage targets are per worker, so they add up as well
+                mine.total_requests += stage.total_requests
+                if mine.qps is not None and stage.qps is not None:
+                    mine.qps += stage.qps
+                if mine.concurrency is not None and stage.concurrency is not None:
+                    mine.concurrency += stage.concurrency
+            else:
+                self.stages.append(stage)
+        for name, endpoint in other.endpoints.items():
+            if name in self.endpoints:
+                self.endpoints[name].merge(endpoint)
+                self.endpoints[name].total_requests += endpoint.total_requests
+            else:
+                self.endpoints[name] = endpoint
+
+        # Send times are per-process perf_counter values: shift the other
+        # result's times into this result's clock before combining them
+        if other.first_send_time is not None:
+            shift = other.clock_offset - self.clock_offset
+            first, last = other.first_send_time + shift, other.last_send_time + shift
+            if self.first_send_time is None:
+                self.first_send_time, self.last_send_time = first, last
+            else:
+                self.first_send_time = min(self.first_send_time, first)
+                self.last_send_time = max(self.last_send_time, last)
+
+        # The merged test spans from the earliest start to the latest end
+        if other.start_timestamp is not None:
+            if self.start_timestamp is None:
+                self.start_timestamp = other.start_timestamp
+                self.end_timestamp = other.end_timestamp
+            else:
+                self.start_timestamp = min(self.start_timestamp, other.start_timestamp)
+                self.end_timestamp = max(self.end_timestamp, other.end_timestamp)
+            self.total_test_time = self.end_timestamp - self.start_timestamp
+        return self
 
-    def add_transfer(self, content_length, headers):
+    def to_dict(self):
+        # JSON-friendly copy of the whole result, e.g. to send it between
+        # processes or machines; from_dict() restores it
+        data = {}
+        for name, value in vars(self).items():
+            if name == "current_stage":
+                continue  # Only meaningful inside the running process
+            if name in SERIES:
+                value = value.to_dict() if self.histogram else list(value)
+            elif name == "stages":
+                value = [stage.to_dict() for stage in value]
+            elif name in ("endpoints", "agents"):
+                value = {key: child.to_dict() for key, child in value.items()}
+            elif isinstance(value, bytes):
+                value = value.decode("utf-8", "replace")
+            elif isinstance(value, (dict, list)):
+                value = copy.deepcopy(value)  # e.g. error counts: not shared
+            data[name] = value
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        result = cls(
+            data["total_requests"], histogram=data["histogram"], precision=data["precision"]
+        )
+        for name, value in data.items():
+            if name in SERIES:
+                value = LogHistogram.from_dict(value) if result.histogram else array("d", value)
+            elif name == "stages":
+                value = [cls.from_dict(stage) for stage in value]
+            elif name in ("endpoints", "agents"):
+                value = {key: cls.from_dict(child) for key, child in value.items()}
+            elif name == "status_codes":
+                value = {int(code): count for code, count in value.items()}
+            setattr(result, name, value)
+        return result
+
+    def shift_clock(self, seconds):
+        # Move wall-clock times by `seconds`, e.g. from a remote machine's
+        # clock onto the local one once the skew between them is known
+        if self.start_timestamp is not None:
+            self.start_timestamp += seconds
+        if self.end_timestamp is not None:
+            self.end_timestamp += seconds
+        self.clock_offset += seconds
+        for child in (*self.stages, *self.endpoints.values()):
+            child.shift_clock(seconds)
+
+    def add_send(self, intended_time, actual_time, endpoint=None):
+        # Track when requests actually went out versus when they were scheduled
+        if self.first_send_time is None:
+            self.first_send_time = actual_time
+        self.last_send_time = actual_time
+        self.sent_requests += 1
+        lag = actual_time - intended_time
+        self.send_lag_total += lag
+        if lag > self.send_lag_max:
+            self.send_lag_max = lag
+        if self.current_stage is not None:
+            self.current_stage.add_send(intended_time, actual_time)
+        if endpoint is not None:
+            self.endpoint(endpoint).add_send(intended_time, actual_time)
+
+    def achieved_rate(self):
+        # Rate at which requests were actually sent, measured between first and last send
+        if self.sent_requests > 1 and self.last_send_time > self.first_send_time:
+            return (self.sent_requests - 1) / (self.last_send_time - self.first_send_time)
+        return self.sent_requests / self.total_test_time if self.total_test_time else 0
+
+    def add_transfer(self, content_length, headers, sent_length=0, endpoint=None):
         headers_length = sum(
             len(k) + len(v) + 4 for k, v in headers.items()
         )  # 4 for ': ' and '\r\n'
         self.total_transferred += content_length + headers_length
         self.html_transferred += content_length
+        self.total_body_sent += sent_length
+        if self.current_stage is not None:
+            self.current_stage.add_transfer(content_length, headers, sent_length)
+        if endpoint is not None:
+            self.endpoint(endpoint).add_transfer(content_length, headers, sent_length)
 
-    def add_error(self, error):
-        self.errors.append(error)
+    def note_error(self, category, sample=None, count=1):
+        # Count a failure of type `category` in the bounded taxonomy, keeping
+        # `sample` (an exception or message) as one of the few examples.
+        # Returns the category it was counted under.
+        total = self.error_types.get(category)
+        if total is None:
+            if len(self.error_types) >= MAX_ERROR_TYPES:
+                category = "other"
+            total = self.error_types.get(category, 0)
+        self.error_types[category] = total + count
+        if sample is not None:
+            samples = self.error_samples.setdefault(category, [])
+            if len(samples) < ERROR_SAMPLES:
+                samples.append(str(sample))  # Only formatted while examples are kept
+        return category
+
+    def add_status(self, status, endpoint=None):
+        # Count every response by status code
+        self.status_codes[status] = self.status_codes.get(status, 0) + 1
+        if not 200 <= status < 300:
+            self.non_2xx_responses += 1
+        if self.current_stage is not None:
+            self.current_stage.add_status(status)
+        if endpoint is not None:
+            self.endpoint(endpoint).add_status(status)
+
+    def add_status_error(self, status, endpoint=None):
+        # Count a response whose status code makes the request a failure
         self.failed_requests += 1
+        self.status_code_errors += 1
+        self.note_error(f"HTTP {status}")
+        if self.current_stage is not None:
+            self.current_stage.add_status_error(status)
+        if endpoint is not None:
+            self.endpoint(endpoint).add_status_error(status)
+
+    def add_validation(self, reason=None, endpoint=None):
+        # Count a response whose content was checked; `reason` says why it
+        # failed the checks, if it did
+        self.validated_responses += 1
+        if reason is not None:
+            self.failed_requests += 1
+            self.validation_errors += 1
+            self.note_error("Validation failed", reason)
+        if self.current_stage is not None:
+            self.current_stage.add_validation(reason)
+        if endpoint is not None:
+            self.endpoint(endpoint).add_validation(reason)
+
+    def unfinished_requests(self):
+        # Sent requests with neither a response nor an error yet. Status code
+        # and validation failures are completed requests as well as failed
+        # ones, so they are added back.
+        return (
+            self.sent_requests
+            - self.completed_requests
+            - self.failed_requests
+            + self.status_code_errors
+            + self.validation_errors
+        )
+
+    def add_failure(self, kind=None, endpoint=None, error=None):
+        # Count a request that failed without a response; `kind` names the
+        # error counter to bump, e.g. "connection_errors", and `error` is the
+        # exception, whose class is its type in the taxonomy
+        self.failed_requests += 1
+        if kind is not None:
+            setattr(self, kind, getattr(self, kind) + 1)
+        self.note_error(
+            type(error).__name__ if error is not None else kind or "other", error
+        )
+        if self.current_stage is not None:
+            self.current_stage.add_failure(kind, error=error)
+        if endpoint is not None:
+            self.endpoint(endpoint).add_failure(kind, error=error)
+
+    def count_stream(self, name, count=1):
+        self.streams[name] = self.streams.get(name, 0) + count
+
+    def add_connection(self, setup_time, reconnect=False, open_connections=0):
+        # A long-lived connection opened after `setup_time` seconds (connect,
+        # TLS and the WebSocket upgrade or the stream's response headers);
+        # `open_connections` is how many are open with it
+        if self.histogram:
+            self.setup_times.record(setup_time)
+        else:
+            self.setup_times.append(setup_time)
+        self.count_stream("connections")
+        if reconnect:
+            self.count_stream("reconnects")
+        if open_connections > self.streams.get("peak_open", 0):
+            self.streams["peak_open"] = open_connections
+
+    def add_setup_failure(self, error, category=None):
+        # A long-lived connection that could not be opened
+        self.count_stream("setup_failures")
+        self.note_error(category or type(error).__name__, error)
+
+    def add_drop(self, error=None, lost=0):
+        # An open connection closed before the end of the run, taking `lost`
+        # messages that were still waiting for a reply with it
+        self.count_stream("drops")
+        self.note_error(
+            type(error).__name__ if error is not None else "Connection closed", error
+        )
+        self.add_lost_messages(lost, "read_errors")
+
+    def add_lost_messages(self, count, kind):
+        # Sent messages that never got a reply: their connection dropped
+        # ("read_errors") or the run ended first ("timeout_errors")
+        self.failed_requests += count
+        setattr(self, kind, getattr(self, kind) + count)
+
+    def add_message(self, size, latency=None):
+        # A message received on a long-lived connection; `latency` is the
+        # round trip when it answers a message that was sent
+        self.count_stream("messages_received")
+        self.total_transferred += size
+        self.html_transferred += size
+        if latency is not None:
+            if self.histogram:
+                self.latencies.record(latency)
+            else:
+                self.latencies.append(latency)
+            self.completed_requests += 1
+
+    def error_summary(self):
+        # Error types by count, most frequent first, with their examples
+        return [
+            {
+                "type": category,
+                "count": count,
+                "samples": self.error_samples.get(category, []),
+            }
+            for category, count in sorted(
+                self.error_types.items(), key=lambda item: -item[1]
+            )
+        ]
 
     def summary(self):
         total_time = self.total_test_time
-        average_latency = mean(self.latencies) if self.latencies else 0
+        times = {}
+        if self.latencies:
+            if self.connect_times:
+                times["dns_times"], _ = describe(self.dns_times)
+                times["connection_times"], _ = describe(self.connect_times)
+                times["processing_times"], _ = describe(self.processing_times)
+                times["waiting_times"], _ = describe(self.wait_times)
+            else:
+                # Message round trips of a streaming run have no phases
+                for name in (
+                    "dns_times",
+                    "connection_times",
+                    "processing_times",
+                    "waiting_times",
+                ):
+                    times[name] = {}
+            times["total_times"], times["percentiles"] = describe(
+                self.latencies, self.percentiles, histogram=True
+            )
+            # The distribution is exported on its own, next to the percentiles
+            times["histogram"] = times["total_times"].pop("histogram")
+            average_latency = times["total_times"]["mean"] / 1000
+        else:
+            times = {
+                "dns_times": {},
+                "connection_times": {},
+                "processing_times": {},
+                "waiting_times": {},
+                "total_times": {},
+                "percentiles": "N/A",
+                "histogram": [],
+            }
+            average_latency = 0
         requests_per_second = self.completed_requests / total_time if total_time else 0
         transfer_rate_received = (
             self.total_transferred / total_time / 1024 if total_time else 0
@@ -78,17 +609,46 @@ class TestResult:
             "document_length": self.document_length,
             "concurrency_level": self.concurrency,
             "qps": self.qps,
+            "arrival_mode": self.arrival_mode,
+            "intended_rate": self.qps,
+            "achieved_rate": self.achieved_rate(),
+            "send_lag": {
+                "mean": (
+                    self.send_lag_total / self.sent_requests * 1000
+                    if self.sent_requests
+                    else 0
+                ),
+                "max": self.send_lag_max * 1000,
+            },
             "total_requests": self.total_requests,
             "completed_requests": self.completed_requests,
             "failed_requests": self.failed_requests,
+            "abort_reason": self.abort_reason,
+            "cancelled_requests": self.cancelled_requests,
             "error_rate": f"{error_rate:.2%}",
+            "non_2xx_responses": self.non_2xx_responses,
             "write_errors": self.write_errors,
             "connection_errors": self.connection_errors,
             "read_errors": self.read_errors,
             "status_code_errors": self.status_code_errors,
             "invalid_url_errors": self.invalid_url_errors,
             "timeout_errors": self.timeout_errors,
+            "validation_errors": self.validation_errors,
+            "validated_responses": self.validated_responses,
+            "status_codes": {
+                str(code): count for code, count in sorted(self.status_codes.items())
+            },
+            "error_types": self.error_summary(),
             "keep_alive_requests": self.keep_alive_requests,
+            "new_connections": self.new_connections,
+            "connection_reuse": (
+                self.keep_alive_requests / self.completed_requests
+                if self.completed_requests
+                else 0
+            ),
+            "connection_churn": self.new_connections / total_time if total_time else 0,
+            "prewarmed_connections": self.prewarmed_connections,
+            "warmup_requests": self.warmup_requests,
             "total_transferred": self.total_transferred,
             "html_transferred": self.html_transferred,
             "requests_per_second": requests_per_second,
@@ -98,51 +658,149 @@ class TestResult:
             "transfer_rate_total": transfer_rate_total,
             "total_test_time": total_time,
         }
-        if self.latencies and self.connect_times:
-            latencies_sorted = sorted(self.latencies)
-            connect_times_sorted = sorted(self.connect_times)
-            wait_times_sorted = sorted(self.wait_times)
-            processing_times_sorted = sorted(self.processing_times)
-
-            summary["connection_times"] = {
-                "min": min(self.connect_times) * 1000,
-                "mean": mean(self.connect_times) * 1000,
-                "median": connect_times_sorted[len(connect_times_sorted) // 2] * 1000,
-                "max": max(self.connect_times) * 1000,
-            }
-            summary["processing_times"] = {
-                "min": min(self.processing_times) * 1000,
-                "mean": mean(self.processing_times) * 1000,
-                "median": processing_times_sorted[len(processing_times_sorted) // 2]
-                * 1000,
-                "max": max(self.processing_times) * 1000,
-            }
-            summary["waiting_times"] = {
-                "min": min(self.wait_times) * 1000,
-                "mean": mean(self.wait_times) * 1000,
-                "median": wait_times_sorted[len(wait_times_sorted) // 2] * 1000,
-                "max": max(self.wait_times) * 1000,
-            }
-            summary["total_times"] = {
-                "min": min(self.latencies) * 1000,
-                "mean": mean(self.latencies) * 1000,
-                "median": latencies_sorted[len(latencies_sorted) // 2] * 1000,
-                "max": max(self.latencies) * 1000,
-            }
+        summary.update(times)
+        summary["generator_warnings"] = list(self.generator_warnings)
+        if self.generator:
+            summary["generator"] = self.generator_summary()
+        if self.stream_mode is not None:
+            summary["streams"] = self.stream_summary()
+        if self.stages:
+            summary["stages"] = [stage.stage_summary() for stage in self.stages]
+        if self.agents:
+            summary["agents"] = [agent.agent_summary() for agent in self.agents.values()]
+        if self.endpoints:
+            summary["endpoints"] = [
+                endpoint.endpoint_summary(self.sent_requests)
+                for endpoint in self.endpoints.values()
+            ]
+        return summary
 
-            percentiles = [50, 66, 75, 80, 90, 95, 98, 99, 100]
-            summary["percentiles"] = {
-                str(percentile): latencies_sorted[
-                    int(len(latencies_sorted) * percentile / 100)
-                ]
-                * 1000
-                for percentile in percentiles
-                if int(len(latencies_sorted) * percentile / 100) < len(latencies_sorted)
-            }
+    def generator_summary(self):
+        # How hard the load generator itself worked: event loop lag (ms), CPU
+        # as a fraction of one core, peak resident memory, and requests in
+        # flight against the intended concurrency
+        stats = self.generator
+        samples = stats["samples"]
+        return {
+            "processes": stats["processes"],
+            "samples": samples,
+            "loop_lag": {
+                "mean": (
+                    stats["loop_lag_total"] / stats["probes"] * 1000
+                    if stats["probes"]
+                    else 0
+                ),
+                "max": stats["loop_lag_max"] * 1000,
+            },
+            "cpu": {
+                "mean": stats["cpu_total"] / samples if samples else 0,
+                "max": stats["cpu_max"],
+            },
+            "rss_kb": stats["rss_kb_max"],
+            "in_flight": {
+                "mean": stats["in_flight_total"] / samples if samples else 0,
+                "max": stats["in_flight_max"],
+            },
+            "intended_concurrency": stats["concurrency_max"],
+            "saturated": stats["saturated_samples"] / samples if samples else 0,
+            "series": list(self.generator_samples),
+        }
+
+    def stream_summary(self):
+        # Long-lived connections of a streaming run: how many were held,
+        # how fast they were set up, how often they dropped, and messages
+        total_time = self.total_test_time
+        stats = self.streams
+        received = stats.get("messages_received", 0)
+        summary = {
+            "mode": self.stream_mode,
+            "target_connections": self.concurrency,
+            "opened": stats.get("connections", 0),
+            "peak_open": stats.get("peak_open", 0),
+            "setup_failures": stats.get("setup_failures", 0),
+            "drops": stats.get("drops", 0),
+            "reconnects": stats.get("reconnects", 0),
+            "open_at_end": stats.get("open_at_end", 0),
+            "messages_sent": self.sent_requests,
+            "skipped_messages": stats.get("skipped_messages", 0),
+            "messages_received": received,
+            "replies": self.completed_requests,
+            "messages_per_second": received / total_time if total_time else 0,
+        }
+        if self.setup_times:
+            summary["setup_times"], summary["setup_percentiles"] = describe(
+                self.setup_times, [50, 90, 99]
+            )
+        else:
+            summary["setup_times"], summary["setup_percentiles"] = {}, {}
+        return summary
+
+    def stage_summary(self):
+        # Compact per-stage view, enough to see where latency bends with load
+        total_time = self.total_test_time
+        summary = {
+            "name": self.stage_name,
+            "duration": total_time,
+            "target_rate": self.qps,
+            "concurrency": self.concurrency,
+            "achieved_rate": self.achieved_rate(),
+            "completed_requests": self.completed_requests,
+            "failed_requests": self.failed_requests,
+            "requests_per_second": (
+                self.completed_requests / total_time if total_time else 0
+            ),
+        }
+        if self.latencies:
+            summary["total_times"], summary["percentiles"] = describe(
+                self.latencies, [50, 90, 99]
+            )
+        else:
+            summary["total_times"], summary["percentiles"] = {}, {}
+        return summary
+
+    def endpoint_summary(self, all_requests):
+        # Compact per-endpoint view of a scenario run; `all_requests` is the
+        # number of requests sent across all endpoints
+        total_time = self.total_test_time
+        summary = {
+            "name": self.endpoint_name,
+            "share": self.sent_requests / all_requests if all_requests else 0,
+            "completed_requests": self.completed_requests,
+            "failed_requests": self.failed_requests,
+            "connection_errors": self.connection_errors,
+            "timeout_errors": self.timeout_errors,
+            "validation_errors": self.validation_errors,
+            "html_transferred": self.html_transferred,
+            "requests_per_second": (
+                self.completed_requests / total_time if total_time else 0
+            ),
+        }
+        if self.latencies:
+            summary["total_times"], summary["percentiles"] = describe(
+                self.latencies, [50, 90, 99]
+            )
+        else:
+            summary["total_times"], summary["percentiles"] = {}, {}
+        return summary
+
+    def agent_summary(self):
+        # Compact per-agent view of a distributed run
+        total_time = self.total_test_time
+        summary = {
+            "name": self.agent_name,
+            "status": self.agent_status,
+            "completed_requests": self.completed_requests,
+            "failed_requests": self.failed_requests,
+            "achieved_rate": self.achieved_rate(),
+            "requests_per_second": (
+                self.completed_requests / total_time if total_time else 0
+            ),
+            "clock_skew": self.clock_skew,
+        }
+        if self.latencies:
+            summary["total_times"], summary["percentiles"] = describe(
+                self.latencies, [50, 90, 99]
+            )
         else:
-            summary["connection_times"] = {}
-            summary["processing_times"] = {}
-            summary["waiting_times"] = {}
-            summary["total_times"] = {}
-            summary["percentiles"] = "N/A"
+            summary["total_times"], summary["percentiles"] = {}, {}
         return summary
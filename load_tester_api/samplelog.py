@@ -0,0 +1,491 @@
+import heapq
+import json
+import math
+import mmap
+import struct
+import sys
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from .errors import LoadTesterError
+from .histogram import LogHistogram
+from .stats import numpy
+
+# File layout: MAGIC, then a "<II" version and metadata length, the JSON
+# metadata padded to 8 bytes, then blocks of records. Each block is a "<4sI"
+# block header (BLOCK_MAGIC, record count) followed by one packed native-order
+# array per column, padded to 8 bytes. Columns are stored widest first so every
+# array starts aligned and can be viewed in place with memoryview.cast().
+MAGIC = b"LTSAMPLE"
+VERSION = 1
+BLOCK_MAGIC = b"BLK1"
+HEADER = struct.Struct("<II")
+BLOCK_HEADER = struct.Struct("<4sI")
+COLUMNS = (
+    ("timestamp", "d"),  # Epoch time the request was sent
+    ("latency", "f"),  # Seconds, from the intended send time
+    ("dns", "f"),
+    ("connect", "f"),
+    ("wait", "f"),
+    ("processing", "f"),
+    ("bytes", "I"),  # Response body bytes
+    ("status", "H"),  # 0 when the request failed without a response
+    ("endpoint", "H"),  # Index into the metadata's endpoint names
+    ("error", "B"),  # Index into ERROR_KINDS, 0 if there was no error
+    ("reused", "B"),  # 1 if sent on a reused connection
+)
+ERROR_KINDS = (
+    None,
+    "connection_errors",
+    "read_errors",
+    "write_errors",
+    "timeout_errors",
+    "invalid_url_errors",
+    "other_errors",
+)
+
+
+def padding(length):
+    return b"\0" * (-length % 8)
+
+
+class SampleLog:
+    # Append-only binary log of every request. Records go into per-column
+    # arrays (one C-level append per field); every `batch_size` records the
+    # arrays are packed into a block and written by a background thread, so
+    # the event loop never waits on the disk.
+    def __init__(self, path, batch_size=8192):
+        self.path = path
+        self.batch_size = batch_size
+        self.file = None
+        self.executor = None
+        self.columns = None
+        self.endpoints = {}
+        self.count = 0
+        self.records = 0
+
+    def open(self, metadata=None, endpoints=()):
+        # Endpoint names are fixed up front so records can store an index
+        self.endpoints = {name: index for index, name in enumerate(endpoints)}
+        metadata = dict(
+            metadata or {},
+            columns=[[name, code] for name, code in COLUMNS],
+            byteorder=sys.byteorder,
+            endpoints=list(endpoints),
+            errors=list(ERROR_KINDS),
+        )
+        text = json.dumps(metadata).encode("utf-8")
+        self.file = open(self.path, "wb")
+        self.file.write(MAGIC + HEADER.pack(VERSION, len(text)) + text + padding(len(text)))
+        self.executor = ThreadPoolExecutor(max_workers=1)  # Keeps blocks in order
+        self.reset()
+
+    def reset(self):
+        self.columns = [array(code) for _, code in COLUMNS]
+        self.count = 0
+
+    def record(
+        self,
+        timestamp,
+        latency,
+        dns=0.0,
+        connect=0.0,
+        wait=0.0,
+        processing=0.0,
+        nbytes=0,
+        status=0,
+        endpoint=None,
+        error=None,
+        reused=False,
+    ):
+        (
+            timestamps,
+            latencies,
+            dns_times,
+            connect_times,
+            wait_times,
+            processing_times,
+            sizes,
+            statuses,
+            endpoints,
+            errors,
+            reuses,
+        ) = self.columns
+        timestamps.append(timestamp)
+        latencies.append(latency)
+        dns_times.append(dns)
+        connect_times.append(connect)
+        wait_times.append(wait)
+        processing_times.append(processing)
+        sizes.append(min(nbytes, 0xFFFFFFFF))
+        statuses.append(status)
+        endpoints.append(self.endpoints.get(endpoint, 0))
+        errors.append(ERROR_KINDS.index(error) if error in ERROR_KINDS else 6)
+        reuses.append(1 if reused else 0)
+        self.count += 1
+        if self.count >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.count:
+            return
+        block = [BLOCK_HEADER.pack(BLOCK_MAGIC, self.count)]
+        length = BLOCK_HEADER.size
+        for column in self.columns:
+            data = column.tobytes()
+            block.append(data)
+            length += len(data)
+        block.append(padding(length))
+        self.records += self.count
+        self.executor.submit(self.file.write, b"".join(block))
+        self.reset()
+
+    def close(self):
+        if self.file is None:
+            return
+        self.flush()
+        self.executor.shutdown(wait=True)
+        self.file.close()
+        self.file = None
+
+
+class SampleFile:
+    # Read-only, memory-mapped view of a sample log. Blocks are exposed as
+    # typed memoryviews straight into the mapping: nothing is copied or
+    # turned into Python objects until a value is actually read.
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise LoadTesterError(f"Could not open sample log {path}: {e}")
+        if self.map[: len(MAGIC)] != MAGIC:
+            raise LoadTesterError(f"{path} is not a sample log")
+        version, length = HEADER.unpack_from(self.map, len(MAGIC))
+        if version != VERSION:
+            raise LoadTesterError(f"Unsupported sample log version {version} in {path}")
+        start = len(MAGIC) + HEADER.size
+        self.metadata = json.loads(self.map[start : start + length])
+        if self.metadata["byteorder"] != sys.byteorder:
+            raise LoadTesterError(f"{path} was written on a machine of different byte order")
+        self.data_start = start + length + len(padding(length))
+
+    def blocks(self):
+        # Yield {column name: memoryview} for every complete block. The views
+        # are released once the caller moves on, so the mapping can be closed.
+        with memoryview(self.map) as view:
+            position = self.data_start
+            while position + BLOCK_HEADER.size <= len(view):
+                magic, count = BLOCK_HEADER.unpack_from(view, position)
+                if magic != BLOCK_MAGIC:
+                    raise LoadTesterError(
+                        f"Corrupt block at byte {position} of {self.path}"
+                    )
+                offset = position + BLOCK_HEADER.size
+                columns = {}
+                try:
+                    for name, code in COLUMNS:
+                        size = count * struct.calcsize(code)
+                        if offset + size > len(view):
+                            return  # Truncated last block, e.g. from an interrupted run
+                        columns[name] = view[offset : offset + size].cast(code)
+                        offset += size
+                    yield count, columns
+                finally:
+                    for column in columns.values():
+                        column.release()
+                position = offset + len(padding(offset - position))
+
+    def close(self):
+        self.map.close()
+
+
+class Selection:
+    # The records an analysis selects, and what is collected from them. The
+    # filters are the analyze() arguments; scan_records() and
+    # scan_columns() fill in the counters the same way.
+    def __init__(
+        self,
+        first,
+        bucket=None,
+        status=None,
+        errors_only=False,
+        min_latency=None,
+        max_latency=None,
+        since=None,
+        until=None,
+        outliers=10,
+    ):
+        self.first = first  # Earliest timestamp; `since`/`until` count from it
+        self.bucket = bucket
+        self.statuses_wanted = set(status) if status else None
+        self.errors_only = errors_only
+        self.min_latency = min_latency
+        self.max_latency = max_latency
+        self.since = since
+        self.until = until
+        self.outliers = outliers
+        self.records = self.selected = self.failed = self.total_bytes = 0
+        self.last = -math.inf
+        self.statuses = {}
+        self.error_kinds = {}
+        self.buckets = {}  # Bucket index -> [requests, errors]
+        self.slowest = []  # Min-heap of (latency, timestamp, status, endpoint)
+        # Latencies of successful requests, overall and per bucket
+        self.overall = LogHistogram(3)
+        self.bucket_histograms = {}
+
+    def keep_slowest(self, latency, timestamp, code, name):
+        item = (latency, timestamp, code, name)
+        if len(self.slowest) < self.outliers:
+            heapq.heappush(self.slowest, item)
+        elif latency > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def bucket_histogram(self, key):
+        histogram = self.bucket_histograms.get(key)
+        if histogram is None:
+            histogram = self.bucket_histograms[key] = LogHistogram(2)
+        return histogram
+
+    def count_bucket(self, key, requests, errors):
+        entry = self.buckets.get(key)
+        if entry is None:
+            entry = self.buckets[key] = [0, 0]
+        entry[0] += requests
+        entry[1] += errors
+
+    def scan_records(self, columns, names, errors, endpoint_index):
+        # One block, record by record (without numpy)
+        first, bucket = self.first, self.bucket
+        for timestamp, latency, code, index, error, size in zip(
+            columns["timestamp"],
+            columns["latency"],
+            columns["status"],
+            columns["endpoint"],
+            columns["error"],
+            columns["bytes"],
+        ):
+            elapsed = timestamp - first
+            if (
+                (self.statuses_wanted is not None and code not in self.statuses_wanted)
+                or (endpoint_index is not None and index != endpoint_index)
+                or (self.errors_only and not error and code < 400)
+                or (self.min_latency is not None and latency < self.min_latency)
+                or (self.max_latency is not None and latency > self.max_latency)
+                or (self.since is not None and elapsed < self.since)
+                or (self.until is not None and elapsed >= self.until)
+            ):
+                continue
+            self.selected += 1
+            self.total_bytes += size
+            if timestamp > self.last:
+                self.last = timestamp
+            if error:
+                self.failed += 1
+                kind = errors[error]
+                self.error_kinds[kind] = self.error_kinds.get(kind, 0) + 1
+            else:
+                self.overall.record(latency)
+                self.statuses[code] = self.statuses.get(code, 0) + 1
+            if bucket:
+                key = int(elapsed // bucket)
+                self.count_bucket(key, 1, 1 if error or code >= 400 else 0)
+                if not error:
+                    self.bucket_histogram(key).record(latency)
+            if self.outliers:
+                self.keep_slowest(latency, timestamp, code, names[index] if names else None)
+
+    def scan_columns(self, count, columns, names, errors, endpoint_index):
+        # One block as numpy arrays viewed on the mapping: the filters are
+        # boolean masks, the counters array reductions, and the latencies go
+        # into the same histograms as scan_records() fills
+        timestamps = numpy.frombuffer(columns["timestamp"], dtype=numpy.float64)
+        latencies = numpy.frombuffer(columns["latency"], dtype=numpy.float32)
+        codes = numpy.frombuffer(columns["status"], dtype=numpy.uint16)
+        indices = numpy.frombuffer(columns["endpoint"], dtype=numpy.uint16)
+        kinds = numpy.frombuffer(columns["error"], dtype=numpy.uint8)
+        sizes = numpy.frombuffer(columns["bytes"], dtype=numpy.uint32)
+        elapsed = timestamps - self.first
+        exact = latencies.astype(numpy.float64)  # Compared like the record loop does
+        mask = numpy.ones(count, dtype=bool)
+        if self.statuses_wanted is not None:
+            mask &= numpy.isin(codes, list(self.statuses_wanted))
+        if endpoint_index is not None:
+            mask &= indices == endpoint_index
+        if self.errors_only:
+            mask &= (kinds != 0) | (codes >= 400)
+        if self.min_latency is not None:
+            mask &= exact >= self.min_latency
+        if self.max_latency is not None:
+            mask &= exact <= self.max_latency
+        if self.since is not None:
+            mask &= elapsed >= self.since
+        if self.until is not None:
+            mask &= elapsed < self.until
+        selected = numpy.flatnonzero(mask)
+        if not len(selected):
+            return
+        self.selected += len(selected)
+        self.total_bytes += int(sizes[selected].sum(dtype=numpy.uint64))
+        self.last = max(self.last, float(timestamps[selected].max()))
+        failed = kinds[selected] != 0
+        ok = selected[~failed]
+        self.failed += int(failed.sum())
+        for kind, number in enumerate(numpy.bincount(kinds[selected]).tolist()):
+            if kind and number:
+                self.error_kinds[errors[kind]] = self.error_kinds.get(errors[kind], 0) + number
+        values, counts = numpy.unique(codes[ok], return_counts=True)
+        for code, number in zip(values.tolist(), counts.tolist()):
+            self.statuses[code] = self.statuses.get(code, 0) + number
+        self.overall.record_array(latencies[ok])
+        if self.bucket:
+            keys = (elapsed[selected] // self.bucket).astype(numpy.int64)
+            bad = failed | (codes[selected] >= 400)
+            values, counts = numpy.unique(keys, return_counts=True)
+            bad_counts = dict(zip(*numpy.unique(keys[bad], return_counts=True)))
+            for key, number in zip(values.tolist(), counts.tolist()):
+                self.count_bucket(key, number, int(bad_counts.get(key, 0)))
+            # Successful latencies grouped by bucket, one histogram update each
+            keys = keys[~failed]
+            order = numpy.argsort(keys, kind="stable")
+            values, starts = numpy.unique(keys[order], return_index=True)
+            groups = numpy.split(latencies[ok][order], starts[1:])
+            for key, group in zip(values.tolist(), groups):
+                self.bucket_histogram(key).record_array(group)
+        if self.outliers:
+            # Only a block's own slowest can make the overall list
+            candidates = selected
+            if len(candidates) > self.outliers:
+                top = numpy.argpartition(latencies[candidates], -self.outliers)
+                candidates = candidates[top[-self.outliers :]]
+            for index in candidates.tolist():
+                self.keep_slowest(
+                    float(latencies[index]),
+                    float(timestamps[index]),
+                    int(codes[index]),
+                    names[int(indices[index])] if names else None,
+                )
+
+    def latency_stats(self, percentiles):
+        # (min, mean, max, stdev, {percentile: value}) of the successful
+        # latencies in seconds, and {bucket: (p50, p99)}
+        overall = self.overall
+        buckets = {}
+        for key, histogram in self.bucket_histograms.items():
+            values = histogram.percentiles([50, 99])
+            buckets[key] = (values.get(50, 0), values.get(99, 0))
+        return (
+            overall.min if overall.count else None,
+            overall.mean(),
+            overall.max if overall.count else None,
+            overall.stdev(),
+            overall.percentiles(percentiles),
+            buckets,
+        )
+
+
+def analyze(
+    paths,
+    percentiles=(50, 90, 95, 99, 99.9),
+    bucket=None,
+    status=None,
+    endpoint=None,
+    errors_only=False,
+    min_latency=None,
+    max_latency=None,
+    since=None,
+    until=None,
+    outliers=10,
+):
+    # Recompute a summary from one or more sample logs, streaming over the
+    # mapped blocks. Filters select records; `bucket` (seconds) adds a
+    # time-sliced view; `outliers` lists the slowest selected requests.
+    # `since`/`until` are seconds from the first record. Latencies go into
+    # histograms, so memory stays constant however long the run. With numpy
+    # each block is filtered and counted as whole arrays; without it records
+    # are read one by one, with the same results.
+    files = [SampleFile(path) for path in paths]
+    try:
+        # Records are in completion order, so a slow early request can sit
+        # in any block: the start is the minimum over all of them
+        first = math.inf
+        for sample_file in files:
+            for count, columns in sample_file.blocks():
+                if count:
+                    first = min(first, min(columns["timestamp"]))
+        selection = Selection(
+            first,
+            bucket=bucket,
+            status=status,
+            errors_only=errors_only,
+            min_latency=min_latency,
+            max_latency=max_latency,
+            since=since,
+            until=until,
+            outliers=outliers,
+        )
+        for sample_file in files:
+            names = sample_file.metadata["endpoints"]
+            errors = sample_file.metadata["errors"]
+            endpoint_index = None
+            if endpoint is not None:
+                if endpoint not in names:
+                    continue
+                endpoint_index = names.index(endpoint)
+            for count, columns in sample_file.blocks():
+                selection.records += count
+                if numpy is not None:
+                    selection.scan_columns(count, columns, names, errors, endpoint_index)
+                else:
+                    selection.scan_records(columns, names, errors, endpoint_index)
+    finally:
+        for sample_file in files:
+            sample_file.close()
+
+    low, mean, high, stdev, values, bucket_values = selection.latency_stats(percentiles)
+    report = {
+        "files": list(paths),
+        "records": selection.records,
+        "selected": selection.selected,
+        "failed_requests": selection.failed,
+        "error_kinds": selection.error_kinds,
+        "statuses": {
+            str(code): count for code, count in sorted(selection.statuses.items())
+        },
+        "bytes": selection.total_bytes,
+        "duration": selection.last - first if selection.selected else 0,
+        "latency_ms": {
+            "min": low * 1000 if low is not None else None,
+            "mean": mean * 1000,
+            "max": high * 1000 if high is not None else None,
+            "stdev": stdev * 1000,
+        },
+        "percentiles_ms": {f"{p:g}": values[p] * 1000 for p in percentiles if p in values},
+    }
+    if bucket:
+        report["buckets"] = []
+        for key in sorted(selection.buckets):
+            requests, bucket_errors = selection.buckets[key]
+            p50, p99 = bucket_values.get(key, (0, 0))
+            report["buckets"].append(
+                {
+                    "start": key * bucket,
+                    "requests": requests,
+                    "requests_per_second": requests / bucket,
+                    "errors": bucket_errors,
+                    "p50_ms": p50 * 1000,
+                    "p99_ms": p99 * 1000,
+                }
+            )
+    if outliers:
+        report["outliers"] = [
+            {
+                "elapsed": timestamp - first,
+                "latency_ms": latency * 1000,
+                "status": code,
+                "endpoint": name,
+            }
+            for latency, timestamp, code, name in sorted(selection.slowest, reverse=True)
+        ]
+    return report
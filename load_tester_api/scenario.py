@@ -0,0 +1,203 @@
+import bisect
+import csv
+import json
+import os
+import random
+from string import Template
+from urllib.parse import quote, urljoin, urlparse
+from .errors import LoadTesterError
+from .checks import ResponseCheck
+
+
+def load_feed(path):
+    # Rows of variables for request templates, from a CSV file with a header
+    # line, a JSONL file with one object per line, or a JSON list of objects
+    try:
+        with open(path, newline="") as f:
+            if path.endswith(".csv"):
+                rows = list(csv.DictReader(f))
+            elif path.endswith(".jsonl"):
+                rows = [json.loads(line) for line in f if line.strip()]
+            else:
+                rows = json.load(f)
+    except (OSError, ValueError) as e:
+        raise LoadTesterError(f"Could not read data feed {path}: {e}")
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise LoadTesterError(f"Data feed {path} must contain objects with named fields")
+    if not rows:
+        raise LoadTesterError(f"Data feed {path} is empty")
+    return rows
+
+
+def substitute(text, row, name, quote_values=False):
+    # Fill ${variable} placeholders from a feed row. Values put into the URL
+    # are percent-encoded so they cannot change its structure.
+    if quote_values:
+        row = {key: quote(str(value), safe="") for key, value in row.items()}
+    try:
+        return Template(text).substitute(row)
+    except KeyError as e:
+        raise LoadTesterError(f"Request {name}: no value for variable {e}")
+    except ValueError as e:
+        raise LoadTesterError(f"Request {name}: invalid placeholder: {e}")
+
+
+class PreparedRequest:
+    # A fully rendered request, built once before the test starts. Engines may
+    # attach their own wire format in `raw` (e.g. the raw engine's bytes);
+    # `check` is the template's compiled ResponseCheck, if it has one.
+    __slots__ = ("name", "method", "url", "headers", "body", "raw", "check")
+
+    def __init__(self, name, method, url, headers, body, check=None):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.raw = None
+        self.check = check
+
+
+class RequestTemplate:
+    # One weighted entry of a scenario. `path` (absolute, or relative to the
+    # scenario's base URL), header values and the body may contain ${variable}
+    # placeholders filled from the rows of the named data feed. `check` is an
+    # optional ResponseCheck (or its dict form) for this request's responses.
+    def __init__(
+        self,
+        name,
+        path,
+        method="GET",
+        headers=None,
+        body=None,
+        weight=1,
+        feed=None,
+        check=None,
+    ):
+        if weight <= 0:
+            raise LoadTesterError(f"Request {name}: weight must be positive, got: {weight}")
+        self.name = name
+        self.path = path
+        self.method = method.upper()
+        self.headers = dict(headers or {})
+        if isinstance(body, (dict, list)):
+            # JSON bodies are written as objects in the scenario file
+            body = json.dumps(body)
+            self.headers.setdefault("Content-Type", "application/json")
+        self.body = body
+        self.weight = weight
+        self.feed = feed
+        if isinstance(check, dict):
+            check = ResponseCheck.from_dict(check)
+        self.check = check
+
+    @classmethod
+    def from_dict(cls, data, index):
+        if "path" not in data and "url" not in data:
+            raise LoadTesterError(f"Request {index + 1} of the scenario has no path")
+        return cls(
+            data.get("name") or f"request {index + 1}",
+            data.get("path") or data.get("url"),
+            method=data.get("method", "GET"),
+            headers=data.get("headers"),
+            body=data.get("body"),
+            weight=data.get("weight", 1),
+            feed=data.get("feed"),
+            check=data.get("check"),
+        )
+
+    def render(self, base_url, row):
+        url = urljoin(base_url or "", substitute(self.path, row, self.name, True))
+        headers = {
+            key: substitute(str(value), row, self.name)
+            for key, value in self.headers.items()
+        }
+        body = None
+        if self.body is not None:
+            body = substitute(self.body, row, self.name).encode("utf-8")
+        return PreparedRequest(self.name, self.method, url, headers, body, self.check)
+
+
+class Scenario:
+    # A weighted mix of request templates, e.g. 70% search, 20% item page and
+    # 10% add-to-cart. Every template is rendered against every row of its feed
+    # up front, so picking a request during the test is a weighted draw and a
+    # list lookup; rows are used round-robin per template.
+    def __init__(self, templates, base_url=None, feeds=None, seed=None):
+        if not templates:
+            raise LoadTesterError("A scenario needs at least one request")
+        names = [template.name for template in templates]
+        if len(set(names)) != len(names):
+            raise LoadTesterError("Scenario request names must be unique")
+        feeds = feeds or {}
+        self.templates = templates
+        self.base_url = base_url
+        self.prepared = []  # Rendered requests, one list per template
+        for template in templates:
+            if template.feed is None:
+                rows = [{}]
+            elif template.feed in feeds:
+                rows = feeds[template.feed]
+            else:
+                raise LoadTesterError(
+                    f"Request {template.name}: unknown data feed {template.feed}"
+                )
+            prepared = [template.render(base_url, row) for row in rows]
+            for request in prepared:
+                parsed = urlparse(request.url)
+                if not parsed.scheme or not parsed.netloc:
+                    raise LoadTesterError(
+                        f"Request {template.name}: {request.url} is not an absolute URL"
+                    )
+            self.prepared.append(prepared)
+        self.positions = [0] * len(templates)  # Next row per template
+        self.cumulative_weights = []
+        total = 0
+        for template in templates:
+            total += template.weight
+            self.cumulative_weights.append(total)
+        self.total_weight = total
+        self.random = random.Random(seed)
+        self.url = self.prepared[0][0].url  # Representative URL for reports
+
+    @classmethod
+    def from_dict(cls, data, directory=""):
+        # Feed paths are relative to `directory` (the scenario file's folder)
+        feeds = {
+            name: load_feed(os.path.join(directory, path))
+            for name, path in data.get("feeds", {}).items()
+        }
+        return cls(
+            [
+                RequestTemplate.from_dict(request, index)
+                for index, request in enumerate(data.get("requests", []))
+            ],
+            base_url=data.get("base_url"),
+            feeds=feeds,
+            seed=data.get("seed"),
+        )
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise LoadTesterError(f"Could not read scenario {path}: {e}")
+        return cls.from_dict(data, os.path.dirname(path))
+
+    def requests(self):
+        # Every prepared request, e.g. for an engine to precompile
+        for prepared in self.prepared:
+            yield from prepared
+
+    def next_request(self):
+        # Weighted pick of a template, then its next prepared request
+        index = bisect.bisect_right(
+            self.cumulative_weights, self.random.random() * self.total_weight
+        )
+        index = min(index, len(self.prepared) - 1)
+        prepared = self.prepared[index]
+        position = self.positions[index]
+        self.positions[index] = position + 1 if position + 1 < len(prepared) else 0
+        return prepared[position]
@@ -0,0 +1,85 @@
+import random
+from .errors import LoadTesterError
+
+
+class ArrivalSchedule:
+    # Base class for open-loop arrival processes. A schedule yields the gap (in
+    # seconds) between consecutive intended send times; the caller accumulates
+    # the gaps into absolute deadlines so sleep error never builds up.
+    mode = None
+
+    def __init__(self, rate):
+        if not rate or rate <= 0:
+            raise LoadTesterError(f"Arrival rate must be positive, got: {rate}")
+        self.rate = rate  # Read on every step so the rate can be changed live
+
+    def intervals(self):
+        raise NotImplementedError
+
+    def offsets(self):
+        # Absolute offsets from the start of the test for every arrival. Each gap
+        # is drawn only when the next arrival is requested, so a rate change
+        # takes effect from the following arrival.
+        offset = 0.0
+        intervals = self.intervals()
+        while True:
+            yield offset
+            offset += next(intervals)
+
+
+class ConstantArrivals(ArrivalSchedule):
+    # Evenly spaced arrivals at exactly `rate` requests per second
+    mode = "constant"
+
+    def intervals(self):
+        while True:
+            yield 1.0 / self.rate
+
+
+class PoissonArrivals(ArrivalSchedule):
+    # Exponentially distributed gaps, i.e. a Poisson arrival process
+    mode = "poisson"
+
+    def __init__(self, rate, seed=None):
+        super().__init__(rate)
+        self.random = random.Random(seed)
+
+    def intervals(self):
+        expovariate = self.random.expovariate
+        while True:
+            yield expovariate(self.rate)
+
+
+class BurstArrivals(ArrivalSchedule):
+    # Groups of `burst_size` simultaneous arrivals, spaced so the mean rate is `rate`
+    mode = "burst"
+
+    def __init__(self, rate, burst_size=10):
+        super().__init__(rate)
+        if burst_size < 1:
+            raise LoadTesterError(f"Burst size must be at least 1, got: {burst_size}")
+        self.burst_size = burst_size
+
+    def intervals(self):
+        while True:
+            for _ in range(self.burst_size - 1):
+                yield 0.0
+            yield self.burst_size / self.rate
+
+
+ARRIVAL_MODES = {
+    ConstantArrivals.mode: ConstantArrivals,
+    PoissonArrivals.mode: PoissonArrivals,
+    BurstArrivals.mode: BurstArrivals,
+}
+
+
+def make_schedule(mode, rate, **options):
+    # Build an arrival schedule by name ("constant", "poisson" or "burst")
+    try:
+        schedule_class = ARRIVAL_MODES[mode]
+    except KeyError:
+        raise LoadTesterError(
+            f"Unknown arrival mode: {mode} (expected one of {', '.join(ARRIVAL_MODES)})"
+        )
+    return schedule_class(rate, **options)
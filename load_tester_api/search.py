@@ -0,0 +1,245 @@
+import asyncio
+import math
+import re
+from .load_tester import LoadTester
+from .engines import make_engine
+from .errors import LoadTesterError
+from .result import describe
+from .utils import validate_url
+
+SEARCH_MODES = ("rate", "concurrency")
+SLO_TERM = re.compile(
+    r"^\s*(?:p(?P<percentile>\d+(?:\.\d+)?)\s*<\s*(?P<latency>[\d.]+)\s*(?P<unit>ms|s)?"
+    r"|errors?\s*<\s*(?P<errors>[\d.]+)\s*(?P<percent>%)?)\s*$"
+)
+
+
+class SLO:
+    # A pass/fail objective for one trial: a latency percentile bound and a
+    # maximum error rate, e.g. p99 < 200 ms and errors < 0.1%
+    def __init__(self, latency_ms=None, percentile=99, max_error_rate=0.001):
+        if latency_ms is None and max_error_rate is None:
+            raise LoadTesterError("An SLO needs a latency bound and/or an error rate")
+        if not 0 < percentile <= 100:
+            raise LoadTesterError(f"SLO percentile must be in (0, 100], got: {percentile}")
+        self.latency_ms = latency_ms
+        self.percentile = percentile
+        self.max_error_rate = max_error_rate
+
+    @classmethod
+    def parse(cls, text):
+        # Parse "p99<200ms,errors<0.1%" (either term may be left out)
+        options = {"max_error_rate": None}
+        for term in text.split(","):
+            match = SLO_TERM.match(term)
+            if not match:
+                raise LoadTesterError(f"Invalid SLO term: {term.strip()}")
+            if match.group("latency"):
+                scale = 1000 if match.group("unit") == "s" else 1
+                options["latency_ms"] = float(match.group("latency")) * scale
+                options["percentile"] = float(match.group("percentile"))
+            else:
+                rate = float(match.group("errors"))
+                options["max_error_rate"] = rate / 100 if match.group("percent") else rate
+        return cls(**options)
+
+    def describe(self):
+        terms = []
+        if self.latency_ms is not None:
+            terms.append(f"p{self.percentile:g} < {self.latency_ms:g} ms")
+        if self.max_error_rate is not None:
+            terms.append(f"errors < {self.max_error_rate:.3%}")
+        return " and ".join(terms)
+
+    def check(self, trial):
+        # Reason the trial breaks the objective, or None if it meets it
+        if self.max_error_rate is not None and trial["error_rate"] > self.max_error_rate:
+            return f"error rate {trial['error_rate']:.3%} over {self.max_error_rate:.3%}"
+        if self.latency_ms is not None:
+            latency = trial["latency_ms"]
+            if latency is None:
+                return "no successful responses"
+            if latency > self.latency_ms:
+                return f"p{self.percentile:g} {latency:.1f} ms over {self.latency_ms:g} ms"
+        return None
+
+
+class CapacitySearch:
+    # Finds the highest load that still meets an SLO by running short trials:
+    # the load grows geometrically from `start` until a trial fails (or `limit`
+    # is reached), then the gap between the last passing and the first failing
+    # load is bisected until it is within `tolerance`. `mode` selects whether
+    # the load is an open-loop request rate or a closed-loop concurrency.
+    # One engine stays open across all trials so every trial starts warm.
+    def __init__(
+        self,
+        url,
+        slo,
+        mode="rate",
+        start=10,
+        limit=100000,
+        growth=2.0,
+        tolerance=0.05,
+        trial_duration=10.0,
+        cooldown=1.0,
+        concurrency=100,
+        max_trials=30,
+        min_rate_ratio=0.95,
+        engine="aiohttp",
+        pipeline_depth=1,
+        preflight=True,
+        **options,
+    ):
+        if mode not in SEARCH_MODES:
+            raise LoadTesterError(
+                f"Unknown search mode: {mode} (expected one of {', '.join(SEARCH_MODES)})"
+            )
+        if start <= 0 or limit < start:
+            raise LoadTesterError(f"Invalid search range: {start} to {limit}")
+        if growth <= 1:
+            raise LoadTesterError(f"Search growth factor must be above 1, got: {growth}")
+        for name in ("qps", "duration", "profile", "total_requests", "live"):
+            if options.get(name) is not None:
+                raise LoadTesterError(f"The capacity search sets {name} itself")
+        self.url = url
+        self.slo = slo
+        self.mode = mode
+        self.start = start
+        self.limit = limit
+        self.growth = growth
+        self.tolerance = tolerance
+        self.trial_duration = trial_duration
+        self.cooldown = cooldown  # Pause between trials so queues drain
+        self.concurrency = concurrency  # Connection cap in rate mode
+        self.max_trials = max_trials
+        # In rate mode a trial also fails when the achieved rate falls short
+        # of the target, i.e. the load was not actually sustained
+        self.min_rate_ratio = min_rate_ratio
+        self.preflight = preflight
+        self.options = options
+        self.engine = make_engine(engine, pipeline_depth)
+        self.trials = []
+        self.best = None  # Highest passing trial
+
+    def make_tester(self, load):
+        if self.mode == "rate":
+            concurrency, qps = self.concurrency, load
+        else:
+            concurrency, qps = int(load), None
+        return LoadTester(
+            self.url,
+            concurrency=concurrency,
+            qps=qps,
+            duration=self.trial_duration,
+            preflight=False,
+            engine=self.engine,
+            **self.options,
+        )
+
+    async def run_trial(self, load):
+        tester = self.make_tester(load)
+        await tester.run_test()
+        results = tester.get_results()
+        sent = results.sent_requests
+        latency = None
+        if results.latencies:
+            percentile = self.slo.percentile
+            _, values = describe(results.latencies, [percentile])
+            latency = values.get(f"{percentile:g}")  # Keyed as describe() formats them
+        trial = {
+            "load": load,
+            "mode": self.mode,
+            "achieved_rate": results.achieved_rate(),
+            "requests_per_second": (
+                results.completed_requests / results.total_test_time
+                if results.total_test_time
+                else 0
+            ),
+            "completed_requests": results.completed_requests,
+            "failed_requests": results.failed_requests,
+            "error_rate": results.failed_requests / sent if sent else 1.0,
+            "latency_ms": latency,
+            "percentiles": describe(results.latencies, [50, 90, 99])[1]
+            if results.latencies
+            else {},
+        }
+        reason = self.slo.check(trial)
+        if (
+            reason is None
+            and self.mode == "rate"
+            and trial["achieved_rate"] < load * self.min_rate_ratio
+        ):
+            reason = f"achieved {trial['achieved_rate']:.1f} req/s of {load:g} req/s"
+        trial["passed"] = reason is None
+        trial["reason"] = reason
+        self.trials.append(trial)
+        if trial["passed"] and (self.best is None or load > self.best["load"]):
+            self.best = trial
+        return trial["passed"]
+
+    def next_load(self, load):
+        if self.mode == "concurrency":
+            return min(self.limit, max(load + 1, math.ceil(load * self.growth)))
+        return min(self.limit, load * self.growth)
+
+    def converged(self, low, high):
+        if self.mode == "concurrency":
+            return high - low <= 1
+        return (high - low) <= low * self.tolerance
+
+    def midpoint(self, low, high):
+        if self.mode == "concurrency":
+            return (low + high) // 2
+        return (low + high) / 2
+
+    async def trial(self, load):
+        if self.trials and self.cooldown:
+            await asyncio.sleep(self.cooldown)
+        return await self.run_trial(load)
+
+    async def run(self):
+        validate_url(self.url)
+        max_concurrency = (
+            self.concurrency if self.mode == "rate" else math.ceil(self.limit)
+        )
+        await self.engine.open(self.make_tester(self.start), max_concurrency)
+        try:
+            if self.preflight:
+                # Through the open engine, so the first trial starts warm
+                await self.make_tester(self.start).check_url()
+            # Step up until a trial fails or the limit passes
+            low, high = None, None
+            load = self.start
+            while len(self.trials) < self.max_trials:
+                if await self.trial(load):
+                    low = load
+                    if load >= self.limit:
+                        break
+                    load = self.next_load(load)
+                else:
+                    high = load
+                    break
+            # Then bisect between the last pass and the first failure
+            while (
+                low is not None
+                and high is not None
+                and not self.converged(low, high)
+                and len(self.trials) < self.max_trials
+            ):
+                load = self.midpoint(low, high)
+                if await self.trial(load):
+                    low = load
+                else:
+                    high = load
+        finally:
+            await self.engine.close()
+        return self.report()
+
+    def report(self):
+        return {
+            "slo": self.slo.describe(),
+            "mode": self.mode,
+            "max_passing_load": self.best["load"] if self.best else None,
+            "max_passing_trial": self.best,
+            "trials": self.trials,
+        }
@@ -0,0 +1,129 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .load_tester import LoadTester
+from .errors import LoadTesterError, URLCheckError
+from .scheduler import ArrivalSchedule
+from .monitor import PROFILER_OUTPUTS
+from .utils import validate_url
+
+
+def split_evenly(total, parts):
+    # Split an integer into `parts` near-equal integers that add up to `total`
+    base, remainder = divmod(total, parts)
+    return [base + (1 if index < remainder else 0) for index in range(parts)]
+
+
+def run_shard(options):
+    # Entry point for a worker process: run one LoadTester and return its result
+    tester = LoadTester(**options)
+    asyncio.run(tester.run_test())
+    return tester.get_results()
+
+
+class ShardedLoadTester:
+    # Runs a load test across a pool of worker processes, each driving its own
+    # LoadTester and event loop, and merges their results into one TestResult.
+    # Accepts the same options as LoadTester plus the number of workers.
+
+    def __init__(
+        self,
+        url,
+        workers=None,
+        concurrency=10,
+        total_requests=100,
+        qps=None,
+        start_delay=1.0,
+        **options,
+    ):
+        if isinstance(options.get("arrival"), ArrivalSchedule):
+            raise LoadTesterError(
+                "Sharded runs need an arrival mode name, not a schedule instance"
+            )
+        if options.get("live") is not None:
+            raise LoadTesterError("Live metrics are not supported with multiple workers")
+        if options.get("sample_log") is not None and not isinstance(
+            options["sample_log"], str
+        ):
+            raise LoadTesterError("Sharded runs need a sample log path, not a SampleLog")
+        self.url = url
+        self.concurrency = concurrency
+        self.total_requests = total_requests
+        self.qps = qps
+        self.options = options
+        # Every worker needs at least one request and one connection
+        self.workers = max(1, min(workers or os.cpu_count() or 1, concurrency))
+        if options.get("duration") is None and options.get("profile") is None:
+            self.workers = min(self.workers, total_requests)
+        self.start_delay = start_delay  # Head start for worker processes to spawn
+        # The coordinating tester owns the merged result and its metadata
+        self.tester = LoadTester(
+            url,
+            concurrency=concurrency,
+            total_requests=total_requests,
+            qps=qps,
+            **options,
+        )
+        self.results = self.tester.get_results()
+        self.logger = self.tester.logger
+
+    def shard_options(self, start_at):
+        # Per-worker LoadTester options with requests, concurrency and rate split
+        requests = split_evenly(self.total_requests, self.workers)
+        concurrency = split_evenly(self.concurrency, self.workers)
+        options = dict(self.options)
+        if options.get("profile"):
+            options["profile"] = options["profile"].scaled(1 / self.workers)
+        sample_log = options.pop("sample_log", None)
+        profiler_output = options.pop("profiler_output", None)
+        if options.get("profiler"):
+            profiler_output = profiler_output or PROFILER_OUTPUTS[options["profiler"]]
+        return [
+            dict(
+                options,
+                # One sample log per worker; `analyze` reads them together
+                sample_log=f"{sample_log}.{index}" if sample_log else None,
+                profiler_output=f"{profiler_output}.{index}" if profiler_output else None,
+                url=self.url,
+                concurrency=concurrency[index],
+                total_requests=requests[index],
+                qps=self.qps / self.workers if self.qps else None,
+                preflight=False,  # Checked once by the coordinator
+                start_at=start_at,
+            )
+            for index in range(self.workers)
+        ]
+
+    async def run_test(self):
+        try:
+            validate_url(self.url)  # Validate the URL
+            if self.tester.preflight:
+                await self.tester.check_url()  # Check if the URL is reachable
+        except URLCheckError:
+            self.results.mark_unreachable()
+            self.logger.error("Invalid or unresponsive URL. Exiting...")
+            return
+
+        # Spawned (not forked) workers, so no event loop state leaks into them;
+        # all workers wait for a common start time to begin sending together
+        loop = asyncio.get_running_loop()
+        start_at = time.time() + self.start_delay
+        with ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            shard_results = await asyncio.gather(
+                *(
+                    loop.run_in_executor(executor, run_shard, options)
+                    for options in self.shard_options(start_at)
+                )
+            )
+        for shard_result in shard_results:
+            self.results.merge(shard_result)
+        if self.tester.duration is not None:
+            self.results.total_requests = self.results.sent_requests
+
+    def get_results(self):
+        # Return the merged test results
+        return self.results
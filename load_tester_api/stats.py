@@ -0,0 +1,101 @@
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+
+try:
+    import numpy
+except ImportError:  # Optional: summaries fall back to one sort per series
+    numpy = None
+
+# Upper bounds (seconds) of the exported latency histogram: a 1-2-5 series
+# from 0.1 ms to 5000 s, so every recordable value has a bucket
+HISTOGRAM_EDGES = [
+    mantissa * 10.0**exponent for exponent in range(-4, 4) for mantissa in (1, 2, 5)
+]
+
+
+def as_samples(series):
+    # Raw samples as a typed array: array("d") as stored by TestResult, or
+    # any other sequence of floats
+    if isinstance(series, array) and series.typecode == "d":
+        return series
+    return array("d", series)
+
+
+def interpolate(ordered, percentile):
+    # Linearly interpolated percentile of sorted samples (numpy's default,
+    # "linear"): p0 is the minimum and p100 the maximum
+    rank = (len(ordered) - 1) * percentile / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def sample_stats(series, percentiles=(), histogram=False):
+    # min, mean, max, sample stdev and interpolated percentiles (seconds) of
+    # raw samples, plus the exported histogram if asked. With numpy the array
+    # is viewed without copying, and one partial selection (np.percentile
+    # partitions around the ranks it needs, it does not sort) yields the
+    # median, percentiles and extremes at once. Without numpy the samples are
+    # sorted once and everything is read off the sorted copy.
+    samples = as_samples(series)
+    count = len(samples)
+    wanted = sorted({0, 50, 100, *percentiles})
+    last = len(HISTOGRAM_EDGES) - 1
+    if numpy is not None:
+        data = numpy.frombuffer(samples, dtype=numpy.float64)
+        values = dict(zip(wanted, numpy.percentile(data, wanted).tolist()))
+        average = float(data.mean())
+        deviation = float(data.std(ddof=1)) if count > 1 else 0.0
+        if histogram:
+            indices = numpy.searchsorted(HISTOGRAM_EDGES, data, side="left")
+            counts = numpy.bincount(
+                numpy.minimum(indices, last), minlength=len(HISTOGRAM_EDGES)
+            ).tolist()
+    else:
+        ordered = sorted(samples)
+        values = {percentile: interpolate(ordered, percentile) for percentile in wanted}
+        average = math.fsum(ordered) / count
+        deviation = (
+            math.sqrt(math.fsum((value - average) ** 2 for value in ordered) / (count - 1))
+            if count > 1
+            else 0.0
+        )
+        if histogram:
+            # Samples up to each edge, differenced into per-bucket counts
+            below = [bisect_right(ordered, edge) for edge in HISTOGRAM_EDGES[:last]]
+            below.append(count)
+            counts = [high - low for low, high in zip([0, *below], below)]
+    stats = {
+        "min": values[0],
+        "mean": average,
+        "median": values[50],
+        "max": values[100],
+        "stdev": deviation,
+        "percentiles": values,
+    }
+    if histogram:
+        stats["histogram"] = export_buckets(counts)
+    return stats
+
+
+def export_buckets(counts):
+    # Exported histogram: [{"le": upper bound in ms, "count": samples}] per
+    # non-empty bucket of HISTOGRAM_EDGES
+    return [
+        {"le": round(edge * 1000, 6), "count": count}
+        for edge, count in zip(HISTOGRAM_EDGES, counts)
+        if count
+    ]
+
+
+def export_histogram(histogram):
+    # The exported histogram of a LogHistogram, each of its buckets counted
+    # at its representative value; values above the last edge land in the
+    # last bucket
+    counts = [0] * len(HISTOGRAM_EDGES)
+    last = len(HISTOGRAM_EDGES) - 1
+    for index, bucket in histogram.buckets():
+        value = min(max(histogram._value_at(index), histogram.min), histogram.max)
+        counts[min(bisect_left(HISTOGRAM_EDGES, value), last)] += bucket
+    return export_buckets(counts)
@@ -0,0 +1,367 @@
+import aiohttp
+import asyncio
+import collections
+import logging
+import time
+from urllib.parse import urlparse
+from .result import TestResult
+from .errors import LoadTesterError
+from .utils import validate_url
+from .scheduler import make_schedule
+from .errorlog import ErrorLog
+from .monitor import GeneratorMonitor
+
+try:
+    import resource
+except ImportError:  # Not on Windows: the open-file limit is left as it is
+    resource = None
+
+STREAM_MODES = ("websocket", "stream")
+DRAIN_INTERVAL = 0.01  # How often the end of a run checks for missing replies
+
+
+def raise_file_limit(needed):
+    # Lift the soft open-file limit towards the hard one, so tens of
+    # thousands of sockets fit in one process; returns the limit in effect
+    if resource is None:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY or soft >= needed:
+        return soft
+    target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    except (ValueError, OSError):
+        return soft
+    return target
+
+
+class Stream:
+    # One open long-lived connection: the WebSocket or streaming response,
+    # its place in the open list, and the intended send times of messages
+    # still waiting for their reply
+    __slots__ = ("socket", "position", "pending")
+
+    def __init__(self, socket):
+        self.socket = socket
+        self.position = None
+        self.pending = collections.deque()
+
+
+class StreamTester:
+    # Load test of long-lived connections. `connections` WebSockets, or
+    # streaming HTTP responses (server-sent events or any chunked body) in
+    # "stream" mode, are opened at `connect_rate` per second (None: all at
+    # once) and held for `duration` seconds. In websocket mode one sender
+    # sends `message` at `rate` messages per second, round robin across the
+    # open connections; with `reply` each message is expected to be answered
+    # by one message, in order, and the round trip from the intended send time
+    # is its latency. Stream mode only receives. A connection that drops is
+    # reopened after `reconnect_delay` seconds (None leaves it closed).
+    # Each connection is one task waiting on its socket, with no timers of
+    # its own, so tens of thousands of idle connections fit in one process.
+    def __init__(
+        self,
+        url,
+        connections=100,
+        mode="websocket",
+        rate=None,
+        message="ping",
+        reply=True,
+        duration=10,
+        connect_rate=None,
+        reconnect_delay=1.0,
+        timeout=5.0,
+        headers=None,
+        arrival="constant",
+        burst_size=10,
+        histogram=False,
+        histogram_precision=3,
+        percentiles=None,
+        log_interval=5.0,
+        monitor_interval=0.5,
+    ):
+        if mode not in STREAM_MODES:
+            raise LoadTesterError(
+                f"Unknown stream mode: {mode} (expected one of {', '.join(STREAM_MODES)})"
+            )
+        if rate and mode != "websocket":
+            raise LoadTesterError("Stream mode only receives; a message rate needs websocket mode")
+        if connections < 1:
+            raise LoadTesterError(f"Connections must be at least 1, got: {connections}")
+        self.url = url
+        self.connections = connections
+        self.mode = mode
+        self.rate = rate  # Messages per second across all connections
+        self.message = message
+        self.reply = reply  # Whether every message is answered by one message
+        self.duration = duration
+        self.connect_rate = connect_rate  # New connections per second at the start
+        self.reconnect_delay = reconnect_delay
+        self.timeout = timeout  # Connection setup limit, and wait for the last replies
+        self.headers = headers if headers else {}
+        self.arrival = arrival
+        self.burst_size = burst_size
+        self.active_concurrency = connections  # Read by the generator monitor
+        self.session = None
+        self.open = []  # Open streams, in the order messages are sent to them
+        self.cursor = 0  # Round-robin position of the sender
+        self.running = False
+        self.end_time = None
+        self.logger = logging.getLogger("LoadTester")
+        self.logger.setLevel(logging.INFO)
+        self.monitor = (
+            GeneratorMonitor(monitor_interval, logger=self.logger)
+            if monitor_interval is not None
+            else None
+        )
+        self.error_log = ErrorLog(self.logger, log_interval)
+        self.results = TestResult(
+            0,
+            histogram=histogram,
+            precision=histogram_precision,
+            percentiles=percentiles,
+        )
+        parsed_url = urlparse(url)
+        self.results.server_hostname = parsed_url.hostname
+        self.results.server_port = parsed_url.port or (
+            443 if parsed_url.scheme in ("https", "wss") else 80
+        )
+        self.results.document_path = parsed_url.path
+        self.results.payload = message if rate else None
+        self.results.concurrency = connections
+        self.results.qps = rate
+        self.results.arrival_mode = arrival if rate else None
+        self.results.stream_mode = mode
+
+    async def connect(self):
+        # Open one connection; returns the Stream, or None if it failed
+        try:
+            if self.mode == "websocket":
+                socket = await asyncio.wait_for(
+                    self.session.ws_connect(self.url, autoping=True, heartbeat=None),
+                    self.timeout,
+                )
+            else:
+                socket = await asyncio.wait_for(self.session.get(self.url), self.timeout)
+                if socket.status != 200:
+                    socket.release()
+                    self.setup_failed(
+                        f"Unexpected status {socket.status}", f"HTTP {socket.status}"
+                    )
+                    return None
+        except aiohttp.WSServerHandshakeError as e:
+            self.setup_failed(e, f"HTTP {e.status}")
+            return None
+        except (aiohttp.ClientError, OSError, asyncio.TimeoutError) as e:
+            self.setup_failed(e)
+            return None
+        return Stream(socket)
+
+    def setup_failed(self, error, category=None):
+        self.results.add_setup_failure(error, category)
+        self.error_log.report(
+            logging.ERROR,
+            category or type(error).__name__,
+            "Connection failed: %s",
+            error,
+        )
+
+    def add(self, stream):
+        stream.position = len(self.open)
+        self.open.append(stream)
+
+    def remove(self, stream):
+        # Swap the last open stream into this one's place: O(1) at any size
+        last = self.open.pop()
+        if last is not stream:
+            last.position = stream.position
+            self.open[stream.position] = last
+        stream.position = None
+
+    async def hold(self, index, start_time):
+        # Keep one connection open until the run ends, reopening it when it
+        # drops. Connections are paced at connect_rate from the start.
+        if self.connect_rate:
+            await asyncio.sleep(
+                max(0, start_time + index / self.connect_rate - time.perf_counter())
+            )
+        attempts = 0
+        while self.running:
+            started = time.perf_counter()
+            stream = await self.connect()
+            attempts += 1
+            if stream is not None:
+                if not self.running:
+                    await self.close(stream)
+                    break
+                self.add(stream)
+                self.results.add_connection(
+                    time.perf_counter() - started, attempts > 1, len(self.open)
+                )
+                try:
+                    error = await self.receive(stream)
+                except (aiohttp.ClientError, OSError) as e:
+                    error = e
+                if stream.position is not None:
+                    self.remove(stream)
+                if not self.running:
+                    break  # Closed by the end of the run, not dropped
+                self.results.add_drop(error, len(stream.pending))
+                stream.pending.clear()
+                self.error_log.report(
+                    logging.WARNING,
+                    "drop",
+                    "Connection dropped: %s",
+                    error or "closed by the server",
+                )
+                await self.close(stream)
+            if self.reconnect_delay is None:
+                break
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def receive(self, stream):
+        # Record messages until the connection ends; returns the error that
+        # ended it, if any
+        results = self.results
+        pending = stream.pending
+        if self.mode == "websocket":
+            socket = stream.socket
+            while True:
+                message = await socket.receive()
+                if message.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    latency = None
+                    if pending:
+                        latency = time.perf_counter() - pending.popleft()
+                    results.add_message(len(message.data), latency)
+                elif message.type == aiohttp.WSMsgType.ERROR:
+                    return message.data
+                else:
+                    return None  # Closed (pings are answered by aiohttp)
+        response = stream.socket
+        if response.headers.get("Content-Type", "").startswith("text/event-stream"):
+            # One message per event: lines up to a blank line
+            size = 0
+            async for line in response.content:
+                if line.strip():
+                    size += len(line)
+                elif size:
+                    results.add_message(size)
+                    size = 0
+        else:
+            async for chunk in response.content.iter_any():
+                results.add_message(len(chunk))
+        return None  # The server ended the response
+
+    async def close(self, stream):
+        if self.mode == "websocket":
+            await stream.socket.close()
+        else:
+            stream.socket.close()
+
+    async def send(self, start_time):
+        # Open-loop sender: one message per arrival of the schedule, to the
+        # next open connection. When none is open the message is skipped.
+        if self.arrival == "burst":
+            schedule = make_schedule(self.arrival, self.rate, burst_size=self.burst_size)
+        else:
+            schedule = make_schedule(self.arrival, self.rate)
+        offsets = schedule.offsets()
+        results = self.results
+        message = self.message
+        size = len(message)
+        while True:
+            intended_time = start_time + next(offsets)
+            if intended_time >= self.end_time:
+                break
+            delay = intended_time - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self.open:
+                results.count_stream("skipped_messages")
+                continue
+            stream = self.open[self.cursor % len(self.open)]
+            self.cursor += 1
+            results.add_send(intended_time, time.perf_counter())
+            results.total_body_sent += size
+            if self.reply:
+                stream.pending.append(intended_time)
+            try:
+                await stream.socket.send_str(message)
+            except ConnectionError:
+                pass  # Counted as lost when the connection's drop is recorded
+
+    async def drain(self):
+        # Wait up to `timeout` for the replies still on their way; those
+        # that do not come are counted as timeout errors
+        deadline = time.perf_counter() + self.timeout
+        while self.results.unfinished_requests() > 0 and time.perf_counter() < deadline:
+            await asyncio.sleep(DRAIN_INTERVAL)
+        lost = 0
+        for stream in self.open:
+            lost += len(stream.pending)
+            stream.pending.clear()
+        self.results.add_lost_messages(lost, "timeout_errors")
+
+    async def run_test(self):
+        validate_url(self.url)
+        limit = raise_file_limit(self.connections + 64)
+        if limit is not None and limit < self.connections + 64:
+            self.logger.warning(
+                f"The open-file limit ({limit}) is too low for {self.connections} "
+                "connections; raise it with ulimit -n"
+            )
+        # No pool limit, and host names resolved once for the whole run
+        connector = aiohttp.TCPConnector(limit=0, ttl_dns_cache=None)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=None),
+        )
+        self.open = []
+        self.cursor = 0
+        self.running = True
+        start_time = time.perf_counter()
+        self.results.mark_start(start_time)
+        self.end_time = start_time + self.duration
+        tasks = [
+            asyncio.ensure_future(self.hold(index, start_time))
+            for index in range(self.connections)
+        ]
+        sender = asyncio.ensure_future(self.send(start_time)) if self.rate else None
+        if self.monitor is not None:
+            self.monitor.start(self, start_time)
+        try:
+            await asyncio.sleep(max(0, self.end_time - time.perf_counter()))
+            if sender is not None:
+                await sender
+                if self.reply:
+                    await self.drain()
+            end_time = time.perf_counter()
+            self.running = False
+            self.results.streams["open_at_end"] = len(self.open)
+            if self.open:
+                # Close politely, but do not wait long for every peer
+                closing = asyncio.gather(
+                    *(self.close(stream) for stream in self.open), return_exceptions=True
+                )
+                try:
+                    await asyncio.wait_for(closing, self.timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.running = False
+            if sender is not None:
+                sender.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.monitor is not None:
+                await self.monitor.stop(self.results, False)
+            self.error_log.flush()
+            await self.session.close()
+        self.results.mark_end(end_time)
+        self.results.total_requests = self.results.sent_requests
+
+    def get_results(self):
+        return self.results
@@ -0,0 +1,25 @@
+import asyncio
+import unittest
+from load_tester_api.benchmarks.ceiling import StandInServer, run_suite
+
+
+class TestSelfBenchmark(unittest.TestCase):
+
+    def test_suite_reports_every_case(self):
+        """Each engine and concurrency level gets one machine-readable case."""
+        with StandInServer(processes=1) as server:
+            cases = asyncio.run(run_suite(server, ["aiohttp", "raw"], [1, 4], 200, 5))
+        self.assertEqual(
+            [(case["engine"], case["concurrency"]) for case in cases],
+            [("aiohttp", 1), ("aiohttp", 4), ("raw", 1), ("raw", 4)],
+        )
+        for case in cases:
+            self.assertEqual(case["completed"], 200)
+            self.assertGreater(case["max_rps"], 0)
+            self.assertGreater(case["cpu_us_per_request"], 0)
+            # The measured latency cannot be below the server's own delay
+            self.assertGreaterEqual(case["latency_overhead_ms"]["p50"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import json
+import os
+import tempfile
+import unittest
+from load_tester_api import LoadTester, Scenario, RequestTemplate
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.benchmarks.server import LocalServer
+from load_tester_api.utils import parse_headers
+
+
+class TestScenarios(unittest.IsolatedAsyncioTestCase):
+
+    def write(self, directory, name, text):
+        path = os.path.join(directory, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_templates_precompiled_from_feeds(self):
+        """Each template is rendered once per feed row and used round-robin."""
+        with tempfile.TemporaryDirectory() as directory:
+            self.write(directory, "terms.csv", "term\nred shoes\nhat\n")
+            self.write(directory, "items.jsonl", '{"id": 7}\n{"id": 9}\n')
+            path = self.write(
+                directory,
+                "scenario.json",
+                json.dumps(
+                    {
+                        "base_url": "http://127.0.0.1:8080",
+                        "feeds": {"terms": "terms.csv", "items": "items.jsonl"},
+                        "requests": [
+                            {"name": "search", "path": "/search?q=${term}", "feed": "terms"},
+                            {
+                                "name": "cart",
+                                "method": "post",
+                                "path": "/cart",
+                                "headers": {"X-Item": "${id}"},
+                                "body": {"item": "${id}"},
+                                "feed": "items",
+                            },
+                        ],
+                    }
+                ),
+            )
+            scenario = Scenario.from_file(path)
+        search, cart = scenario.prepared
+        self.assertEqual(
+            [request.url for request in search],
+            [
+                "http://127.0.0.1:8080/search?q=red%20shoes",
+                "http://127.0.0.1:8080/search?q=hat",
+            ],
+        )
+        self.assertEqual(cart[1].method, "POST")
+        self.assertEqual(cart[1].headers["X-Item"], "9")
+        self.assertEqual(cart[1].headers["Content-Type"], "application/json")
+        self.assertEqual(cart[1].body, b'{"item": "9"}')
+        self.assertEqual(scenario.url, search[0].url)
+
+    def test_weighted_mix(self):
+        scenario = Scenario(
+            [
+                RequestTemplate("a", "http://h/a", weight=70),
+                RequestTemplate("b", "http://h/b", weight=20),
+                RequestTemplate("c", "http://h/c", weight=10),
+            ],
+            seed=1,
+        )
+        counts = {"a": 0, "b": 0, "c": 0}
+        for _ in range(10000):
+            counts[scenario.next_request().name] += 1
+        self.assertAlmostEqual(counts["a"] / 10000, 0.7, delta=0.02)
+        self.assertAlmostEqual(counts["c"] / 10000, 0.1, delta=0.02)
+
+    def test_invalid_scenarios(self):
+        with self.assertRaises(LoadTesterError):
+            Scenario([RequestTemplate("a", "/relative")])
+        with self.assertRaises(LoadTesterError):
+            Scenario([RequestTemplate("a", "http://h/${missing}")])
+        with self.assertRaises(LoadTesterError):
+            Scenario([RequestTemplate("a", "http://h/", feed="nope")])
+
+    async def test_per_endpoint_results(self):
+        for engine in ("aiohttp", "raw"):
+            with self.subTest(engine=engine):
+                async with LocalServer() as server:
+                    scenario = Scenario(
+                        [
+                            RequestTemplate("index", "/", weight=3),
+                            RequestTemplate("echo", "/echo", method="POST", body="hello"),
+                            RequestTemplate("missing", "/status/404"),
+                        ],
+                        base_url=server.url(),
+                        seed=3,
+                    )
+                    tester = LoadTester(
+                        None,
+                        scenario=scenario,
+                        concurrency=4,
+                        total_requests=200,
+                        engine=engine,
+                    )
+                    await tester.run_test()
+                summary = tester.get_results().summary()
+                endpoints = {endpoint["name"]: endpoint for endpoint in summary["endpoints"]}
+                self.assertEqual(summary["completed_requests"], 200)
+                self.assertEqual(
+                    sum(endpoint["completed_requests"] for endpoint in endpoints.values()),
+                    200,
+                )
+                self.assertEqual(endpoints["index"]["failed_requests"], 0)
+                self.assertEqual(
+                    endpoints["missing"]["failed_requests"],
+                    endpoints["missing"]["completed_requests"],
+                )
+                self.assertEqual(
+                    endpoints["echo"]["html_transferred"],
+                    5 * endpoints["echo"]["completed_requests"],
+                )
+
+    def test_parse_headers(self):
+        self.assertEqual(
+            parse_headers("Accept: text/html, application/json,Referer: http://a/b"),
+            {"Accept": "text/html, application/json", "Referer": "http://a/b"},
+        )
+        with self.assertRaises(LoadTesterError):
+            parse_headers("no-colon")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from load_tester_api import CapacitySearch, SLO
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class ThresholdSearch(CapacitySearch):
+    # Trials pass below a fixed capacity, without sending any requests
+    capacity = 730
+
+    async def run_trial(self, load):
+        passed = load <= self.capacity
+        trial = {"load": load, "passed": passed}
+        self.trials.append(trial)
+        if passed and (self.best is None or load > self.best["load"]):
+            self.best = trial
+        return passed
+
+
+class TestCapacitySearch(unittest.IsolatedAsyncioTestCase):
+
+    def test_parse_slo(self):
+        slo = SLO.parse("p99.9<0.2s, errors<0.1%")
+        self.assertEqual(
+            (slo.percentile, slo.latency_ms, slo.max_error_rate), (99.9, 200, 0.001)
+        )
+        self.assertIsNone(SLO.parse("p50<10ms").max_error_rate)
+        with self.assertRaises(LoadTesterError):
+            SLO.parse("p99>200ms")
+
+    def test_slo_check(self):
+        slo = SLO(latency_ms=100, percentile=99, max_error_rate=0.01)
+        self.assertIsNone(slo.check({"error_rate": 0.0, "latency_ms": 99}))
+        self.assertIn("p99", slo.check({"error_rate": 0.0, "latency_ms": 101}))
+        self.assertIn("error rate", slo.check({"error_rate": 0.02, "latency_ms": 1}))
+
+    async def test_step_up_then_bisect(self):
+        """The search doubles until a failure, then bisects to the tolerance."""
+        search = ThresholdSearch(
+            "http://127.0.0.1/",
+            SLO(100),
+            start=100,
+            tolerance=0.02,
+            cooldown=0,
+            preflight=False,
+        )
+        report = await search.run()
+        loads = [trial["load"] for trial in report["trials"]]
+        self.assertEqual(loads[:4], [100, 200, 400, 800])
+        self.assertLessEqual(report["max_passing_load"], 730)
+        self.assertGreater(report["max_passing_load"], 730 * 0.98)
+
+        search = ThresholdSearch(
+            "http://127.0.0.1/",
+            SLO(100),
+            mode="concurrency",
+            start=1,
+            cooldown=0,
+            preflight=False,
+        )
+        report = await search.run()
+        self.assertEqual(report["max_passing_load"], 730)
+
+    async def test_trials_share_one_engine(self):
+        async with LocalServer() as server:
+            search = CapacitySearch(
+                server.url(),
+                SLO(latency_ms=1000, max_error_rate=0.0),
+                start=20,
+                limit=40,
+                trial_duration=0.3,
+                cooldown=0,
+                concurrency=4,
+            )
+            opened = []
+            open_engine = search.engine.open
+
+            async def counting_open(tester, max_concurrency):
+                opened.append(max_concurrency)
+                await open_engine(tester, max_concurrency)
+
+            search.engine.open = counting_open
+            report = await search.run()
+        self.assertEqual(opened, [4])
+        self.assertEqual([trial["load"] for trial in report["trials"]], [20, 40])
+        self.assertEqual(report["max_passing_load"], 40)
+        self.assertGreater(report["trials"][1]["completed_requests"], 0)
+        self.assertFalse(search.engine.is_open)
+
+    async def test_parsed_slo_latency(self):
+        """A parsed SLO (float percentile) is judged on the measured latency."""
+        async with LocalServer() as server:
+            search = CapacitySearch(
+                server.url(),
+                SLO.parse("p99<1000ms,errors<1%"),
+                start=20,
+                limit=20,
+                trial_duration=0.3,
+                cooldown=0,
+                concurrency=4,
+            )
+            report = await search.run()
+        trial = report["trials"][0]
+        self.assertIsNotNone(trial["latency_ms"])
+        self.assertTrue(trial["passed"], trial["reason"])
+        self.assertEqual(report["max_passing_load"], 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from load_tester_api.batch import BatchRunner, config_hash, expand_configs
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TrackingRunner(BatchRunner):
+    # Records pre-flight checks and how many configs run at once per host
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checked = []
+        self.pooled = []
+        self.active = {}
+        self.overlap = {}
+
+    async def check(self, tester):
+        if tester.url not in self.preflight_errors:
+            self.checked.append(tester.url)
+            self.pooled.append(tester.engine.is_open)
+        return await super().check(tester)
+
+    async def run_config(self, digest, config, output_filename):
+        host = config["url"].split("/")[2]
+        self.active[host] = self.active.get(host, 0) + 1
+        self.overlap[host] = max(self.overlap.get(host, 0), self.active[host])
+        await asyncio.sleep(0.01)
+        await super().run_config(digest, config, output_filename)
+        self.active[host] -= 1
+
+
+class TestBatchRunner(unittest.IsolatedAsyncioTestCase):
+
+    def test_expand_matrix(self):
+        configs = expand_configs(
+            {
+                "defaults": {"requests": 5},
+                "matrix": {"url": ["http://a/", "http://b/"], "concurrency": [1, 2]},
+                "configs": [{"url": "http://a/", "concurrency": 1, "requests": 5}],
+            }
+        )
+        # The explicit config duplicates a matrix entry
+        self.assertEqual(len(configs), 4)
+        for digest, config in configs.items():
+            self.assertEqual(digest, config_hash(config))
+            self.assertEqual(config["method"], "GET")
+        with self.assertRaises(LoadTesterError):
+            expand_configs({"configs": [{"url": "http://a/", "colour": "red"}]})
+
+    async def test_sweep_runs_once_and_skips_cached_results(self):
+        async with LocalServer() as first, LocalServer() as second:
+            data = {
+                "defaults": {"requests": 10},
+                "matrix": {
+                    "url": [first.url("/"), second.url("/")],
+                    "concurrency": [1, 2, 4],
+                },
+                "configs": [{"url": first.url("/missing"), "requests": 10}],
+            }
+            with tempfile.TemporaryDirectory() as folder:
+                runner = TrackingRunner(
+                    expand_configs(data), parallel=2, output_folder=folder
+                )
+                runs = await runner.run()
+                statuses = [run["status"] for run in runs]
+                self.assertEqual(statuses.count("completed"), 6)
+                self.assertEqual(statuses.count("unreachable"), 1)
+                # Each URL is checked once; each host runs one config at a time
+                self.assertEqual(len(runner.checked), 3)
+                self.assertEqual(runner.pooled, [True] * 3)  # Through the shared pool
+                self.assertEqual(set(runner.overlap.values()), {1})
+                self.assertEqual(len(os.listdir(folder)), 6)
+                for run in runs:
+                    if run["status"] == "completed":
+                        with open(run["output"]) as f:
+                            self.assertEqual(json.load(f)["Complete requests"], 10)
+
+                rerun = await BatchRunner(expand_configs(data), output_folder=folder).run()
+                statuses = [run["status"] for run in rerun]
+                self.assertEqual(statuses.count("skipped"), 6)
+                self.assertEqual(statuses.count("unreachable"), 1)
+
+    async def test_unreachable_runs_are_not_cached(self):
+        """Without pre-flight, a run that never connected leaves no result file."""
+        data = {
+            "defaults": {"requests": 4, "concurrency": 2},
+            "matrix": {"url": ["http://127.0.0.1:1/"], "engine": ["aiohttp", "raw"]},
+        }
+        with tempfile.TemporaryDirectory() as folder:
+            for attempt in range(2):
+                runs = await BatchRunner(
+                    expand_configs(data), output_folder=folder, preflight=False
+                ).run()
+                self.assertEqual([run["status"] for run in runs], ["unreachable"] * 2)
+            self.assertEqual(os.listdir(folder), [])
+
+            # A run with no requests at all is not a connection failure
+            data = {"configs": [{"url": "http://127.0.0.1:1/", "requests": 0}]}
+            runs = await BatchRunner(
+                expand_configs(data), output_folder=folder, preflight=False
+            ).run()
+            self.assertEqual(runs[0]["status"], "completed")
+
+
+if __name__ == "__main__":
+    unittest.main()
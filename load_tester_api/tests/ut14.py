@@ -0,0 +1,213 @@
+import asyncio
+import time
+import unittest
+from load_tester_api import AbortPolicy
+from load_tester_api.distributed import Agent, Coordinator, read_message, send_message
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.benchmarks.server import LocalServer
+
+SKEW = 5.0
+TOKEN = "test-token"
+
+
+class SkewedAgent(Agent):
+    # An agent whose clock runs SKEW seconds ahead of the coordinator's
+    def snapshot(self, tester):
+        data = super().snapshot(tester)
+        for name in ("start_timestamp", "end_timestamp"):
+            if data[name] is not None:
+                data[name] += SKEW
+        data["clock_offset"] += SKEW
+        return data
+
+    async def run(self, message, writer):
+        message["spec"]["start_at"] -= SKEW  # Back to the real clock
+        await super().run(message, writer)
+
+
+class DroppingAgent(Agent):
+    # Sends one snapshot, then loses its connection mid-run
+    def snapshot(self, tester):
+        data = super().snapshot(tester)
+        self.sent = getattr(self, "sent", 0) + 1
+        if self.sent == 2:
+            self.writer.transport.abort()
+        return data
+
+    async def run(self, message, writer):
+        self.writer = writer
+        await super().run(message, writer)
+
+
+class WatchedAgent(Agent):
+    # Keeps how its last run ended
+    async def run(self, message, writer):
+        self.ended = asyncio.get_running_loop().create_future()
+        try:
+            await super().run(message, writer)
+        except BaseException as e:
+            self.ended.set_result(e)
+            raise
+        self.ended.set_result(None)
+
+
+class TestDistributed(unittest.IsolatedAsyncioTestCase):
+
+    async def start_agents(self, *classes):
+        agents = [agent_class(port=0, token=TOKEN) for agent_class in classes]
+        for agent in agents:
+            await agent.start()
+        for agent in agents:
+            self.addAsyncCleanup(agent.stop)
+        return [f"127.0.0.1:{agent.port}" for agent in agents]
+
+    async def test_merged_and_tagged_per_agent(self):
+        addresses = await self.start_agents(Agent, Agent)
+        async with LocalServer() as server:
+            coordinator = Coordinator(
+                server.url(),
+                addresses,
+                token=TOKEN,
+                concurrency=4,
+                total_requests=101,
+                start_delay=0.2,
+                snapshot_interval=0.05,
+            )
+            await coordinator.run_test()
+        summary = coordinator.get_results().summary()
+        self.assertEqual(summary["completed_requests"], 101)
+        agents = summary["agents"]
+        self.assertEqual(len(agents), 2)
+        self.assertEqual(sorted(agent["completed_requests"] for agent in agents), [50, 51])
+        self.assertEqual({agent["status"] for agent in agents}, {"completed"})
+
+    async def test_clock_skew_is_compensated(self):
+        """Timestamps from an agent with a fast clock land on the coordinator's."""
+        addresses = await self.start_agents(Agent, SkewedAgent)
+        async with LocalServer() as server:
+            coordinator = Coordinator(
+                server.url(),
+                addresses,
+                token=TOKEN,
+                concurrency=2,
+                qps=100,
+                duration=0.5,
+                start_delay=0.2,
+                snapshot_interval=0.1,
+            )
+            # The skewed agent answers clock probes SKEW seconds ahead
+            original = coordinator.sync_clock
+
+            async def sync_clock(link):
+                await original(link)
+                if link.port == int(addresses[1].split(":")[1]):
+                    link.skew += SKEW
+
+            coordinator.sync_clock = sync_clock
+            await coordinator.run_test()
+        results = coordinator.get_results()
+        skews = sorted(agent.clock_skew for agent in results.agents.values())
+        self.assertAlmostEqual(skews[1], SKEW, delta=0.1)
+        # Without compensation the merged run would span more than SKEW seconds
+        self.assertLess(results.total_test_time, 1.5)
+        self.assertGreater(results.completed_requests, 40)
+
+    async def test_dropped_agent_keeps_partial_result(self):
+        addresses = await self.start_agents(Agent, DroppingAgent)
+        async with LocalServer() as server:
+            coordinator = Coordinator(
+                server.url(),
+                addresses,
+                token=TOKEN,
+                concurrency=2,
+                qps=100,
+                duration=1.0,
+                start_delay=0.1,
+                snapshot_interval=0.2,
+            )
+            await coordinator.run_test()
+        results = coordinator.get_results()
+        statuses = sorted(agent.agent_status for agent in results.agents.values())
+        self.assertEqual(statuses, ["completed", "dropped"])
+        dropped = [a for a in results.agents.values() if a.agent_status == "dropped"][0]
+        self.assertGreater(dropped.completed_requests, 0)
+        self.assertEqual(results.total_requests, results.sent_requests)
+
+    async def test_coordinator_gone_before_the_start(self):
+        """A run the coordinator leaves before it starts is cancelled."""
+        agent = WatchedAgent(port=0, token=TOKEN)
+        await agent.start()
+        self.addAsyncCleanup(agent.stop)
+        async with LocalServer() as server:
+            for url, start_at in (
+                (server.url("/delay?ms=1000"), None),  # Still in preflight
+                (server.url(), time.time() + 60),  # Waiting for the start time
+            ):
+                reader, writer = await asyncio.open_connection("127.0.0.1", agent.port)
+                await send_message(writer, {"type": "hello", "token": TOKEN})
+                await read_message(reader)
+                spec = {"url": url, "total_requests": 10, "start_at": start_at}
+                await send_message(
+                    writer, {"type": "run", "spec": spec, "snapshot_interval": 0.05}
+                )
+                await asyncio.sleep(0.2)
+                writer.close()
+                with self.subTest(url=url):
+                    ended = await asyncio.wait_for(agent.ended, 2)
+                    self.assertIsInstance(ended, ConnectionError)
+
+    async def test_no_agents_reachable(self):
+        async with LocalServer() as server:
+            coordinator = Coordinator(
+                server.url(), ["127.0.0.1:1"], connect_timeout=0.5, token=TOKEN
+            )
+            with self.assertRaises(LoadTesterError):
+                await coordinator.run_test()
+
+    async def test_agents_need_the_token(self):
+        """Without the shared token an agent takes no run."""
+        with self.assertRaises(LoadTesterError):
+            Agent(port=0)
+        addresses = await self.start_agents(Agent)
+        async with LocalServer() as server:
+            coordinator = Coordinator(server.url(), addresses, token="wrong")
+            with self.assertRaises(LoadTesterError):
+                await coordinator.run_test()
+        self.assertEqual(coordinator.links[0].status, "refused")
+        self.assertEqual(coordinator.links[0].error, "Invalid agent token")
+
+    async def test_agents_refuse_file_options(self):
+        addresses = await self.start_agents(Agent)
+        host, port = addresses[0].split(":")
+        reader, writer = await asyncio.open_connection(host, int(port))
+        try:
+            await send_message(writer, {"type": "hello", "token": TOKEN})
+            await read_message(reader)
+            spec = {"url": "http://127.0.0.1/", "sample_log": "/tmp/overwritten"}
+            await send_message(
+                writer, {"type": "run", "spec": spec, "snapshot_interval": 1}
+            )
+            reply = await read_message(reader)
+        finally:
+            writer.close()
+        self.assertEqual(reply["type"], "error")
+        self.assertIn("sample_log", reply["error"])
+
+    def test_options_are_checked_up_front(self):
+        for options in (
+            {"sample_log": "run.samples"},
+            {"profiler_output": "profile.txt"},
+            {"abort": AbortPolicy.parse("errors>50%")},  # Not JSON
+        ):
+            with self.subTest(options=list(options)):
+                with self.assertRaises(LoadTesterError):
+                    Coordinator("http://a/", ["b:1"], token=TOKEN, **options)
+        # Unset options from the command line are simply left out
+        coordinator = Coordinator(
+            "http://a/", ["b:1"], token=TOKEN, sample_log=None, profiler=None
+        )
+        self.assertNotIn("sample_log", coordinator.options)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+from load_tester_api.load_tester import LoadTester
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.samplelog import SampleFile, SampleLog, analyze
+from load_tester_api.stats import numpy
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TestSampleLog(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "run.samples")
+
+    def test_round_trip_in_blocks(self):
+        """Records come back column by column across full and partial blocks."""
+        log = SampleLog(self.path, batch_size=4)
+        log.open({"url": "http://a/"}, ["search", "item"])
+        for index in range(10):
+            log.record(
+                1000.0 + index,
+                0.001 * (index + 1),
+                nbytes=100,
+                status=500 if index == 9 else 200,
+                endpoint="item" if index % 2 else "search",
+                reused=index > 0,
+            )
+        log.record(1010.0, 2.5, endpoint="search", error="timeout_errors")
+        log.close()
+
+        sample_file = SampleFile(self.path)
+        self.assertEqual(sample_file.metadata["endpoints"], ["search", "item"])
+        counts = [count for count, _ in sample_file.blocks()]
+        self.assertEqual(counts, [4, 4, 3])
+        latencies = [
+            latency
+            for _, columns in sample_file.blocks()
+            for latency in columns["latency"]
+        ]
+        self.assertAlmostEqual(latencies[4], 0.005, places=6)
+        sample_file.close()
+
+        report = analyze([self.path], bucket=5, outliers=2)
+        self.assertEqual(report["records"], 11)
+        self.assertEqual(report["failed_requests"], 1)
+        self.assertEqual(report["error_kinds"], {"timeout_errors": 1})
+        self.assertEqual(report["statuses"], {"200": 9, "500": 1})
+        self.assertEqual(report["bytes"], 1000)
+        self.assertAlmostEqual(report["latency_ms"]["max"], 10, places=3)
+        self.assertEqual([b["requests"] for b in report["buckets"]], [5, 5, 1])
+        self.assertEqual(report["buckets"][1]["errors"], 1)
+        self.assertEqual(report["outliers"][0]["status"], 0)
+        self.assertAlmostEqual(report["outliers"][0]["latency_ms"], 2500, places=3)
+
+        # Filters combine
+        self.assertEqual(analyze([self.path], endpoint="item")["selected"], 5)
+        self.assertEqual(analyze([self.path], errors_only=True)["selected"], 2)
+        self.assertEqual(analyze([self.path], status=[200], since=5)["selected"], 4)
+        self.assertEqual(analyze([self.path], min_latency=0.0075)["selected"], 4)
+
+    def test_start_is_the_earliest_record(self):
+        """A slow request sent first but written last still starts the run."""
+        log = SampleLog(self.path, batch_size=4)
+        log.open({"url": "http://a/"})
+        for index in range(8):
+            log.record(1001.0 + index, 0.01)
+        log.record(1000.0, 9.5)  # Sent first, completed last
+        log.close()
+        report = analyze([self.path], bucket=2, since=0)
+        self.assertEqual(report["selected"], 9)
+        self.assertEqual(report["duration"], 8)
+        self.assertEqual(report["buckets"][0]["start"], 0)
+        self.assertEqual([b["requests"] for b in report["buckets"]], [2, 2, 2, 2, 1])
+        self.assertEqual(analyze([self.path], until=1)["selected"], 1)
+
+    @unittest.skipUnless(numpy, "numpy is not installed")
+    def test_numpy_matches_the_record_loop(self):
+        """Array scans and the record-by-record fallback give the same report."""
+        generator = random.Random(7)
+        log = SampleLog(self.path, batch_size=500)
+        log.open({"url": "http://a/"}, ["search", "item"])
+        for index in range(2000):
+            log.record(
+                1000.0 + index / 100 + generator.random(),
+                generator.lognormvariate(-4, 1),
+                nbytes=generator.randrange(1000),
+                status=generator.choice([200, 200, 200, 404, 503]),
+                endpoint=generator.choice(["search", "item"]),
+                error="timeout_errors" if index % 97 == 0 else None,
+            )
+        log.close()
+        for options in (
+            {"bucket": 2, "outliers": 5},
+            {"status": [200, 503], "endpoint": "item", "since": 3, "until": 15},
+            {"errors_only": True, "min_latency": 0.01, "max_latency": 0.1},
+        ):
+            with self.subTest(**options):
+                report = analyze([self.path], **options)
+                with mock.patch("load_tester_api.samplelog.numpy", None):
+                    fallback = analyze([self.path], **options)
+                self.assertEqual(report.keys(), fallback.keys())
+                for key in report:
+                    if key == "latency_ms":
+                        for name, value in report[key].items():
+                            self.assertAlmostEqual(value, fallback[key][name], places=6)
+                    else:
+                        self.assertEqual(report[key], fallback[key], key)
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a sample log")
+        with self.assertRaises(LoadTesterError):
+            analyze([self.path])
+
+    async def test_load_test_writes_every_request(self):
+        async with LocalServer() as server:
+            tester = LoadTester(
+                server.url("/"),
+                concurrency=4,
+                total_requests=50,
+                sample_log=self.path,
+            )
+            await tester.run_test()
+        results = tester.get_results()
+        report = analyze([self.path], percentiles=[50, 99])
+        self.assertEqual(report["records"], 50)
+        self.assertEqual(report["statuses"], {"200": 50})
+        self.assertEqual(report["bytes"], 100)  # "ok" per response
+        self.assertGreaterEqual(report["latency_ms"]["min"], 0)
+        self.assertAlmostEqual(
+            report["latency_ms"]["max"], max(results.latencies) * 1000, places=2
+        )
+        self.assertLessEqual(report["duration"], results.total_test_time)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import logging
+import socket
+import unittest
+from load_tester_api import LoadTester, TestResult
+from load_tester_api.errorlog import ErrorLog
+from load_tester_api.result import MAX_ERROR_TYPES
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class CountingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class TestErrorTaxonomy(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.handler = CountingHandler()
+        logger = logging.getLogger("LoadTester")
+        logger.addHandler(self.handler)
+        self.addCleanup(logger.removeHandler, self.handler)
+
+    async def test_status_codes_and_rate_limited_logging(self):
+        """Every non-200 response is counted, but each type is logged once."""
+        async with LocalServer() as server:
+            tester = LoadTester(
+                server.url("/status/503"),
+                concurrency=4,
+                total_requests=40,
+                preflight=False,
+                engine="raw",
+            )
+            await tester.run_test()
+        summary = tester.get_results().summary()
+        self.assertEqual(summary["status_codes"], {"503": 40})
+        self.assertEqual(summary["non_2xx_responses"], 40)
+        self.assertEqual(summary["status_code_errors"], 40)
+        self.assertEqual(summary["failed_requests"], 40)
+        self.assertEqual(
+            summary["error_types"], [{"type": "HTTP 503", "count": 40, "samples": []}]
+        )
+        first, aggregate = self.handler.messages
+        self.assertEqual(first, "Request failed with status: 503")
+        self.assertTrue(aggregate.startswith("39 more 503 errors in the last"))
+
+    async def test_exception_types_keep_few_samples(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]  # Nothing listens here
+        tester = LoadTester(
+            f"http://127.0.0.1:{port}/", total_requests=10, preflight=False
+        )
+        await tester.run_test()
+        results = tester.get_results()
+        self.assertEqual(results.connection_errors, 10)
+        self.assertEqual(results.error_types, {"ClientConnectorError": 10})
+        self.assertEqual(len(results.error_samples["ClientConnectorError"]), 3)
+        self.assertEqual(len(self.handler.messages), 2)
+
+    def test_bounded_and_mergeable(self):
+        result = TestResult(0)
+        for index in range(MAX_ERROR_TYPES + 10):
+            result.add_status_error(400 + index)
+        self.assertEqual(len(result.error_types), MAX_ERROR_TYPES + 1)
+        self.assertEqual(result.error_types["other"], 10)
+
+        other = TestResult.from_dict(result.to_dict())
+        other.add_status(200)
+        other.add_failure("timeout_errors", error=TimeoutError("slow"))
+        result.merge(other)
+        self.assertEqual(result.status_codes, {200: 1})
+        self.assertEqual(result.error_types["HTTP 400"], 2)
+        self.assertEqual(result.error_types["other"], 21)  # TimeoutError overflowed
+        self.assertEqual(result.error_samples["other"], ["slow"])
+        self.assertEqual(result.failed_requests, 2 * (MAX_ERROR_TYPES + 10) + 1)
+
+    def test_error_log_flushes_per_interval(self):
+        logger = logging.getLogger("LoadTesterErrorLogTest")
+        handler = CountingHandler()
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        error_log = ErrorLog(logger, interval=0)  # Every report ends an interval
+        for _ in range(3):
+            error_log.report(logging.ERROR, "E", "failure %d", 1)
+        self.assertEqual(handler.messages, ["failure 1"] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import socket
+import unittest
+from load_tester_api import LiveMetrics, LoadTester
+from load_tester_api.engines import AiohttpEngine, CachedResolver
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TestConnectionModes(unittest.IsolatedAsyncioTestCase):
+
+    async def run_tester(self, url, **options):
+        tester = LoadTester(url, **options)
+        await tester.run_test()
+        return tester.get_results().summary()
+
+    async def test_prewarmed_pool_is_reused(self):
+        """With a pre-warmed pool no measured request opens a connection."""
+        for engine in ("aiohttp", "raw"):
+            async with LocalServer() as server:
+                summary = await self.run_tester(
+                    server.url("/"),
+                    concurrency=4,
+                    total_requests=40,
+                    prewarm=4,
+                    engine=engine,
+                )
+            with self.subTest(engine=engine):
+                self.assertEqual(summary["prewarmed_connections"], 4)
+                self.assertEqual(summary["new_connections"], 0)
+                self.assertEqual(summary["keep_alive_requests"], 40)
+                self.assertEqual(summary["connection_reuse"], 1)
+
+    async def test_preflight_body_is_not_kept(self):
+        """The pooled pre-flight drains the body and reuses its connection."""
+
+        class TrackingEngine(AiohttpEngine):
+            modes = []
+
+            async def read_body(self, response, body_mode=None):
+                self.modes.append(body_mode)
+                return await super().read_body(response, body_mode)
+
+        engine = TrackingEngine()
+        async with LocalServer() as server:
+            tester = LoadTester(
+                server.url("/large?size=100000"),
+                concurrency=1,
+                total_requests=5,
+                engine=engine,
+            )
+            await tester.run_test()
+        summary = tester.get_results().summary()
+        self.assertEqual(engine.modes[0], "discard")
+        self.assertEqual(summary["new_connections"], 0)  # Opened by the pre-flight
+        self.assertEqual(summary["completed_requests"], 5)
+
+    async def test_fresh_connection_per_request(self):
+        for engine in ("aiohttp", "raw"):
+            async with LocalServer() as server:
+                summary = await self.run_tester(
+                    server.url("/"),
+                    concurrency=2,
+                    total_requests=10,
+                    connection_mode="fresh",
+                    engine=engine,
+                )
+            with self.subTest(engine=engine):
+                self.assertEqual(summary["completed_requests"], 10)
+                self.assertEqual(summary["new_connections"], 10)
+                self.assertEqual(summary["keep_alive_requests"], 0)
+                self.assertGreater(summary["connection_times"]["min"], 0)
+                self.assertGreater(summary["connection_churn"], 0)
+        with self.assertRaises(LoadTesterError):
+            LoadTester("http://a/", connection_mode="fresh", prewarm=2)
+
+    async def test_warmup_is_left_out(self):
+        async with LocalServer() as server:
+            summary = await self.run_tester(
+                server.url("/"), concurrency=2, total_requests=10, qps=200, warmup=0.1
+            )
+        self.assertGreater(summary["warmup_requests"], 10)
+        self.assertEqual(summary["completed_requests"], 10)
+        self.assertEqual(summary["new_connections"], 0)  # Opened during warm-up
+
+    async def test_warmup_is_left_out_of_live_metrics(self):
+        live = LiveMetrics(interval=60)
+        async with LocalServer() as server:
+            tester = LoadTester(
+                server.url("/"),
+                concurrency=2,
+                total_requests=10,
+                qps=200,
+                warmup=0.1,
+                live=live,
+            )
+            await tester.run_test()
+        self.assertGreater(tester.get_results().warmup_requests, 10)
+        self.assertEqual(live.total_requests, 10)
+
+    async def test_pinned_host(self):
+        """A pinned host is never looked up."""
+        resolver = CachedResolver({"service.invalid": "127.0.0.1"})
+        hosts = await resolver.resolve("service.invalid", 8080)
+        self.assertEqual(hosts[0]["host"], "127.0.0.1")
+        self.assertEqual(hosts[0]["family"], socket.AF_INET)
+        async with LocalServer() as server:
+            url = server.url("/").replace("127.0.0.1", "service.invalid")
+            for engine in ("aiohttp", "raw"):
+                summary = await self.run_tester(
+                    url,
+                    total_requests=5,
+                    resolve={"service.invalid": "127.0.0.1"},
+                    engine=engine,
+                )
+                with self.subTest(engine=engine):
+                    self.assertEqual(summary["completed_requests"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
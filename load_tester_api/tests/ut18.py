@@ -0,0 +1,118 @@
+import socket
+import unittest
+from load_tester_api import AbortPolicy, LoadTester
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TestAbort(unittest.IsolatedAsyncioTestCase):
+
+    async def run_tester(self, url, **options):
+        tester = LoadTester(url, preflight=False, **options)
+        await tester.run_test()
+        return tester.get_results()
+
+    def test_parse(self):
+        policy = AbortPolicy.parse("errors>5%, p99.9>2s, consecutive>10, window=30s")
+        self.assertEqual(policy.max_error_rate, 0.05)
+        self.assertEqual(policy.latency_ms, 2000)
+        self.assertEqual(policy.percentile, 99.9)
+        self.assertEqual(policy.max_consecutive_errors, 10)
+        self.assertEqual(policy.window, 30)
+        with self.assertRaises(LoadTesterError):
+            AbortPolicy.parse("latency>2s")
+        with self.assertRaises(LoadTesterError):
+            AbortPolicy.parse("window=30s")  # No condition
+
+    async def test_consecutive_connection_errors(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]  # Nothing listens here
+        results = await self.run_tester(
+            f"http://127.0.0.1:{port}/",
+            concurrency=1,
+            total_requests=1000,
+            abort="consecutive>5",
+        )
+        self.assertIn("6 consecutive requests", results.abort_reason)
+        self.assertEqual(results.sent_requests, 6)
+        self.assertEqual(results.total_requests, 6)
+        self.assertEqual(results.connection_errors, 6)
+
+    async def test_error_rate_window(self):
+        """A failing target stops the run; every sent request is accounted for."""
+        async with LocalServer() as server:
+            results = await self.run_tester(
+                server.url("/status/503"),
+                concurrency=4,
+                total_requests=100000,
+                abort="errors>50%,window=0.5s",
+            )
+        self.assertTrue(results.abort_reason.startswith("error rate 100.00%"))
+        self.assertLess(results.sent_requests, 100000)
+        self.assertEqual(
+            results.completed_requests + results.cancelled_requests,
+            results.sent_requests,
+        )
+        self.assertEqual(results.summary()["abort_reason"], results.abort_reason)
+
+    async def test_latency_window_cancels_in_flight(self):
+        async with LocalServer() as server:
+            results = await self.run_tester(
+                server.url("/delay?ms=50"),
+                concurrency=10,
+                total_requests=10000,
+                abort="p99>10ms,window=0.5s",
+            )
+        self.assertTrue(results.abort_reason.startswith("p99"))
+        self.assertGreater(results.cancelled_requests, 0)
+        self.assertLess(results.total_test_time, 2)
+
+    async def test_request_timeout(self):
+        async with LocalServer() as server:
+            for engine in ("aiohttp", "raw"):
+                results = await self.run_tester(
+                    server.url("/delay?ms=500"),
+                    concurrency=2,
+                    total_requests=4,
+                    timeout=0.05,
+                    engine=engine,
+                )
+                with self.subTest(engine=engine):
+                    self.assertEqual(results.timeout_errors, 4)
+                    self.assertLess(results.total_test_time, 0.5)
+                    self.assertIsNone(results.abort_reason)
+
+    async def test_raw_timeouts_close_their_connections(self):
+        """A timed-out request's connection is closed, never left open and busy."""
+        async with LocalServer() as server:
+            tester = LoadTester(
+                server.url("/delay?ms=3000"),
+                preflight=False,
+                concurrency=2,
+                total_requests=10,
+                timeout=0.05,
+                engine="raw",
+            )
+            engine = tester.engine
+            created, open_counts = [], []
+            connect = engine.connect
+
+            async def counting_connect():
+                open_counts.append(
+                    sum(not connection.transport.is_closing() for connection in created)
+                )
+                connection, connect_time = await connect()
+                created.append(connection)
+                return connection, connect_time
+
+            engine.connect = counting_connect
+            await tester.run_test()
+        results = tester.get_results()
+        self.assertEqual(results.timeout_errors, 10)
+        self.assertEqual(len(created), 10)  # One per request, each closed on timeout
+        self.assertLessEqual(max(open_counts), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
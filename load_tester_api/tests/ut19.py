@@ -0,0 +1,96 @@
+import asyncio
+import os
+import pstats
+import tempfile
+import time
+import unittest
+from load_tester_api import LoadTester, TestResult
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TestGeneratorMonitor(unittest.IsolatedAsyncioTestCase):
+
+    async def run_tester(self, url, **options):
+        tester = LoadTester(url, preflight=False, monitor_interval=0.1, **options)
+        await tester.run_test()
+        return tester.get_results()
+
+    async def test_samples_attached_to_summary(self):
+        async with LocalServer() as server:
+            results = await self.run_tester(
+                server.url("/"), concurrency=4, qps=200, duration=0.6
+            )
+        generator = results.summary()["generator"]
+        self.assertGreaterEqual(generator["samples"], 4)
+        self.assertEqual(len(generator["series"]), generator["samples"])
+        self.assertGreater(generator["cpu"]["max"], 0)
+        self.assertGreater(generator["rss_kb"], 0)
+        self.assertLessEqual(generator["in_flight"]["max"], 4)
+        self.assertEqual(generator["intended_concurrency"], 4)
+
+    async def test_blocked_event_loop_is_reported(self):
+        """A client that blocks its own event loop is called out."""
+
+        async def hog():
+            while True:
+                time.sleep(0.03)  # Blocks the loop, like CPU-heavy client code
+                await asyncio.sleep(0.005)
+
+        hog_task = asyncio.ensure_future(hog())
+        try:
+            async with LocalServer() as server:
+                # Enough samples for the randomly placed probes to hit a stall
+                results = await self.run_tester(
+                    server.url("/"), concurrency=2, qps=50, duration=1.5
+                )
+        finally:
+            hog_task.cancel()
+        self.assertGreater(results.summary()["generator"]["loop_lag"]["max"], 20)
+        self.assertTrue(
+            any(w.startswith("Event loop lag") for w in results.generator_warnings)
+        )
+
+    async def test_busy_workers_at_target_rate(self):
+        async with LocalServer() as server:
+            results = await self.run_tester(
+                server.url("/delay?ms=100"), concurrency=2, qps=100, duration=0.6
+            )
+        self.assertGreater(results.summary()["generator"]["saturated"], 0.5)
+        self.assertTrue(
+            any(w.startswith("All 2 workers were busy") for w in results.generator_warnings)
+        )
+
+    def test_merge_across_processes(self):
+        first, second = TestResult(0), TestResult(0)
+        first.generator = {"processes": 1, "samples": 2, "cpu_total": 1.0, "cpu_max": 0.6}
+        second.generator = {"processes": 1, "samples": 2, "cpu_total": 0.4, "cpu_max": 0.3}
+        second.generator_warnings = ["slow"]
+        first.merge(TestResult.from_dict(second.to_dict()))
+        self.assertEqual(first.generator["processes"], 2)
+        self.assertEqual(first.generator["cpu_total"], 1.4)
+        self.assertEqual(first.generator["cpu_max"], 0.6)
+        self.assertEqual(first.generator_warnings, ["slow"])
+
+    async def test_profilers_write_output(self):
+        with tempfile.TemporaryDirectory() as folder:
+            async with LocalServer() as server:
+                for mode in ("cprofile", "sample"):
+                    path = os.path.join(folder, mode)
+                    await self.run_tester(
+                        server.url("/"),
+                        concurrency=2,
+                        total_requests=200,
+                        profiler=mode,
+                        profiler_output=path,
+                    )
+            stats = pstats.Stats(os.path.join(folder, "cprofile"))
+            self.assertTrue(any(name[2] == "fetch" for name in stats.stats))
+            with open(os.path.join(folder, "sample")) as folded:
+                lines = folded.read().splitlines()
+            self.assertTrue(lines)
+            stack, count = lines[0].rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
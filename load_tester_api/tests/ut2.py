@@ -0,0 +1,65 @@
+import unittest
+from itertools import islice
+from load_tester_api import LoadTester
+from load_tester_api.scheduler import make_schedule
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TestArrivalSchedules(unittest.TestCase):
+
+    def test_constant_offsets_are_absolute(self):
+        """Constant arrivals land exactly on multiples of 1/rate."""
+        offsets = list(islice(make_schedule("constant", 1000).offsets(), 1001))
+        self.assertEqual(offsets[0], 0.0)
+        self.assertAlmostEqual(offsets[-1], 1.0, places=9)
+
+    def test_poisson_mean_rate(self):
+        """Poisson arrivals average out to the requested rate."""
+        schedule = make_schedule("poisson", 500, seed=1)
+        offsets = list(islice(schedule.offsets(), 20001))
+        self.assertAlmostEqual(20000 / offsets[-1], 500, delta=25)
+
+    def test_burst_groups(self):
+        """Burst arrivals send burst_size requests at the same instant."""
+        schedule = make_schedule("burst", 100, burst_size=5)
+        offsets = list(islice(schedule.offsets(), 10))
+        self.assertEqual(offsets[:5], [0.0] * 5)
+        self.assertEqual(offsets[5:], [0.05] * 5)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(LoadTesterError):
+            make_schedule("sine", 10)
+
+
+class TestOpenLoop(unittest.IsolatedAsyncioTestCase):
+
+    async def test_achieved_rate_tracks_target(self):
+        """An open-loop run reports intended and achieved rate."""
+        async with LocalServer() as server:
+            tester = LoadTester(
+                server.url(), concurrency=10, total_requests=100, qps=200
+            )
+            await tester.run_test()
+        summary = tester.get_results().summary()
+        self.assertEqual(summary["completed_requests"], 100)
+        self.assertEqual(summary["arrival_mode"], "constant")
+        self.assertEqual(summary["intended_rate"], 200)
+        self.assertAlmostEqual(summary["achieved_rate"], 200, delta=20)
+
+    async def test_latency_includes_queueing(self):
+        """Latency is measured from the intended send time, not from dispatch."""
+        async with LocalServer() as server:
+            tester = LoadTester(
+                server.url("/delay?ms=50"), concurrency=1, total_requests=10, qps=100
+            )
+            await tester.run_test()
+        summary = tester.get_results().summary()
+        # One slot and 50ms responses at 100 req/s: later requests queue behind
+        # earlier ones, so the worst latency is far above the service time
+        self.assertGreater(summary["total_times"]["max"], 300)
+        self.assertGreater(summary["send_lag"]["max"], 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
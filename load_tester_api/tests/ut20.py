@@ -0,0 +1,62 @@
+import random
+import unittest
+from array import array
+from statistics import mean, stdev
+from load_tester_api.result import TestResult
+from load_tester_api.stats import interpolate, sample_stats
+
+
+class TestSampleStats(unittest.TestCase):
+
+    def make_result(self, samples, **options):
+        result = TestResult(len(samples), **options)
+        for value in samples:
+            result.add_times(0, value, 0, value)
+        return result
+
+    def test_interpolated_percentiles(self):
+        """Percentiles interpolate between samples; p100 is the maximum."""
+        result = self.make_result(
+            [0.001, 0.002, 0.003, 0.004, 0.005], percentiles=[90, 99.9, 100]
+        )
+        summary = result.summary()
+        self.assertAlmostEqual(summary["percentiles"]["90"], 4.6)
+        self.assertAlmostEqual(summary["percentiles"]["99.9"], 4.996)
+        self.assertAlmostEqual(summary["percentiles"]["100"], 5)
+        self.assertAlmostEqual(summary["total_times"]["median"], 3)
+        self.assertEqual(interpolate([1.0], 99), 1.0)
+
+    def test_matches_statistics_module(self):
+        rng = random.Random(3)
+        samples = [rng.lognormvariate(-4, 1) for _ in range(10000)]
+        stats = sample_stats(array("d", samples), [99])
+        self.assertAlmostEqual(stats["mean"], mean(samples), places=12)
+        self.assertAlmostEqual(stats["stdev"], stdev(samples), places=12)
+        self.assertEqual(stats["min"], min(samples))
+        self.assertEqual(stats["max"], max(samples))
+
+    def test_array_storage_round_trip(self):
+        result = self.make_result([0.1, 0.2])
+        self.assertIsInstance(result.latencies, array)
+        restored = TestResult.from_dict(result.to_dict())
+        self.assertEqual(restored.latencies, array("d", [0.1, 0.2]))
+        restored.merge(result)
+        self.assertEqual(len(restored.latencies), 4)
+
+    def test_histogram_export(self):
+        """Raw and histogram mode export the same latency buckets."""
+        samples = [0.00015, 0.003, 0.0031, 0.7]
+        expected = [
+            {"le": 0.2, "count": 1},
+            {"le": 5, "count": 2},
+            {"le": 1000, "count": 1},
+        ]
+        for histogram in (False, True):
+            with self.subTest(histogram=histogram):
+                summary = self.make_result(samples, histogram=histogram).summary()
+                self.assertEqual(summary["histogram"], expected)
+        self.assertEqual(TestResult(1).summary()["histogram"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
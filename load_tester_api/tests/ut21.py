@@ -0,0 +1,117 @@
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+from load_tester_api import cli, formatter
+from load_tester_api.compare import Comparison, RegressionBudget, RunData
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.result import TestResult
+from load_tester_api.samplelog import SampleLog
+
+
+class TestCompare(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.folder = directory.name
+
+    def write_samples(self, name, latency, rate=200, seconds=10, errors=0, seed=1):
+        # A synthetic run: `rate` requests per second with lognormal latency
+        # around `latency` seconds; the first `errors` requests time out
+        rng = random.Random(seed)
+        path = os.path.join(self.folder, name)
+        log = SampleLog(path)
+        log.open()
+        for index in range(rate * seconds):
+            if index < errors:
+                log.record(1000.0 + index / rate, 1.0, error="timeout_errors")
+            else:
+                log.record(
+                    1000.0 + index / rate,
+                    latency * rng.lognormvariate(0, 0.3),
+                    status=200,
+                )
+        log.close()
+        return path
+
+    def compare(self, baseline, candidate, **options):
+        return Comparison(
+            RunData.load([baseline]), RunData.load([candidate]), seed=7, **options
+        ).run()
+
+    def test_budget_parse(self):
+        budget = RegressionBudget.parse("p99=10%, p50=5ms, throughput=5%, errors=0.5%")
+        self.assertEqual(budget.latency, {99: (10, "%"), 50: (5, "ms")})
+        self.assertEqual(budget.throughput, 0.05)
+        self.assertEqual(budget.errors, 0.005)
+        with self.assertRaises(LoadTesterError):
+            RegressionBudget.parse("throughput=5ms")
+        with self.assertRaises(LoadTesterError):
+            RegressionBudget.parse("latency=5%")
+
+    def test_raw_samples_regression(self):
+        """A clearly slower candidate fails; rerunning the baseline passes."""
+        baseline = self.write_samples("base", 0.010)
+        slower = self.write_samples("slower", 0.013, seed=2)
+        same = self.write_samples("same", 0.010, seed=3)
+
+        report = self.compare(baseline, slower)
+        self.assertFalse(report["passed"])
+        self.assertIn("p99", report["regressions"])
+        p99 = next(row for row in report["metrics"] if row["metric"] == "p99")
+        self.assertTrue(p99["significant"])
+        self.assertLess(p99["ci"][0], 0.3)
+        self.assertGreater(p99["ci"][1], 0.2)
+        throughput = report["metrics"][0]
+        self.assertAlmostEqual(throughput["baseline"], 200, delta=1)
+        self.assertIsNotNone(throughput["ci"])
+
+        report = self.compare(baseline, same)
+        self.assertTrue(report["passed"])
+        p50 = next(row for row in report["metrics"] if row["metric"] == "p50")
+        self.assertLess(p50["ci"][0], 0)
+        self.assertGreater(p50["ci"][1], 0)
+
+    def test_error_rate_and_absolute_budget(self):
+        baseline = self.write_samples("base", 0.010)
+        failing = self.write_samples("failing", 0.0102, errors=100)
+        report = self.compare(baseline, failing, budget="errors=1%,p50=1ms")
+        self.assertEqual(report["regressions"], ["error_rate"])
+        self.assertAlmostEqual(report["metrics"][1]["candidate"], 0.05)
+
+    async def test_result_files_and_exit_status(self):
+        """Formatted result files compare on point values, without intervals."""
+        paths = []
+        for name, latency in (("base.json", 0.010), ("slow.json", 0.020)):
+            result = TestResult(100)
+            result.start_timestamp, result.end_timestamp = 0, 1
+            result.total_test_time = 1
+            for _ in range(100):
+                result.add_times(0, 0, 0, latency)
+            paths.append(os.path.join(self.folder, name))
+            with open(paths[-1], "w") as f:
+                json.dump(formatter.format_results(result.summary()), f)
+        report = self.compare(*paths)
+        self.assertEqual(report["regressions"], ["p99"])
+        self.assertIsNone(report["metrics"][2]["ci"])
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            status = await cli.main(
+                ["compare", "--baseline", paths[0], "--candidate", paths[1]]
+            )
+        self.assertEqual(status, 1)
+        self.assertIn("REGRESSION", output.getvalue())
+        with contextlib.redirect_stdout(io.StringIO()):
+            status = await cli.main(
+                ["compare", "--baseline", paths[0], "--candidate", paths[0], "--json"]
+            )
+        self.assertEqual(status, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+from load_tester_api import LiveMetrics, LoadTester, ResponseCheck, Scenario
+from load_tester_api.checks import compile_json_path
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TestResponseChecks(unittest.IsolatedAsyncioTestCase):
+
+    async def run_tester(self, url, **options):
+        tester = LoadTester(url, preflight=False, **options)
+        await tester.run_test()
+        return tester.get_results()
+
+    def test_compiled_checks(self):
+        self.assertEqual(compile_json_path("$.items[0].id"), ("items", 0, "id"))
+        self.assertEqual(compile_json_path("items.0.id"), ("items", 0, "id"))
+        check = ResponseCheck.from_dict(
+            {
+                "status": [200, 201],
+                "headers": {"Content-Type": "json"},
+                "body_contains": "items",
+                "json": {"$.items[0].id": 1, "$.status": "ok"},
+            }
+        )
+        headers = {"content-type": "application/json"}
+        self.assertTrue(check.accepts(201))
+        self.assertFalse(check.accepts(500))
+        self.assertIsNone(check.validate(headers, b'{"status": "ok", "items": [{"id": 1}]}'))
+        self.assertEqual(
+            check.validate(headers, b'{"status": "down", "items": [{"id": 1}]}'),
+            "$.status is 'down', expected 'ok'",
+        )
+        self.assertEqual(check.validate(headers, b'{"items": []}'), "$.items[0].id missing")
+        self.assertEqual(check.validate({}, b""), "header content-type missing")
+        with self.assertRaises(LoadTesterError):
+            ResponseCheck.from_dict({"body": "ok"})
+
+    def test_sampling_is_exact(self):
+        check = ResponseCheck(body_contains="ok", sample=0.25)
+        self.assertEqual(sum(check.due() for _ in range(100)), 25)
+
+    async def test_fast_error_json_is_counted(self):
+        """200 responses carrying an error document fail validation."""
+        async with LocalServer() as server:
+            for engine in ("aiohttp", "raw"):
+                results = await self.run_tester(
+                    server.url("/json?status=error"),
+                    concurrency=2,
+                    total_requests=20,
+                    engine=engine,
+                    check={"json": {"$.status": "ok"}},
+                )
+                with self.subTest(engine=engine):
+                    self.assertEqual(results.completed_requests, 20)
+                    self.assertEqual(results.validation_errors, 20)
+                    self.assertEqual(results.failed_requests, 20)
+                    self.assertEqual(results.status_code_errors, 0)
+                    self.assertEqual(results.error_types, {"Validation failed": 20})
+
+    async def test_expected_status_and_sampling(self):
+        async with LocalServer() as server:
+            results = await self.run_tester(
+                server.url("/status/201"),
+                total_requests=40,
+                check={"status": [201], "body_contains": "status", "sample": 0.1},
+            )
+        self.assertEqual(results.failed_requests, 0)
+        self.assertEqual(results.validated_responses, 4)
+        summary = results.summary()
+        self.assertEqual(summary["validation_errors"], 0)
+        self.assertEqual(summary["validated_responses"], 4)
+
+    async def test_live_errors_follow_the_check(self):
+        """Live metrics count errors by the check's verdict, not by status 200."""
+        async with LocalServer() as server:
+            live = LiveMetrics(interval=60)
+            await self.run_tester(
+                server.url("/status/201"),
+                total_requests=10,
+                check={"status": [201]},
+                live=live,
+            )
+            self.assertEqual(live.total_requests, 10)
+            self.assertEqual(live.total_errors, 0)
+            live = LiveMetrics(interval=60)
+            await self.run_tester(
+                server.url("/json?status=error"),
+                total_requests=10,
+                check={"json": {"$.status": "ok"}},
+                live=live,
+            )
+            self.assertEqual(live.total_errors, 10)
+
+    async def test_scenario_checks(self):
+        async with LocalServer() as server:
+            scenario = Scenario.from_dict(
+                {
+                    "base_url": server.url("/"),
+                    "requests": [
+                        {"name": "good", "path": "/json", "check": {"json": {"status": "ok"}}},
+                        {
+                            "name": "bad",
+                            "path": "/json?status=down",
+                            "check": {"json": {"status": "ok"}},
+                        },
+                    ],
+                }
+            )
+            results = await self.run_tester(None, scenario=scenario, total_requests=40)
+        self.assertEqual(results.endpoints["good"].validation_errors, 0)
+        self.assertEqual(
+            results.endpoints["bad"].validation_errors, results.endpoints["bad"].sent_requests
+        )
+        self.assertEqual(results.validation_errors, results.endpoints["bad"].sent_requests)
+        with self.assertRaises(LoadTesterError):
+            LoadTester("http://a/", body_mode="discard", check={"body_contains": "ok"})
+
+
+if __name__ == "__main__":
+    unittest.main()
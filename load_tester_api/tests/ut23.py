@@ -0,0 +1,96 @@
+import unittest
+from load_tester_api import StreamTester, TestResult, formatter
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TestStreaming(unittest.IsolatedAsyncioTestCase):
+
+    async def run_tester(self, url, **options):
+        tester = StreamTester(url, monitor_interval=None, **options)
+        await tester.run_test()
+        return tester.get_results()
+
+    async def test_websocket_round_trips(self):
+        """Every message sent at the target rate is answered and timed."""
+        async with LocalServer() as server:
+            results = await self.run_tester(
+                server.url("/ws").replace("http", "ws"),
+                connections=20,
+                rate=200,
+                duration=0.5,
+            )
+        streams = results.summary()["streams"]
+        self.assertEqual(streams["opened"], 20)
+        self.assertEqual(streams["peak_open"], 20)
+        self.assertEqual(streams["drops"], 0)
+        # Messages due before the first connection opened are skipped
+        self.assertAlmostEqual(
+            streams["messages_sent"] + streams["skipped_messages"], 100, delta=2
+        )
+        self.assertGreater(streams["messages_sent"], 50)
+        self.assertEqual(streams["replies"], streams["messages_sent"])
+        self.assertEqual(len(results.latencies), results.completed_requests)
+        self.assertEqual(len(results.setup_times), 20)
+        self.assertEqual(results.failed_requests, 0)
+        formatted = formatter.format_results(results.summary())
+        self.assertEqual(formatted["Streams"]["Connections opened"], 20)
+        self.assertEqual(formatted["Complete requests"], streams["replies"])
+
+    async def test_drops_and_reconnects(self):
+        async with LocalServer() as server:
+            results = await self.run_tester(
+                server.url("/ws?close_after=5").replace("http", "ws"),
+                connections=4,
+                rate=200,
+                duration=0.5,
+                reconnect_delay=0.01,
+            )
+        streams = results.streams
+        self.assertGreater(streams["drops"], 0)
+        self.assertGreater(streams["reconnects"], 0)
+        self.assertEqual(streams["connections"], 4 + streams["reconnects"])
+        self.assertEqual(results.error_types["Connection closed"], streams["drops"])
+        # Messages are lost only when a connection closes with them in flight
+        self.assertEqual(
+            results.completed_requests + results.failed_requests, results.sent_requests
+        )
+
+    async def test_server_sent_events(self):
+        async with LocalServer() as server:
+            results = await self.run_tester(
+                server.url("/events?count=5&ms=5"),
+                connections=3,
+                mode="stream",
+                duration=0.3,
+                reconnect_delay=None,
+            )
+        summary = results.summary()["streams"]
+        self.assertEqual(summary["messages_received"], 15)
+        self.assertEqual(summary["drops"], 3)  # The server ended each stream
+        self.assertEqual(summary["messages_sent"], 0)
+        with self.assertRaises(LoadTesterError):
+            StreamTester("http://localhost/events", mode="stream", rate=10)
+
+    async def test_many_idle_connections(self):
+        """Idle connections are held without timers; results merge across processes."""
+        async with LocalServer() as server:
+            results = await self.run_tester(
+                server.url("/ws").replace("http", "ws"),
+                connections=500,
+                connect_rate=5000,
+                duration=2.0,
+            )
+        self.assertEqual(results.streams["peak_open"], 500)
+        self.assertEqual(results.streams["open_at_end"], 500)
+        self.assertEqual(results.streams.get("setup_failures", 0), 0)
+
+        restored = TestResult.from_dict(results.to_dict())
+        restored.merge(results)
+        summary = restored.summary()["streams"]
+        self.assertEqual(summary["opened"], 1000)
+        self.assertEqual(len(restored.setup_times), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import math
+import random
+import unittest
+from statistics import mean, stdev
+from load_tester_api import LoadTester, LogHistogram
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.histogram import PAGE_SIZE
+from load_tester_api.result import TestResult
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TestLogHistogram(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(7)
+        self.samples = [rng.lognormvariate(-4, 1) for _ in range(20000)]
+
+    def test_percentiles_within_precision(self):
+        """Percentiles are within the configured relative precision."""
+        histogram = LogHistogram(precision=3)
+        for value in self.samples:
+            histogram.record(value)
+        ordered = sorted(self.samples)
+        for percentile in (50, 90, 99, 99.9):
+            exact = ordered[max(0, math.ceil(len(ordered) * percentile / 100) - 1)]
+            self.assertAlmostEqual(
+                histogram.percentile(percentile), exact, delta=exact * 1e-3
+            )
+        self.assertEqual(histogram.percentile(100), max(self.samples))
+        self.assertAlmostEqual(histogram.mean(), mean(self.samples), places=9)
+        self.assertAlmostEqual(histogram.stdev(), stdev(self.samples), places=6)
+
+    def test_merge(self):
+        """Merging two halves gives the same histogram as recording everything."""
+        whole, first, second = LogHistogram(), LogHistogram(), LogHistogram()
+        for index, value in enumerate(self.samples):
+            whole.record(value)
+            (first if index % 2 else second).record(value)
+        first.merge(second)
+        self.assertEqual(list(first.buckets()), list(whole.buckets()))
+        self.assertEqual(first.count, whole.count)
+        self.assertEqual(first.max, whole.max)
+
+    def test_memory_follows_the_recorded_range(self):
+        """Only the pages covering recorded values are allocated."""
+        histogram = LogHistogram(precision=5)
+        for value in self.samples:
+            histogram.record(value)
+        allocated = sum(page is not None for page in histogram.pages)
+        # The samples span under 4 decades: ~115k buckets each at precision 5
+        self.assertLess(allocated * PAGE_SIZE, 4.5e5)
+        self.assertLess(allocated, len(histogram.pages) / 2)
+        self.assertEqual(sum(bucket for _, bucket in histogram.buckets()), len(self.samples))
+
+    def test_merge_incompatible(self):
+        with self.assertRaises(LoadTesterError):
+            LogHistogram(precision=2).merge(LogHistogram(precision=3))
+
+    def test_summary_matches_raw_mode(self):
+        """Histogram-mode summaries agree with raw-sample summaries."""
+        raw, bucketed = TestResult(len(self.samples)), TestResult(
+            len(self.samples), histogram=True
+        )
+        for value in self.samples:
+            raw.add_times(value / 4, value / 2, value / 4, value)
+            bucketed.add_times(value / 4, value / 2, value / 4, value)
+        raw_summary, bucketed_summary = raw.summary(), bucketed.summary()
+        for key in ("min", "mean", "max", "median", "stdev"):
+            expected = raw_summary["total_times"][key]
+            self.assertAlmostEqual(
+                bucketed_summary["total_times"][key], expected, delta=expected * 2e-3
+            )
+
+
+class TestHistogramRun(unittest.IsolatedAsyncioTestCase):
+
+    async def test_run_in_histogram_mode(self):
+        async with LocalServer() as server:
+            tester = LoadTester(
+                server.url(), concurrency=5, total_requests=50, histogram=True
+            )
+            await tester.run_test()
+        summary = tester.get_results().summary()
+        self.assertEqual(summary["completed_requests"], 50)
+        self.assertIn("99", summary["percentiles"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from load_tester_api import LoadTester, ShardedLoadTester
+from load_tester_api.result import TestResult
+from load_tester_api.sharding import split_evenly
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TestMerge(unittest.TestCase):
+
+    def test_split_evenly(self):
+        self.assertEqual(split_evenly(10, 3), [4, 3, 3])
+        self.assertEqual(sum(split_evenly(1001, 7)), 1001)
+
+    def test_merge_counts_and_wall_clock(self):
+        """Merged results add counters and span the union of the test windows."""
+        merged = TestResult(4)
+        for start, latency in ((100.0, 0.1), (100.5, 0.3)):
+            part = TestResult(2)
+            part.start_timestamp, part.end_timestamp = start, start + 1
+            part.add_times(0, 0, 0, latency)
+            part.add_times(0, 0, 0, latency)
+            part.timeout_errors = 1
+            merged.merge(part)
+        self.assertEqual(merged.completed_requests, 4)
+        self.assertEqual(merged.timeout_errors, 2)
+        self.assertAlmostEqual(merged.total_test_time, 1.5)
+        self.assertEqual(sorted(merged.latencies), [0.1, 0.1, 0.3, 0.3])
+
+
+class TestShardedRun(unittest.IsolatedAsyncioTestCase):
+
+    async def test_sharded_matches_single_process_shape(self):
+        """A sharded run reports the same fields as a single-process run."""
+        async with LocalServer() as server:
+            sharded = ShardedLoadTester(
+                server.url(), workers=2, concurrency=4, total_requests=40, start_delay=0
+            )
+            await sharded.run_test()
+            single = LoadTester(server.url(), concurrency=4, total_requests=40)
+            await single.run_test()
+        sharded_summary = sharded.get_results().summary()
+        self.assertEqual(sharded_summary["completed_requests"], 40)
+        self.assertEqual(sharded_summary["concurrency_level"], 4)
+        self.assertEqual(
+            set(sharded_summary), set(single.get_results().summary())
+        )
+        self.assertGreater(sharded_summary["total_test_time"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from load_tester_api import LoadTester
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.profile import LoadProfile, Stage, parse_duration
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TestLoadProfile(unittest.TestCase):
+
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration("2m"), 120)
+        self.assertEqual(parse_duration("250ms"), 0.25)
+        self.assertEqual(parse_duration(90), 90)
+        with self.assertRaises(LoadTesterError):
+            parse_duration("soon")
+
+    def test_ramp_hold_step(self):
+        """Ramps interpolate from the previous target, holds keep the value."""
+        profile = LoadProfile.from_dict(
+            {
+                "start_rate": 100,
+                "stages": [
+                    {"duration": "2m", "rate": 5000, "ramp": True},
+                    {"duration": "10m", "rate": 5000},
+                    {"duration": "1m", "rate": 1000},
+                ],
+            }
+        )
+        self.assertEqual(profile.duration, 780)
+        self.assertEqual(profile.rate_at(0), 100)
+        self.assertAlmostEqual(profile.rate_at(60), 2550)
+        self.assertEqual(profile.rate_at(300), 5000)
+        self.assertEqual(profile.rate_at(750), 1000)
+        self.assertEqual(profile.stage_index(130), 1)
+
+    def test_mixed_rate_stages_rejected(self):
+        with self.assertRaises(LoadTesterError):
+            LoadProfile([Stage(1, rate=10), Stage(1, concurrency=2)])
+
+
+class TestTimeBoundRuns(unittest.IsolatedAsyncioTestCase):
+
+    async def test_duration_run(self):
+        async with LocalServer() as server:
+            tester = LoadTester(server.url(), concurrency=2, qps=100, duration=0.5)
+            await tester.run_test()
+        summary = tester.get_results().summary()
+        self.assertAlmostEqual(summary["completed_requests"], 50, delta=3)
+        self.assertEqual(summary["total_requests"], summary["completed_requests"])
+
+    async def test_per_stage_results(self):
+        """Each stage reports its own throughput at its own target rate."""
+        profile = LoadProfile(
+            [Stage(0.5, rate=40, name="low"), Stage(0.5, rate=200, name="high")]
+        )
+        async with LocalServer() as server:
+            tester = LoadTester(server.url(), concurrency=4, profile=profile)
+            await tester.run_test()
+        stages = tester.get_results().summary()["stages"]
+        self.assertEqual([stage["name"] for stage in stages], ["low", "high"])
+        self.assertAlmostEqual(stages[0]["completed_requests"], 20, delta=3)
+        self.assertAlmostEqual(stages[1]["completed_requests"], 100, delta=10)
+
+    async def test_concurrency_stages(self):
+        """Closed-loop stages change the number of active workers live."""
+        profile = LoadProfile(
+            [Stage(0.3, concurrency=1), Stage(0.3, concurrency=4)]
+        )
+        async with LocalServer() as server:
+            tester = LoadTester(
+                server.url("/delay?ms=20"), concurrency=1, profile=profile
+            )
+            await tester.run_test()
+        stages = tester.get_results().summary()["stages"]
+        self.assertGreater(
+            stages[1]["completed_requests"], 2.5 * stages[0]["completed_requests"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from load_tester_api import LoadTester
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TestPhaseTimings(unittest.IsolatedAsyncioTestCase):
+
+    async def run_tester(self, path, host="127.0.0.1", **options):
+        async with LocalServer() as server:
+            url = server.url(path).replace("127.0.0.1", host)
+            tester = LoadTester(url, **options)
+            await tester.run_test()
+        return tester.get_results().summary()
+
+    async def test_keep_alive_requests_counted(self):
+        """Reused pooled connections are counted as keep-alive requests."""
+        summary = await self.run_tester("/", concurrency=2, total_requests=20)
+        self.assertEqual(summary["completed_requests"], 20)
+        self.assertGreaterEqual(summary["keep_alive_requests"], 18)
+        # Only the handful of new connections pay a connect cost
+        self.assertEqual(summary["connection_times"]["min"], 0)
+        self.assertGreater(summary["connection_times"]["max"], 0)
+
+    async def test_waiting_and_processing_split(self):
+        """Waiting covers server think time; processing covers the body read."""
+        summary = await self.run_tester(
+            "/delay?ms=50", concurrency=1, total_requests=3
+        )
+        self.assertGreater(summary["waiting_times"]["min"], 45)
+        self.assertLess(summary["processing_times"]["max"], 45)
+
+        summary = await self.run_tester(
+            "/large?size=8000000", concurrency=1, total_requests=2
+        )
+        self.assertGreater(summary["processing_times"]["min"], 0.1)
+
+    async def test_dns_phase(self):
+        # Without the pre-flight check the first request resolves the host
+        summary = await self.run_tester(
+            "/", host="localhost", concurrency=1, total_requests=2, preflight=False
+        )
+        self.assertGreater(summary["dns_times"]["max"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
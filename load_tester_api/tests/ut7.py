@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import aiohttp
+from load_tester_api import LiveMetrics, LoadTester
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TestLiveMetrics(unittest.IsolatedAsyncioTestCase):
+
+    async def test_jsonl_windows(self):
+        """Each interval produces one JSONL line with throughput and percentiles."""
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "metrics.jsonl")
+            live = LiveMetrics(interval=0.2, jsonl_path=path)
+            async with LocalServer() as server:
+                tester = LoadTester(
+                    server.url(), concurrency=2, qps=100, duration=0.7, live=live
+                )
+                await tester.run_test()
+            with open(path) as f:
+                windows = [json.loads(line) for line in f]
+        self.assertGreaterEqual(len(windows), 3)
+        self.assertEqual(
+            sum(window["requests"] for window in windows),
+            tester.get_results().completed_requests,
+        )
+        self.assertAlmostEqual(windows[1]["requests_per_second"], 100, delta=20)
+        self.assertIn("p99", windows[1]["latency_ms"])
+        self.assertEqual(windows[1]["statuses"], {"200": windows[1]["requests"]})
+
+    async def test_prometheus_endpoint(self):
+        """The Prometheus endpoint exposes cumulative counters while running."""
+        live = LiveMetrics(interval=60, prometheus_port=0)
+        await live.start(time.perf_counter())
+        try:
+            live.record(0.01, 200, 10)
+            live.record(0.02, 503, 10, True)
+            live.record_error("timeout_errors")
+            live.sample(time.perf_counter())
+            port = live._runner.addresses[0][1]
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                    text = await response.text()
+        finally:
+            await live.stop()
+        self.assertIn("loadtester_requests_total 2", text)
+        self.assertIn('loadtester_responses_total{code="503"} 1', text)
+        self.assertIn('loadtester_request_errors_total{kind="timeout_errors"} 1', text)
+        self.assertIn('loadtester_latency_seconds{quantile="0.99"}', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import aiohttp
+from load_tester_api import LoadTester
+from load_tester_api.engines import AiohttpEngine
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.benchmarks.server import LocalServer
+
+SIZE = 3 * 1024 * 1024
+
+
+class TestBodyModes(unittest.IsolatedAsyncioTestCase):
+
+    async def run_mode(self, body_mode):
+        async with LocalServer() as server:
+            tester = LoadTester(
+                server.url(f"/large?size={SIZE}"),
+                concurrency=2,
+                total_requests=4,
+                body_mode=body_mode,
+            )
+            await tester.run_test()
+        return tester.get_results()
+
+    async def test_transfer_accounting_is_exact_in_every_mode(self):
+        """Streaming modes count exactly the same bytes as a full read."""
+        for body_mode in ("full", "head", "discard"):
+            with self.subTest(body_mode=body_mode):
+                results = await self.run_mode(body_mode)
+                self.assertEqual(results.completed_requests, 4)
+                self.assertEqual(results.html_transferred, 4 * SIZE)
+                self.assertEqual(results.document_length, SIZE)
+
+    async def test_head_keeps_prefix_only(self):
+        async with LocalServer() as server:
+            tester = LoadTester(server.url(), body_mode="head", body_limit=1)
+            engine = AiohttpEngine()
+            engine.tester = tester
+            async with aiohttp.ClientSession() as session:
+                async with session.get(server.url(f"/large?size={SIZE}")) as response:
+                    length, head = await engine.read_body(response)
+        self.assertEqual((length, head), (SIZE, b"x"))
+
+    async def test_head_spans_chunks(self):
+        """The kept prefix is assembled across chunks and never over-read."""
+        async with LocalServer() as server:
+            engine = AiohttpEngine()
+            async with aiohttp.ClientSession() as session:
+                for path, limit, expected in (
+                    ("/chunked?chunks=4", 2500, (4000, b"y" * 2500)),
+                    ("/", 1024, (2, b"ok")),
+                ):
+                    engine.tester = LoadTester(
+                        server.url(), body_mode="head", body_limit=limit
+                    )
+                    async with session.get(server.url(path)) as response:
+                        result = await engine.read_body(response)
+                    with self.subTest(path=path):
+                        self.assertEqual(result, expected)
+                        self.assertIsInstance(result[1], bytes)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(LoadTesterError):
+            LoadTester("http://127.0.0.1/", body_mode="skim")
+
+
+if __name__ == "__main__":
+    unittest.main()
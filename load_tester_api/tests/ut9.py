@@ -0,0 +1,118 @@
+import asyncio
+import socket
+import unittest
+from load_tester_api import LoadTester, RawHTTPEngine
+from load_tester_api.errors import LoadTesterError
+from load_tester_api.benchmarks.server import LocalServer
+
+
+class TestEngines(unittest.IsolatedAsyncioTestCase):
+
+    async def run_tester(self, path, **options):
+        async with LocalServer() as server:
+            tester = LoadTester(server.url(path), **options)
+            await tester.run_test()
+        return tester.get_results().summary()
+
+    async def test_raw_matches_aiohttp(self):
+        """Both engines report the same counts and transfer totals."""
+        for path, length in (("/large?size=50000", 50000), ("/chunked", 4000)):
+            summaries = [
+                await self.run_tester(
+                    path, concurrency=4, total_requests=40, engine=engine
+                )
+                for engine in ("aiohttp", "raw")
+            ]
+            for summary in summaries:
+                with self.subTest(path=path):
+                    self.assertEqual(summary["completed_requests"], 40)
+                    self.assertEqual(summary["failed_requests"], 0)
+                    self.assertEqual(summary["html_transferred"], 40 * length)
+                    self.assertEqual(summary["document_length"], length)
+                    self.assertGreaterEqual(summary["keep_alive_requests"], 36)
+
+    async def test_pipelining(self):
+        """Pipelined requests are matched to their responses in order."""
+        summary = await self.run_tester(
+            "/", concurrency=8, total_requests=200, engine="raw", pipeline_depth=4
+        )
+        self.assertEqual(summary["completed_requests"], 200)
+        self.assertEqual(summary["html_transferred"], 200 * len("ok"))
+        self.assertEqual(summary["server_software"], "stand-in/1.0")
+
+    async def test_full_pipeline_waits_for_a_slot(self):
+        """With every slot taken, requests wait instead of dialing past the cap."""
+        async with LocalServer() as server:
+            engine = RawHTTPEngine()
+            tester = LoadTester(
+                server.url("/delay?ms=5"),
+                preflight=False,
+                concurrency=3,
+                total_requests=12,
+                engine=engine,
+            )
+            await engine.open(tester, 1)  # Room for one connection only
+            connect, opened = engine.connect, []
+
+            async def counting_connect():
+                opened.append(1)
+                return await connect()
+
+            engine.connect = counting_connect
+            try:
+                await tester.run_test()
+            finally:
+                await engine.close()
+        self.assertEqual(len(opened), 1)
+        self.assertEqual(tester.get_results().completed_requests, 12)
+
+    async def test_post_payload_and_status(self):
+        summary = await self.run_tester(
+            "/echo",
+            method="POST",
+            payload="hello",
+            total_requests=5,
+            engine="raw",
+            preflight=False,  # The preflight check is a GET
+        )
+        self.assertEqual(summary["html_transferred"], 5 * len("hello"))
+        summary = await self.run_tester(
+            "/status/503", total_requests=3, engine="raw", preflight=False
+        )
+        self.assertEqual(summary["completed_requests"], 3)
+        self.assertEqual(summary["failed_requests"], 3)
+
+    async def test_connection_refused(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        tester = LoadTester(
+            f"http://127.0.0.1:{port}/", total_requests=3, engine="raw", preflight=False
+        )
+        await tester.run_test()
+        summary = tester.get_results().summary()
+        self.assertEqual(summary["connection_errors"], 3)
+        self.assertEqual(summary["completed_requests"], 0)
+        # Requests waiting for a connection slot are woken when a dial fails
+        tester = LoadTester(
+            f"http://127.0.0.1:{port}/",
+            total_requests=20,
+            concurrency=4,
+            engine="raw",
+            pipeline_depth=2,
+            preflight=False,
+        )
+        await asyncio.wait_for(tester.run_test(), 5)
+        self.assertEqual(tester.get_results().connection_errors, 20)
+
+    def test_engine_options(self):
+        with self.assertRaises(LoadTesterError):
+            LoadTester("http://127.0.0.1/", engine="curl")
+        with self.assertRaises(LoadTesterError):
+            LoadTester("http://127.0.0.1/", pipeline_depth=2)
+        with self.assertRaises(LoadTesterError):
+            RawHTTPEngine(pipeline_depth=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import time
+import aiohttp
+
+
+class RequestTrace:
+    # Per-request phase timestamps (perf_counter values) filled in by the
+    # aiohttp trace hooks below. A phase that did not happen stays None, e.g.
+    # DNS and connect on a reused keep-alive connection.
+    __slots__ = (
+        "start",
+        "dns_start",
+        "dns_end",
+        "connect_start",
+        "connect_end",
+        "request_sent",
+        "first_byte",
+        "reused",
+    )
+
+    def __init__(self, start):
+        self.start = start
+        self.dns_start = None
+        self.dns_end = None
+        self.connect_start = None
+        self.connect_end = None
+        self.request_sent = None
+        self.first_byte = None
+        self.reused = False
+
+    def dns_time(self):
+        if self.dns_start is None or self.dns_end is None:
+            return 0
+        return self.dns_end - self.dns_start
+
+    def connect_time(self):
+        # TCP connect plus TLS handshake for a new connection, without DNS.
+        # aiohttp opens the socket and wraps it in TLS in one step, so the
+        # handshake cannot be separated from the TCP connect here.
+        if self.connect_start is None or self.connect_end is None:
+            return 0
+        return self.connect_end - self.connect_start - self.dns_time()
+
+    def wait_time(self, first_byte):
+        # Time to first byte: from the request being sent to the response headers
+        return first_byte - (self.request_sent or self.start)
+
+
+async def on_dns_resolvehost_start(session, context, params):
+    context.trace_request_ctx.dns_start = time.perf_counter()
+
+
+async def on_dns_resolvehost_end(session, context, params):
+    context.trace_request_ctx.dns_end = time.perf_counter()
+
+
+async def on_connection_create_start(session, context, params):
+    context.trace_request_ctx.connect_start = time.perf_counter()
+
+
+async def on_connection_create_end(session, context, params):
+    context.trace_request_ctx.connect_end = time.perf_counter()
+
+
+async def on_connection_reuseconn(session, context, params):
+    context.trace_request_ctx.reused = True
+
+
+async def on_request_headers_sent(session, context, params):
+    context.trace_request_ctx.request_sent = time.perf_counter()
+
+
+async def on_request_chunk_sent(session, context, params):
+    # The request counts as sent once its last body chunk is written
+    context.trace_request_ctx.request_sent = time.perf_counter()
+
+
+async def on_request_end(session, context, params):
+    # Fired once the response status line and headers have been read
+    context.trace_request_ctx.first_byte = time.perf_counter()
+
+
+def make_trace_config():
+    # TraceConfig that records phase timestamps into the RequestTrace passed to
+    # session.request(..., trace_request_ctx=RequestTrace(start))
+    config = aiohttp.TraceConfig()
+    config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+    config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    config.on_connection_create_start.append(on_connection_create_start)
+    config.on_connection_create_end.append(on_connection_create_end)
+    config.on_connection_reuseconn.append(on_connection_reuseconn)
+    config.on_request_headers_sent.append(on_request_headers_sent)
+    config.on_request_chunk_sent.append(on_request_chunk_sent)
+    config.on_request_end.append(on_request_end)
+    return config
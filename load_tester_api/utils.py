@@ -1,3 +1,4 @@
+import re
 from urllib.parse import urlparse
 from .errors import LoadTesterError
 
@@ -8,6 +9,27 @@ def validate_url(url):
         raise LoadTesterError(f"Invalid URL: {url}")
 
 
+# A comma only separates headers when the next header's name follows it, so
+# values such as "Accept: text/html, application/json" stay intact
+HEADER_SEPARATOR = re.compile(r",\s*(?=[!#$%&'*+.^_`|~0-9A-Za-z-]+\s*:)")
+
+
+def parse_header(header):
+    # Split one "Key: Value" header on its first colon only, so values may
+    # contain colons (e.g. URLs)
+    key, separator, value = header.partition(":")
+    if not separator or not key.strip():
+        raise LoadTesterError(f"Invalid header: {header.strip()}")
+    return key.strip(), value.strip()
+
+
+def parse_headers(text):
+    # Parse "Key1: Value1, Key2: Value2" into a dict
+    if not text:
+        return {}
+    return dict(parse_header(header) for header in HEADER_SEPARATOR.split(text))
+
+
 def batch_output_folder():
     return "outputs/batch"
 